@@ -3,20 +3,26 @@ GitHub Issue Assistant - Backend API
 FastAPI application for analyzing GitHub issues using AI
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
+import orjson
 from dotenv import load_dotenv
 
+from services.compression_service import CompressionMiddleware
+
 # Load environment variables
 load_dotenv()
 
 app = FastAPI(
     title="GitHub Issue Assistant API",
     description="AI-powered GitHub issue analysis",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes large result lists several times faster than json
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
@@ -28,12 +34,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/zstd by Accept-Encoding; small responses are sent uncompressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+)
+
 
 # Request/Response Models
 class AnalyzeRequest(BaseModel):
     """Request model for issue analysis"""
+    repo_url: str = Field(..., description="GitHub repository or issue URL, or owner/repo", json_schema_extra={"example": "https://github.com/facebook/react"})
+    issue_number: Optional[int] = Field(None, description="Issue number (optional when repo_url is an issue link)", gt=0, json_schema_extra={"example": 123})
+
+
+class BatchAnalyzeRequest(BaseModel):
+    """Request model for analyzing many issues of one repository"""
     repo_url: str = Field(..., description="GitHub repository URL", json_schema_extra={"example": "https://github.com/facebook/react"})
-    issue_number: int = Field(..., description="Issue number", gt=0, json_schema_extra={"example": 123})
+    issue_numbers: List[int] = Field(..., description="Issue numbers to analyze", min_length=1, max_length=2000, json_schema_extra={"example": [1, 2, 3]})
 
 
 class IssueAnalysis(BaseModel):
@@ -43,8 +61,19 @@ class IssueAnalysis(BaseModel):
     priority_score: str = Field(..., description="Priority score from 1-5 with justification")
     suggested_labels: List[str] = Field(..., description="2-3 relevant labels")
     potential_impact: str = Field(..., description="Potential impact on users")
+    priority: Optional[int] = Field(None, description="Priority from 1 (low) to 5 (critical); null if the model gave none")
+    priority_reason: str = Field("", description="Justification of the priority")
+    cache_age_seconds: Optional[float] = Field(None, description="Age of a cached analysis in seconds; null when freshly computed")
     
 
+def tenant_id(request: Request) -> str:
+    """Identify who a request is for: its API key, else the client address"""
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return api_key
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -56,41 +85,238 @@ async def root():
 
 
 @app.post("/analyze", response_model=IssueAnalysis)
-async def analyze_issue(request: AnalyzeRequest):
+async def analyze_issue(request: AnalyzeRequest, response: Response, http_request: Request):
     """
     Analyze a GitHub issue using AI
     
+    Previously analyzed issues are served from the cache, with their age
+    in cache_age_seconds and the Age header.
+    
     Args:
         request: AnalyzeRequest containing repo URL and issue number
+        response: Outgoing response, used to set the Age header
+        http_request: Incoming request, used to identify the tenant
         
     Returns:
         IssueAnalysis: Structured analysis of the issue
     """
+    from services.scheduler_service import AdmissionRejected, set_request_context, INTERACTIVE
+    
     try:
         # Import services
-        from services.github_service import fetch_issue_data
-        from services.ai_service import analyze_issue_with_ai
+        from services.github_service import resolve_issue_number
+        from services.analysis_service import get_analysis
         
-        # Fetch issue data from GitHub
-        issue_data = await fetch_issue_data(request.repo_url, request.issue_number)
+        set_request_context(tenant_id(http_request), INTERACTIVE)
+        issue_number = resolve_issue_number(request.repo_url, request.issue_number)
         
-        # Analyze with AI
-        analysis = await analyze_issue_with_ai(issue_data)
+        # Cached analyses are returned immediately and refreshed in the background
+        analysis, age = await get_analysis(request.repo_url, issue_number)
         
-        return analysis
+        if age is not None:
+            response.headers["Age"] = str(int(age))
+        return IssueAnalysis(**analysis, cache_age_seconds=age)
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after + 0.5))}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest, http_request: Request):
+    """
+    Analyze many issues, streaming results as NDJSON as they complete
+    
+    Each line is {"issue_number", "analysis", "cache_age_seconds"} or
+    {"issue_number", "error"}, in completion order.
+    
+    Args:
+        request: BatchAnalyzeRequest containing repo URL and issue numbers
+        http_request: Incoming request, used to identify the tenant
+    """
+    from services.github_service import parse_repo_url
+    from services.analysis_service import analyze_batch as run_batch
+    from services.scheduler_service import AdmissionRejected, get_scheduler, set_request_context, BATCH
+    
+    if any(n <= 0 for n in request.issue_numbers):
+        raise HTTPException(status_code=400, detail="Issue numbers must be positive")
+    try:
+        parse_repo_url(request.repo_url)
+        # Shed the whole batch up front rather than failing it item by item
+        get_scheduler().check_admission(BATCH)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after + 0.5))}
+        )
+    
+    tenant = tenant_id(http_request)
+    
+    async def stream_results():
+        set_request_context(tenant, BATCH)
+        async for result in run_batch(
+            request.repo_url,
+            request.issue_numbers,
+            concurrency=int(os.getenv("BATCH_CONCURRENCY", "4"))
+        ):
+            yield orjson.dumps(result) + b"\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.get("/export")
+def export_analyses(
+    repo_url: str = Query(..., description="GitHub repository URL"),
+    fmt: str = Query("ndjson", alias="format", description="ndjson, arrow or parquet"),
+):
+    """
+    Export every stored analysis of a repository
+    
+    NDJSON streams one analysis per line; arrow (IPC stream) and parquet
+    are columnar with dictionary-encoded type and label columns. All
+    formats are streamed in chunks with constant memory.
+    """
+    from services.github_service import parse_repo_url
+    from services.export_service import export_chunks, EXPORT_FORMATS
+    
+    try:
+        owner, repo = parse_repo_url(repo_url)
+        chunks = export_chunks(owner, repo, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    extension = "arrows" if fmt == "arrow" else fmt
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{owner}_{repo}_analyses.{extension}"'}
+    )
+
+
+@app.get("/analyses")
+def list_analyses(
+    repo_url: str = Query(..., description="GitHub repository URL"),
+    issue_type: Optional[str] = Query(None, alias="type", description="Only this issue type, e.g. bug"),
+    min_priority: Optional[int] = Query(None, ge=1, le=5, description="Only analyses with at least this priority"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of analyses"),
+):
+    """
+    Highest-priority stored analyses of a repository
+    
+    Served from indexes over the stored analyses, e.g. the top 50
+    critical bugs: ?type=bug&min_priority=5&limit=50.
+    """
+    from services.github_service import parse_repo_url
+    from services.export_service import query_stored_analyses
+    
+    try:
+        owner, repo = parse_repo_url(repo_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return query_stored_analyses(owner, repo, issue_type, min_priority, limit)
+
+
+@app.post("/webhooks/github", status_code=202)
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(""),
+    x_hub_signature_256: Optional[str] = Header(None),
+):
+    """
+    Receive GitHub `issues` / `issue_comment` webhooks
+    
+    Verifies the delivery signature and queues a debounced analysis, so
+    the result is already cached when users look the issue up.
+    """
+    from services.webhook_service import handle_webhook, WebhookSignatureError
+    from services.scheduler_service import set_request_context, BATCH
+    
+    # Debounced analyses inherit this context: pre-analysis is batch work
+    set_request_context("webhook", BATCH)
+    body = await request.body()
+    try:
+        return await handle_webhook(x_github_event, body, x_hub_signature_256)
+    except WebhookSignatureError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """LLM queue depth, wait times and admission counters for this worker"""
+    from services.scheduler_service import get_scheduler
+    
+    return get_scheduler().stats()
+
+
+@app.get("/models/stats")
+async def model_stats():
+    """Per-route LLM calls, escalations, latency, tokens and cost for this worker"""
+    from services.routing_service import get_router
+    
+    try:
+        return get_router().stats()
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/health")
 async def health_check():
     """Health check for monitoring"""
     return {"status": "healthy"}
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the worker's event loop is serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe: 503 while GitHub or the LLM is failing or slow, the LLM
+    queue is over its SLO, or the cache is unavailable
+    
+    Built from stats of recent real traffic and cached for a few seconds;
+    probing never calls GitHub or the LLM.
+    """
+    from services.health_service import get_readiness_probe
+    
+    report = get_readiness_probe().report()
+    if report["status"] != "ready":
+        response.status_code = 503
+    return report
+
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    parser = argparse.ArgumentParser(description="Run the GitHub Issue Assistant API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="Number of worker processes (0 = one per CPU core)"
+    )
+    args = parser.parse_args()
+    
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1:
+        # Workers are separate processes, so uvicorn needs an import string;
+        # they share analyses through the SQLite cache (see cache_service)
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
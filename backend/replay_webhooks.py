@@ -0,0 +1,48 @@
+"""
+Replay recorded GitHub webhook deliveries against a running API
+
+Usage (from the backend directory):
+    python replay_webhooks.py ../tests/fixtures/webhook_deliveries.ndjson \
+        --url http://localhost:8000/webhooks/github
+"""
+
+import argparse
+import asyncio
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+from services.webhook_service import load_recorded_deliveries, replay_deliveries
+
+
+async def main(path: str, url: str, secret: str) -> None:
+    deliveries = load_recorded_deliveries(path)
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        async def send(event: str, body: bytes, signature: str):
+            response = await client.post(
+                url,
+                content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-GitHub-Event": event,
+                    "X-Hub-Signature-256": signature
+                }
+            )
+            print(f"{event}: {response.status_code} {response.text}")
+            return response
+
+        await replay_deliveries(deliveries, send, secret)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub webhook deliveries")
+    parser.add_argument("path", help="NDJSON file of recorded deliveries")
+    parser.add_argument("--url", default="http://localhost:8000/webhooks/github")
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET", ""))
+    args = parser.parse_args()
+
+    asyncio.run(main(args.path, args.url, args.secret))
@@ -2,12 +2,36 @@
 AI Service - Analyze GitHub issues using LLM
 """
 
-import os
 import json
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+import logging
+import re
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, Optional, Set, Tuple
 from langchain.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from .label_service import LabelIndex
+from .preprocess_service import preprocess_text
+from .routing_service import get_router
+
+
+logger = logging.getLogger(__name__)
+
+
+_PRIORITY_RE = re.compile(r"\s*(?:p(?:riority)?\s*)?([1-5])(?![\d.])\s*(?:/\s*5)?\s*[-\u2013\u2014:.)]*\s*(.*)", re.I | re.S)
+
+
+def parse_priority(priority_score: str) -> Tuple[Optional[int], str]:
+    """
+    Split a "4 - justification" priority string into its parts
+    
+    Returns:
+        Tuple of (priority 1-5 or None if there is no leading score, reason)
+    """
+    match = _PRIORITY_RE.match(priority_score or "")
+    if match is None:
+        return None, (priority_score or "").strip()
+    return int(match.group(1)), match.group(2).strip()
 
 
 # Define IssueAnalysis model here to avoid circular imports
@@ -18,25 +42,39 @@ class IssueAnalysis(BaseModel):
     priority_score: str = Field(..., description="Priority score from 1-5 with justification")
     suggested_labels: list[str] = Field(..., description="2-3 relevant labels")
     potential_impact: str = Field(..., description="Potential impact on users")
+    priority: Optional[int] = Field(None, ge=1, le=5, description="Priority from 1 (low) to 5 (critical)")
+    priority_reason: str = Field("", description="Justification of the priority")
+    
+    @model_validator(mode="before")
+    @classmethod
+    def fill_priority_fields(cls, data: Any) -> Any:
+        """Derive priority/priority_reason from priority_score, or the other way round"""
+        if not isinstance(data, dict):
+            return data
+        data = dict(data)
+        if data.get("priority_score") is None and data.get("priority") is not None:
+            reason = data.get("priority_reason") or ""
+            data["priority_score"] = f"{data['priority']} - {reason}" if reason else str(data["priority"])
+        elif data.get("priority") is None and isinstance(data.get("priority_score"), str):
+            priority, reason = parse_priority(data["priority_score"])
+            data["priority"] = priority
+            data.setdefault("priority_reason", reason)
+        return data
 
 
-# Initialize LLM
-def get_llm():
-    """Initialize and return OpenAI LLM"""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY not found in environment variables. "
-            "Please add it to your .env file."
-        )
-    
-    return ChatOpenAI(
-        model="gpt-4o-mini",  # Using GPT-4 for best results
-        temperature=0.3,  # Lower temperature for more consistent outputs
-        api_key=SecretStr(api_key)
-    )
+# Number of comments included in the prompt
+MAX_PROMPT_COMMENTS = 5
+
+# Most new comments folded in with one delta update; all of them go in the
+# delta prompt, and more re-run the full analysis
+MAX_DELTA_COMMENTS = 20
+
 
+# Issue types the prompt asks for
+ISSUE_TYPES = {"bug", "feature_request", "documentation", "question", "other"}
 
+
+# Initialize LLM
 def create_analysis_prompt() -> ChatPromptTemplate:
     """
     Create a comprehensive prompt for issue analysis
@@ -65,6 +103,7 @@ Analyze the above GitHub issue and provide a structured JSON response with the f
 3. **priority_score**: A score from 1 (low) to 5 (critical) with a brief justification (format: "3 - Justification here")
 4. **suggested_labels**: An array of 2-3 relevant GitHub labels (e.g., ["bug", "UI", "high-priority"])
 5. **potential_impact**: A brief sentence on the potential impact on users (especially important for bugs)
+6. **confidence**: How confident you are in this analysis, from 0.0 (guessing) to 1.0 (certain)
 
 **Guidelines:**
 - Be concise but informative
@@ -72,6 +111,7 @@ Analyze the above GitHub issue and provide a structured JSON response with the f
 - Consider edge cases mentioned in comments
 - If it's clearly a bug, rate priority higher
 - For feature requests, consider user demand and alignment with project goals
+- {label_guidance}
 
 **Example Output Format:**
 {{
@@ -79,7 +119,8 @@ Analyze the above GitHub issue and provide a structured JSON response with the f
   "type": "bug",
   "priority_score": "4 - Critical login functionality broken, affects all OAuth users",
   "suggested_labels": ["bug", "authentication", "high-priority"],
-  "potential_impact": "All users using OAuth authentication cannot login, blocking access to the application"
+  "potential_impact": "All users using OAuth authentication cannot login, blocking access to the application",
+  "confidence": 0.9
 }}
 
 Now analyze the issue and provide your response in valid JSON format:"""
@@ -87,13 +128,55 @@ Now analyze the issue and provide your response in valid JSON format:"""
     return ChatPromptTemplate.from_template(prompt_template)
 
 
-def format_comments_for_prompt(comments: list) -> str:
-    """Format comments for LLM prompt"""
-    if not comments:
+def create_delta_prompt() -> ChatPromptTemplate:
+    """
+    Create a prompt that updates an existing analysis with new comments
+    
+    Much shorter than the full prompt: the issue body is not repeated,
+    only the previous analysis and the comments added since.
+    """
+    
+    prompt_template = """You are an expert software engineer and project manager keeping a GitHub issue analysis up to date.
+
+**Issue Information:**
+Repository: {repo_owner}/{repo_name}
+Issue #{issue_number}: {title}
+
+**Previous Analysis:**
+{previous_analysis}
+
+**New Comments Since That Analysis:**
+{comments}
+
+---
+
+**Your Task:**
+Update the previous analysis with what the new comments add (e.g. reproduction details, workarounds, more affected users, a confirmed root cause). Keep fields that are still accurate unchanged. Respond with the complete analysis as valid JSON with the same fields as the previous analysis (summary, type, priority_score in the format "3 - Justification", suggested_labels, potential_impact) plus confidence from 0.0 to 1.0.
+- {label_guidance}"""
+
+    return ChatPromptTemplate.from_template(prompt_template)
+
+
+def format_comments_for_prompt(
+    comments: Iterable[Dict[str, Any]],
+    total_count: Optional[int] = None,
+    limit: int = MAX_PROMPT_COMMENTS,
+) -> str:
+    """
+    Format comments for LLM prompt
+    
+    Args:
+        comments: Comments to format; only the first `limit` are consumed
+        total_count: Total comments on the issue (defaults to the number consumed)
+        limit: Most comments included
+    """
+    # Limit to the first few comments to avoid token limits
+    comments_to_include = list(islice(comments, limit))
+    if not comments_to_include:
         return "No comments yet."
     
-    # Limit to first 5 comments to avoid token limits
-    comments_to_include = comments[:5]
+    if total_count is None:
+        total_count = len(comments_to_include)
     formatted = []
     
     for i, comment in enumerate(comments_to_include, 1):
@@ -104,36 +187,110 @@ def format_comments_for_prompt(comments: list) -> str:
             body = body[:500] + "... [truncated]"
         formatted.append(f"Comment {i} by @{user}:\n{body}")
     
-    if len(comments) > 5:
-        formatted.append(f"\n... and {len(comments) - 5} more comments")
+    if total_count > len(comments_to_include):
+        formatted.append(f"\n... and {total_count - len(comments_to_include)} more comments")
     
     return "\n\n".join(formatted)
 
 
-async def analyze_issue_with_ai(issue_data: Dict[str, Any]) -> IssueAnalysis:
+def preprocess_comments(comments: Iterable[Dict[str, Any]], seen: Set[str]) -> Iterator[Dict[str, Any]]:
+    """Lazily clean comment bodies; quotes of the body or earlier comments are dropped"""
+    for comment in comments:
+        yield {
+            "user": comment.get("user", "Unknown"),
+            "body": preprocess_text(comment.get("body", "") or "", seen).text,
+        }
+
+
+def parse_analysis_response(response_text: str) -> Tuple[IssueAnalysis, float]:
+    """
+    Parse and validate an LLM response
+    
+    Output that parses but breaks the format rules (unknown type, priority
+    outside 1-5, no labels) is returned with confidence 0 so the router
+    escalates it to a stronger model.
+    
+    Returns:
+        Tuple of (IssueAnalysis, confidence between 0 and 1)
+        
+    Raises:
+        ValueError: If the response is not valid JSON or misses required fields
+    """
+    # Try to extract JSON if it's wrapped in markdown code blocks
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    
+    try:
+        analysis_dict = json.loads(response_text)
+        confidence = float(analysis_dict.pop("confidence", 1.0))
+        analysis = IssueAnalysis(**analysis_dict)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse LLM response as JSON: {str(e)}\nResponse: {response_text}")
+    except (AttributeError, TypeError, ValidationError) as e:
+        raise ValueError(f"LLM response does not match the analysis format: {str(e)}")
+    
+    if (
+        analysis.type not in ISSUE_TYPES
+        or analysis.priority is None
+        or not analysis.suggested_labels
+    ):
+        confidence = 0.0
+    
+    return analysis, min(1.0, max(0.0, confidence))
+
+
+def format_label_guidance(label_index: Optional[LabelIndex], issue_text: str) -> str:
+    """Prompt line offering the repository's most relevant labels"""
+    if not label_index:
+        return "Suggest labels commonly used on GitHub"
+    labels = ", ".join(json.dumps(label) for label in label_index.relevant(issue_text))
+    return f"Pick suggested_labels from this repository's labels where possible: {labels}"
+
+
+async def analyze_issue_with_ai(
+    issue_data: Dict[str, Any],
+    label_index: Optional[LabelIndex] = None,
+) -> IssueAnalysis:
     """
     Analyze GitHub issue using LLM
     
+    The prompt goes to the cheapest configured model first and is
+    escalated to stronger ones only on invalid or low-confidence output
+    (see routing_service).
+    
     Args:
         issue_data: Dictionary containing issue information from GitHub
+        label_index: The repository's labels; suggested labels are mapped onto them
         
     Returns:
         IssueAnalysis: Structured analysis result
     """
     try:
-        # Initialize LLM
-        llm = get_llm()
-        
         # Create prompt
         prompt = create_analysis_prompt()
         
+        # Strip template boilerplate, HTML comments and log noise before truncating
+        seen: Set[str] = set()
+        cleaned = preprocess_text(issue_data.get("body", "") or "", seen)
+        logger.info(
+            "Preprocessed %s/%s#%s: %d -> %d bytes (~%d tokens saved)",
+            issue_data.get("repo_owner", ""), issue_data.get("repo_name", ""),
+            issue_data.get("issue_number", ""),
+            cleaned.bytes_before, cleaned.bytes_after, cleaned.tokens_saved,
+        )
+        
         # Format issue body (handle None and truncate if too long)
-        body = issue_data.get("body", "") or "No description provided."
+        body = cleaned.text or "No description provided."
         if len(body) > 2000:
             body = body[:2000] + "... [truncated for length]"
         
         # Format comments
-        comments_text = format_comments_for_prompt(issue_data.get("comments", []))
+        comments_text = format_comments_for_prompt(
+            preprocess_comments(issue_data.get("comments", []), seen),
+            total_count=issue_data.get("comments_count")
+        )
         
         # Prepare prompt variables
         prompt_vars = {
@@ -143,33 +300,70 @@ async def analyze_issue_with_ai(issue_data: Dict[str, Any]) -> IssueAnalysis:
             "title": issue_data.get("title", ""),
             "body": body,
             "comments_count": issue_data.get("comments_count", 0),
-            "comments": comments_text
+            "comments": comments_text,
+            "label_guidance": format_label_guidance(
+                label_index, f"{issue_data.get('title', '')}\n{body}"
+            )
         }
         
         # Create the full prompt
         messages = prompt.format_messages(**prompt_vars)
         
-        # Get LLM response
-        response = llm.invoke(messages)
-        # Convert content to string (it might be a list)
-        response_text = str(response.content) if isinstance(response.content, list) else response.content
+        # Get a validated analysis from the cheapest sufficiently confident model
+        analysis, _ = await get_router().run(messages, parse_analysis_response)
         
-        # Parse JSON response
-        # Try to extract JSON if it's wrapped in markdown code blocks
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
+        if label_index:
+            analysis.suggested_labels = label_index.map_labels(analysis.suggested_labels)
+        return analysis
         
-        # Parse the JSON
-        analysis_dict = json.loads(response_text)
+    except Exception as e:
+        raise ValueError(f"Error during AI analysis: {str(e)}")
+
+
+async def analyze_issue_delta(
+    previous: Dict[str, Any],
+    issue_data: Dict[str, Any],
+    new_comments: Iterable[Dict[str, Any]],
+    label_index: Optional[LabelIndex] = None,
+) -> IssueAnalysis:
+    """
+    Update a previous analysis with comments added since it was made
+    
+    Args:
+        previous: The previous analysis
+        issue_data: Current issue information (title, repo, number)
+        new_comments: Comments added since the previous analysis
+        label_index: The repository's labels; suggested labels are mapped onto them
         
-        # Validate and create IssueAnalysis object
-        analysis = IssueAnalysis(**analysis_dict)
+    Returns:
+        IssueAnalysis: The updated analysis
+    """
+    try:
+        new_comments = list(new_comments)
+        comments_text = format_comments_for_prompt(
+            preprocess_comments(new_comments, set()), len(new_comments), limit=MAX_DELTA_COMMENTS
+        )
+        previous_fields = {
+            name: previous.get(name)
+            for name in ("summary", "type", "priority_score", "suggested_labels", "potential_impact")
+        }
+        messages = create_delta_prompt().format_messages(
+            repo_owner=issue_data.get("repo_owner", ""),
+            repo_name=issue_data.get("repo_name", ""),
+            issue_number=issue_data.get("issue_number", ""),
+            title=issue_data.get("title", ""),
+            previous_analysis=json.dumps(previous_fields, indent=2),
+            comments=comments_text,
+            label_guidance=format_label_guidance(
+                label_index, f"{issue_data.get('title', '')}\n{comments_text}"
+            )
+        )
+        
+        analysis, _ = await get_router().run(messages, parse_analysis_response)
         
+        if label_index:
+            analysis.suggested_labels = label_index.map_labels(analysis.suggested_labels)
         return analysis
         
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse LLM response as JSON: {str(e)}\nResponse: {response_text}")
     except Exception as e:
         raise ValueError(f"Error during AI analysis: {str(e)}")
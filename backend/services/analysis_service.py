@@ -0,0 +1,356 @@
+"""
+Analysis Service - Cached analysis pipeline with stale-while-revalidate
+
+Previously analyzed issues are served straight from the shared cache.
+Once an entry is older than ANALYSIS_FRESH_TTL it is still served, but a
+background refresh checks whether the issue changed on GitHub. Edits
+to the title or body trigger a full re-analysis, new substantive
+comments only a short delta prompt, and trivial comments ("+1") or
+reactions nothing at all. ANALYSIS_CACHE_TTL bounds how long an
+analysis is kept without a full re-analysis.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .github_service import fetch_comments_since, fetch_issue_data, parse_repo_url, IssueRecord
+from .ai_service import (
+    analyze_issue_delta, analyze_issue_with_ai, IssueAnalysis, MAX_DELTA_COMMENTS, MAX_PROMPT_COMMENTS
+)
+from .change_service import (
+    content_hash, detect_changes, is_trivial_comment, take_snapshot, COMMENTS, FULL, UNCHANGED
+)
+from .label_service import get_label_index
+from .cache_service import (
+    get_cache, cache_ttl, issue_cache_key, ANALYSIS_NAMESPACE, GITHUB_NAMESPACE
+)
+from .scheduler_service import get_scheduler, current_priority, BATCH
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """
+    Runs background refreshes with bounded concurrency
+
+    At most max_concurrency refreshes call the LLM at once, each key is
+    refreshed at most once at a time, and schedule() refuses new work
+    once max_pending refreshes are queued so bursts are shed.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_pending: int = 32):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running refreshes"""
+        return len(self._pending)
+
+    def schedule(self, key: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Queue a refresh for key unless one is already pending
+
+        Returns:
+            True if the refresh was queued
+        """
+        if key in self._pending or len(self._pending) >= self.max_pending:
+            return False
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self._pending.add(key)
+        task = asyncio.get_running_loop().create_task(self._run(key, refresh))
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+        # Refreshes never compete with interactive requests for the LLM
+        current_priority.set(BATCH)
+        try:
+            async with self._semaphore:
+                await refresh()
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            self._pending.discard(key)
+
+    async def drain(self) -> None:
+        """Wait for all scheduled refreshes to finish"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+refresher = BackgroundRefresher(
+    max_concurrency=int(os.getenv("REFRESH_CONCURRENCY", "2")),
+    max_pending=int(os.getenv("REFRESH_MAX_PENDING", "32")),
+)
+
+
+async def get_issue_data(repo_url: str, issue_number: int, use_cache: bool = True) -> IssueRecord:
+    """
+    Fetch issue data, going through the shared GitHub response cache
+
+    Args:
+        repo_url: GitHub repository URL
+        issue_number: Issue number to fetch
+        use_cache: Read from the cache before calling GitHub
+    """
+    owner, repo = parse_repo_url(repo_url)
+    cache = get_cache()
+    cache_key = issue_cache_key(owner, repo, issue_number)
+
+    if use_cache:
+        cached = cache.get(GITHUB_NAMESPACE, cache_key)
+        if cached is not None:
+            return IssueRecord.from_dict(cached)
+
+    issue_data = await fetch_issue_data(repo_url, issue_number, max_comments=MAX_PROMPT_COMMENTS)
+    cache.set(GITHUB_NAMESPACE, cache_key, issue_data.to_dict(), ttl=cache_ttl("GITHUB_CACHE_TTL", 300))
+    return issue_data
+
+
+async def run_analysis(
+    repo_url: str,
+    issue_number: int,
+    issue_data: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze an issue and store the result in the shared cache
+
+    Args:
+        repo_url: GitHub repository URL
+        issue_number: Issue number to analyze
+        issue_data: Already fetched issue data (fetched if omitted)
+
+    Returns:
+        The analysis as a dictionary
+
+    Raises:
+        AdmissionRejected: If the LLM queue is over its SLO
+    """
+    scheduler = get_scheduler()
+    if issue_data is None:
+        # Shed load before spending a GitHub request on work we'd reject
+        scheduler.check_admission()
+        issue_data = await get_issue_data(repo_url, issue_number)
+
+    owner, repo = parse_repo_url(repo_url)
+    label_index = await get_label_index(owner, repo)
+
+    async with scheduler.slot():
+        analysis = (await analyze_issue_with_ai(issue_data, label_index)).model_dump()
+
+    store_analysis(owner, repo, issue_number, analysis, issue_data, take_snapshot(issue_data), time.time())
+    return analysis
+
+
+def store_analysis(
+    owner: str,
+    repo: str,
+    issue_number: int,
+    analysis: Dict[str, Any],
+    issue_data: Dict[str, Any],
+    snapshot: Dict[str, Any],
+    analyzed_at: float,
+) -> None:
+    """Store an analysis with the snapshot of the issue it covers"""
+    get_cache().set(
+        ANALYSIS_NAMESPACE,
+        issue_cache_key(owner, repo, issue_number),
+        {
+            "analysis": analysis,
+            "updated_at": issue_data.get("updated_at", ""),
+            "analyzed_at": analyzed_at,
+            "snapshot": snapshot
+        }
+    )
+
+
+async def update_analysis(
+    repo_url: str,
+    issue_number: int,
+    stored: Dict[str, Any],
+    issue_data: Dict[str, Any],
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Bring a stored analysis up to date with the current issue
+
+    Title or body edits re-run the full analysis. When only comments were
+    added, the substantive ones are folded in with the delta prompt;
+    trivial comments and reactions just update the stored snapshot. More
+    than MAX_DELTA_COMMENTS new comments also re-run the full analysis,
+    since a delta would only see some of them.
+
+    Returns:
+        Tuple of (analysis, FULL / COMMENTS / UNCHANGED)
+    """
+    change = detect_changes(stored.get("snapshot"), issue_data)
+    if change.kind == FULL:
+        logger.info("Re-analyzing %s#%s: %s", repo_url, issue_number, change.reason)
+        return await run_analysis(repo_url, issue_number, issue_data), FULL
+
+    owner, repo = parse_repo_url(repo_url)
+    snapshot = dict(stored["snapshot"], comments_count=issue_data.get("comments_count", 0))
+
+    if change.kind == COMMENTS:
+        since = stored.get("updated_at")
+        added = snapshot["comments_count"] - stored["snapshot"]["comments_count"]
+        if since and added <= MAX_DELTA_COMMENTS:
+            # One extra comment tells whether the delta would be cut off (edits count too)
+            comments = await fetch_comments_since(repo_url, issue_number, since, MAX_DELTA_COMMENTS + 1)
+            too_many = len(comments) > MAX_DELTA_COMMENTS
+        else:
+            comments = issue_data.get("comments", [])
+            too_many = added > MAX_DELTA_COMMENTS
+        if too_many:
+            logger.info("Re-analyzing %s#%s: too many new comments for a delta", repo_url, issue_number)
+            return await run_analysis(repo_url, issue_number, issue_data), FULL
+
+        known = set(snapshot["comments"])
+        new_comments, new_hashes = [], []
+        for comment in comments:
+            body = comment.get("body", "")
+            digest = content_hash(body)
+            if not is_trivial_comment(body) and digest not in known:
+                known.add(digest)
+                new_comments.append(comment)
+                new_hashes.append(digest)
+        snapshot["comments"] = snapshot["comments"] + new_hashes
+
+        if new_comments:
+            label_index = await get_label_index(owner, repo)
+            async with get_scheduler().slot():
+                analysis = (await analyze_issue_delta(
+                    stored["analysis"], issue_data, new_comments, label_index
+                )).model_dump()
+            store_analysis(owner, repo, issue_number, analysis, issue_data, snapshot, time.time())
+            return analysis, COMMENTS
+
+    # Nothing substantive: keep the analysis, restart its freshness window
+    store_analysis(
+        owner, repo, issue_number, stored["analysis"], issue_data, snapshot,
+        stored.get("analyzed_at", time.time())
+    )
+    return stored["analysis"], UNCHANGED
+
+
+async def refresh_analysis(repo_url: str, issue_number: int) -> Dict[str, Any]:
+    """
+    Fetch the latest issue data and update its analysis
+
+    Used when GitHub reports that the issue changed, so the GitHub
+    response cache is bypassed. Only changes that matter reach the LLM.
+    """
+    issue_data = await get_issue_data(repo_url, issue_number, use_cache=False)
+    owner, repo = parse_repo_url(repo_url)
+    stored = get_cache().get(ANALYSIS_NAMESPACE, issue_cache_key(owner, repo, issue_number))
+    if stored is None:
+        return await run_analysis(repo_url, issue_number, issue_data)
+    analysis, _ = await update_analysis(repo_url, issue_number, stored, issue_data)
+    return analysis
+
+
+async def revalidate_analysis(repo_url: str, issue_number: int, stored: Dict[str, Any]) -> bool:
+    """
+    Update a cached analysis if the issue changed on GitHub or it is too old
+
+    Returns:
+        True if a new analysis was produced
+    """
+    issue_data = await get_issue_data(repo_url, issue_number, use_cache=False)
+    analysis_age = time.time() - stored.get("analyzed_at", 0)
+
+    if analysis_age >= cache_ttl("ANALYSIS_CACHE_TTL", 3600):
+        await run_analysis(repo_url, issue_number, issue_data)
+        return True
+
+    _, action = await update_analysis(repo_url, issue_number, stored, issue_data)
+    return action != UNCHANGED
+
+
+def get_cached_analysis(repo_url: str, issue_number: int) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Return a stored analysis without calling GitHub or the LLM
+
+    Stale entries are returned as-is and a bounded background refresh
+    is scheduled for them.
+
+    Returns:
+        Tuple of (analysis dict, age in seconds), or None if never analyzed
+    """
+    owner, repo = parse_repo_url(repo_url)
+    cache_key = issue_cache_key(owner, repo, issue_number)
+    entry = get_cache().get_entry(ANALYSIS_NAMESPACE, cache_key)
+    if entry is None:
+        return None
+
+    stored = entry.value
+    if entry.age >= cache_ttl("ANALYSIS_FRESH_TTL", 300):
+        refresher.schedule(
+            cache_key, lambda: revalidate_analysis(repo_url, issue_number, stored)
+        )
+
+    # Older entries get the fields added since they were stored
+    analysis = IssueAnalysis(**stored["analysis"]).model_dump()
+    return analysis, max(0.0, time.time() - stored.get("analyzed_at", entry.stored_at))
+
+
+async def get_analysis(repo_url: str, issue_number: int) -> Tuple[Dict[str, Any], Optional[float]]:
+    """
+    Return an analysis, serving cached results immediately
+
+    Returns:
+        Tuple of (analysis dict, age in seconds or None if freshly computed)
+    """
+    cached = get_cached_analysis(repo_url, issue_number)
+    if cached is not None:
+        return cached
+    return await run_analysis(repo_url, issue_number), None
+
+
+async def analyze_batch(
+    repo_url: str,
+    issue_numbers: List[int],
+    concurrency: int = 4,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze many issues of one repository, yielding results as they complete
+
+    Cached analyses come back immediately, without waiting for a slot;
+    uncached ones run at most `concurrency` at a time. A failure for one issue is reported in its
+    result instead of aborting the batch.
+
+    Yields:
+        {"issue_number", "analysis", "cache_age_seconds"} or {"issue_number", "error"}
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze_one(issue_number: int) -> Dict[str, Any]:
+        try:
+            result = get_cached_analysis(repo_url, issue_number)
+            if result is None:
+                async with semaphore:
+                    result = await get_analysis(repo_url, issue_number)
+        except Exception as e:
+            return {"issue_number": issue_number, "error": str(e)}
+        analysis, age = result
+        return {"issue_number": issue_number, "analysis": analysis, "cache_age_seconds": age}
+
+    tasks = [asyncio.ensure_future(analyze_one(n)) for n in dict.fromkeys(issue_numbers)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: stop the remaining analyses
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,291 @@
+"""
+Cache Service - Shared cache for analyses and GitHub responses
+
+Backed by a SQLite database in WAL mode so that every uvicorn worker
+process reads and writes the same store. WAL lets readers proceed while
+a writer is active, so workers don't block each other on lookups.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "issueinsight.db"
+)
+
+# Namespaces used by the API
+ANALYSIS_NAMESPACE = "analysis"
+GITHUB_NAMESPACE = "github"
+LABELS_NAMESPACE = "labels"
+
+# Expressions over stored analyses used by the secondary indexes; queries
+# must use exactly the same expressions for SQLite to pick the indexes
+_ANALYSIS_REPO = "substr(key, 1, instr(key, '#') - 1)"
+_ANALYSIS_TYPE = "json_extract(value, '$.analysis.type')"
+_ANALYSIS_PRIORITY = "json_extract(value, '$.analysis.priority')"
+
+
+class CacheEntry:
+    """A cached value together with when it was stored"""
+
+    __slots__ = ("value", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: Optional[float]):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def age(self) -> float:
+        """Seconds since the value was stored"""
+        return max(0.0, time.time() - self.stored_at)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the entry's TTL has passed"""
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+
+class SQLiteCache:
+    """
+    JSON key/value cache shared across processes
+
+    Each thread gets its own connection; SQLite connections must not be
+    shared between threads and every worker process opens its own file handle.
+    Expired entries are purged by writes, at most every purge_interval seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, purge_interval: float = 600.0):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+        self._local = threading.local()
+        # Per-thread connections are kept for the thread's lifetime
+        self.connections_opened = 0
+        # Lookups by namespace since start, for the readiness report
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self.connections_opened += 1
+        return conn
+
+    def _init_schema(self) -> None:
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+            """
+        )
+        # Partial expression indexes: "top N of a repo" and "top N of a type
+        # in a repo" are index range scans, maintained by every write
+        conn = self._connect()
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS analysis_by_priority ON cache "
+            f"({_ANALYSIS_REPO}, {_ANALYSIS_PRIORITY}) "
+            f"WHERE namespace = '{ANALYSIS_NAMESPACE}'"
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS analysis_by_type_priority ON cache "
+            f"({_ANALYSIS_REPO}, {_ANALYSIS_TYPE}, {_ANALYSIS_PRIORITY}) "
+            f"WHERE namespace = '{ANALYSIS_NAMESPACE}'"
+        )
+        # Lets purge_expired find expired rows without scanning every value
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_by_expiry ON cache (expires_at) "
+            "WHERE expires_at IS NOT NULL"
+        )
+
+    def get_entry(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        """
+        Look up an entry, including expired ones
+
+        Returns:
+            CacheEntry or None if the key was never stored
+        """
+        row = self._connect().execute(
+            "SELECT value, stored_at, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            self.misses[namespace] = self.misses.get(namespace, 0) + 1
+            return None
+        self.hits[namespace] = self.hits.get(namespace, 0) + 1
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self.get_entry(namespace, key)
+        if entry is None or entry.expired:
+            return None
+        return entry.value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a JSON-serializable value
+
+        Args:
+            namespace: Logical cache section (e.g. "analysis")
+            key: Entry key within the namespace
+            value: JSON-serializable value
+            ttl: Seconds until the entry expires (None = never)
+        """
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, separators=(",", ":")), now, expires_at),
+        )
+        if now - self._last_purge >= self.purge_interval:
+            self.purge_expired()
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry if present"""
+        self._connect().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def scan_prefix(
+        self, namespace: str, prefix: str, batch_size: int = 500
+    ) -> Iterator[Tuple[str, CacheEntry]]:
+        """
+        Iterate over all entries whose key starts with prefix, in key order
+
+        Rows are read in pages using the primary key (keyset pagination),
+        so memory stays constant and no cursor is held between pages.
+
+        Yields:
+            Tuples of (key, CacheEntry)
+        """
+        query = (
+            "SELECT key, value, stored_at, expires_at FROM cache "
+            "WHERE namespace = ? AND key {op} ? AND key < ? ORDER BY key LIMIT ?"
+        )
+        # Every key starting with prefix sorts below prefix + U+10FFFF
+        upper = prefix + "\U0010ffff"
+        sql, last_key = query.format(op=">="), prefix
+        while True:
+            rows = self._connect().execute(sql, (namespace, last_key, upper, batch_size)).fetchall()
+            for key, value, stored_at, expires_at in rows:
+                yield key, CacheEntry(json.loads(value), stored_at, expires_at)
+            if len(rows) < batch_size:
+                return
+            sql, last_key = query.format(op=">"), rows[-1][0]
+
+    def query_analyses(
+        self,
+        repo_key: str,
+        issue_type: Optional[str] = None,
+        min_priority: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Tuple[str, CacheEntry]]:
+        """
+        Highest-priority stored analyses of a repository
+
+        Args:
+            repo_key: Lowercase "owner/repo"
+            issue_type: Only analyses of this type
+            min_priority: Only analyses with at least this priority
+            limit: Maximum number of results
+
+        Returns:
+            (key, CacheEntry) tuples, highest priority first; analyses
+            without a numeric priority come last
+        """
+        conditions = [f"namespace = '{ANALYSIS_NAMESPACE}'", f"{_ANALYSIS_REPO} = ?"]
+        params: List[Any] = [repo_key]
+        if issue_type is not None:
+            conditions.append(f"{_ANALYSIS_TYPE} = ?")
+            params.append(issue_type)
+        if min_priority is not None:
+            conditions.append(f"{_ANALYSIS_PRIORITY} >= ?")
+            params.append(min_priority)
+        rows = self._connect().execute(
+            f"SELECT key, value, stored_at, expires_at FROM cache WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {_ANALYSIS_PRIORITY} DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [
+            (key, CacheEntry(json.loads(value), stored_at, expires_at))
+            for key, value, stored_at, expires_at in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries per namespace, lookups since start and connections opened"""
+        entries = dict(self._connect().execute(
+            "SELECT namespace, COUNT(*) FROM cache GROUP BY namespace"
+        ).fetchall())
+        hit_ratio = {}
+        for namespace in set(self.hits) | set(self.misses):
+            hits = self.hits.get(namespace, 0)
+            hit_ratio[namespace] = round(hits / (hits + self.misses.get(namespace, 0)), 3)
+        return {
+            "connections_opened": self.connections_opened,
+            "entries": entries,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "hit_ratio": hit_ratio,
+        }
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        self._last_purge = time.time()
+        cursor = self._connect().execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+
+def repo_cache_prefix(owner: str, repo: str) -> str:
+    """Key prefix shared by every issue of a repository"""
+    return f"{owner.lower()}/{repo.lower()}#"
+
+
+def issue_cache_key(owner: str, repo: str, issue_number: int) -> str:
+    """Build the cache key for an issue (GitHub names are case-insensitive)"""
+    return f"{repo_cache_prefix(owner, repo)}{issue_number}"
+
+
+_cache: Optional[SQLiteCache] = None
+
+
+def get_cache() -> SQLiteCache:
+    """Return the process-wide cache, opening it (and purging expired entries) on first use"""
+    global _cache
+    if _cache is None:
+        _cache = SQLiteCache(
+            os.getenv("CACHE_DB_PATH", DEFAULT_CACHE_PATH),
+            purge_interval=float(os.getenv("CACHE_PURGE_INTERVAL", "600")),
+        )
+        _cache.purge_expired()
+    return _cache
+
+
+def cache_ttl(name: str, default: float) -> float:
+    """Read a TTL in seconds from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
@@ -0,0 +1,292 @@
+"""
+Cassette Service - Deterministic record/replay of GitHub and LLM traffic
+
+With CASSETTE_MODE=record every upstream GitHub request and LLM call is
+saved, with its timing, to a gzip-compressed NDJSON cassette
+(CASSETTE_PATH). With CASSETTE_MODE=replay the same calls are answered
+from the cassette without touching the network, either with the
+recorded latency or instantly (CASSETTE_LATENCY=original|zero).
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+DEFAULT_CASSETTE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cassettes", "default.ndjson.gz"
+)
+
+# Response headers that only describe the recording connection
+_SKIPPED_HEADERS = {"set-cookie", "connection", "transfer-encoding", "keep-alive"}
+
+# Request headers that change the response (If-None-Match can turn a 200
+# into a 304), so they are part of the recording key
+_KEY_HEADERS = ("if-none-match", "if-modified-since")
+
+
+class CassetteMiss(httpx.TransportError):
+    """Raised in replay mode when a request was never recorded"""
+    pass
+
+
+class Cassette:
+    """
+    Append-only store of recorded interactions, keyed by request
+
+    Repeated requests are replayed in recording order; once exhausted,
+    the last recorded response keeps being served.
+    """
+
+    def __init__(self, path: str, mode: str, latency: str = "original"):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise ValueError(f"Cassette not found: {self.path}")
+        with self._open("r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[f"{entry['kind']} {entry['key']}"].append(entry)
+
+    def record(self, kind: str, key: str, response: Dict[str, Any], elapsed: float) -> None:
+        """Append one interaction to the cassette"""
+        line = json.dumps(
+            {"kind": kind, "key": key, "elapsed": round(elapsed, 4), "response": response},
+            separators=(",", ":"),
+        )
+        with self._lock:
+            # Appending gzip members keeps the file a valid gzip stream
+            with self._open("a") as f:
+                f.write(line + "\n")
+
+    def lookup(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Next recorded interaction for key, or None if it was never recorded"""
+        entries = self._entries.get(f"{kind} {key}")
+        if not entries:
+            return None
+        with self._lock:
+            position = self._positions[f"{kind} {key}"]
+            self._positions[f"{kind} {key}"] = position + 1
+        return entries[min(position, len(entries) - 1)]
+
+    async def wait(self, entry: Dict[str, Any]) -> None:
+        """Reproduce the recorded latency unless replaying at full speed"""
+        if self.latency == "original" and entry.get("elapsed"):
+            await asyncio.sleep(entry["elapsed"])
+
+
+class _PassThroughStream(httpx.AsyncByteStream):
+    """Body already read (head) followed by the rest of the upstream stream"""
+
+    def __init__(self, head: bytes, rest: AsyncIterator[bytes], response: httpx.Response):
+        self.head = head
+        self.rest = rest
+        self.response = response
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.head
+        async for chunk in self.rest:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.response.aclose()
+
+
+def http_request_key(request: httpx.Request) -> str:
+    """Recording key: method, URL and conditional headers (never credentials)"""
+    key = f"{request.method} {request.url}"
+    for name in _KEY_HEADERS:
+        if name in request.headers:
+            key += f" {name}={request.headers[name]}"
+    return key
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that records to or replays from a cassette
+
+    Args:
+        cassette: Cassette to record to or replay from
+        inner: Transport used while recording
+        max_body_bytes: Largest body recorded; bigger responses are passed
+            through unrecorded (default: GITHUB_MAX_RESPONSE_BYTES)
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+        max_body_bytes: Optional[int] = None,
+    ):
+        self.cassette = cassette
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.max_body_bytes = max_body_bytes
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = http_request_key(request)
+
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.lookup("http", key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded response for {key}", request=request)
+            await self.cassette.wait(entry)
+            recorded = entry["response"]
+            return httpx.Response(
+                recorded["status"],
+                headers=recorded["headers"],
+                content=base64.b64decode(recorded["body"]),
+                request=request,
+            )
+
+        max_bytes = self.max_body_bytes
+        if max_bytes is None:
+            # Imported here: github_service imports this module
+            from .github_service import max_response_bytes
+            max_bytes = max_response_bytes()
+
+        started = time.monotonic()
+        response = await self.inner.handle_async_request(request)
+        # Raw bytes, still content-encoded, so replay is byte-identical
+        body = bytearray()
+        raw = response.stream.__aiter__()
+        async for chunk in raw:
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                # Not recorded; the caller's own size limit rejects it
+                return httpx.Response(
+                    response.status_code,
+                    headers=response.headers,
+                    stream=_PassThroughStream(bytes(body), raw, response),
+                    request=request,
+                )
+        await response.aclose()
+        body = bytes(body)
+        self.cassette.record(
+            "http",
+            key,
+            {
+                "status": response.status_code,
+                "headers": [
+                    [name, value] for name, value in response.headers.multi_items()
+                    if name.lower() not in _SKIPPED_HEADERS
+                ],
+                "body": base64.b64encode(body).decode("ascii"),
+            },
+            time.monotonic() - started,
+        )
+        return httpx.Response(
+            response.status_code, headers=response.headers, content=body, request=request
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class CassetteResponse:
+    """Replayed chat model response"""
+
+    def __init__(self, content: str, usage_metadata: Optional[Dict[str, int]]):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+def llm_request_key(model: str, temperature: float, messages: List[Any]) -> str:
+    """Stable key for a chat request: model settings plus a hash of the prompt"""
+    prompt = json.dumps(
+        [[getattr(m, "type", ""), str(getattr(m, "content", m))] for m in messages],
+        separators=(",", ":"),
+    )
+    return f"{model}@{temperature}:{hashlib.sha256(prompt.encode()).hexdigest()}"
+
+
+class CassetteChatModel:
+    """Chat model wrapper that records to or replays from a cassette"""
+
+    def __init__(self, cassette: Cassette, model: str, temperature: float, factory: Callable[[], Any]):
+        self.cassette = cassette
+        self.model = model
+        self.temperature = temperature
+        self._factory = factory
+        self._inner: Optional[Any] = None
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        key = llm_request_key(self.model, self.temperature, messages)
+
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.lookup("llm", key)
+            if entry is None:
+                raise ValueError(f"No recorded LLM response for {key}")
+            await self.cassette.wait(entry)
+            return CassetteResponse(entry["response"]["content"], entry["response"].get("usage"))
+
+        # The real model is only needed (and its API key checked) when recording
+        if self._inner is None:
+            self._inner = self._factory()
+        started = time.monotonic()
+        response = await self._inner.ainvoke(messages)
+        content = str(response.content) if isinstance(response.content, list) else response.content
+        usage = getattr(response, "usage_metadata", None)
+        self.cassette.record(
+            "llm",
+            key,
+            {"content": content, "usage": dict(usage) if usage else None},
+            time.monotonic() - started,
+        )
+        return response
+
+
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette, or None when CASSETTE_MODE is off"""
+    global _cassette, _cassette_loaded
+    if not _cassette_loaded:
+        mode = os.getenv("CASSETTE_MODE", OFF).lower()
+        if mode != OFF:
+            _cassette = Cassette(
+                os.getenv("CASSETTE_PATH", DEFAULT_CASSETTE_PATH),
+                mode,
+                latency=os.getenv("CASSETTE_LATENCY", "original").lower(),
+            )
+        _cassette_loaded = True
+    return _cassette
+
+
+def get_http_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for GitHub clients: a cassette transport, or None for the default"""
+    cassette = get_cassette()
+    return CassetteTransport(cassette) if cassette is not None else None
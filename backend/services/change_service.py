@@ -0,0 +1,107 @@
+"""
+Change Service - Decide how much of an issue changed since its analysis
+
+Each stored analysis keeps a snapshot of the issue it was made from:
+hashes of the cleaned title and body, the hashes of the substantive
+comments already taken into account, and the comment count. Comparing a
+fresh issue record with the snapshot tells whether the analysis is
+still valid, only needs new comments folded in, or must be redone.
+
+Limitation: issue records only carry the first comments (the ones the
+prompt uses), so the comment hashes cover just those. A comment deleted
+and another added beyond them leave the count and the hashes unchanged,
+and the change is not detected until the next title, body or comment
+count change.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .preprocess_service import preprocess_text
+
+
+UNCHANGED = "unchanged"
+COMMENTS = "comments"
+FULL = "full"
+
+# Comments made only of these words (or of emoji/punctuation) add nothing
+TRIVIAL_WORDS = {
+    "+1", "1", "me", "too", "same", "here", "issue", "problem", "also", "having", "this",
+    "bump", "up", "any", "update", "updates", "news", "eta", "ping", "please", "pls", "fix",
+    "thanks", "thank", "you", "yes", "following", "subscribe", "subscribed", "subscribing",
+}
+
+_NON_WORD_RE = re.compile(r"[^\w\s+]|_")
+_QUOTE_LINE_RE = re.compile(r"^\s*>.*$", re.M)
+
+
+class ChangeSet(NamedTuple):
+    """What changed since the snapshot"""
+    kind: str
+    reason: str
+
+
+def content_hash(text: str) -> str:
+    """Short hash of text with whitespace and case normalized"""
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def is_trivial_comment(body: str) -> bool:
+    """Whether a comment carries no information ("+1", "same here", "👍", "any update?")"""
+    text = _QUOTE_LINE_RE.sub("", body or "")
+    words = _NON_WORD_RE.sub(" ", text.lower()).split()
+    return all(word in TRIVIAL_WORDS for word in words)
+
+
+def substantive_comment_hashes(comments: Iterable[Dict[str, Any]]) -> List[str]:
+    """Hashes of the comments worth prompting on, in order"""
+    return [
+        content_hash(comment.get("body", ""))
+        for comment in comments
+        if not is_trivial_comment(comment.get("body", ""))
+    ]
+
+
+def take_snapshot(issue_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Snapshot of the parts of an issue an analysis depends on"""
+    return {
+        "title": content_hash(issue_data.get("title", "") or ""),
+        "body": content_hash(preprocess_text(issue_data.get("body", "") or "").text),
+        "comments": substantive_comment_hashes(issue_data.get("comments", [])),
+        "comments_count": issue_data.get("comments_count", 0),
+    }
+
+
+def detect_changes(snapshot: Optional[Dict[str, Any]], issue_data: Dict[str, Any]) -> ChangeSet:
+    """
+    Compare a fresh issue record with the snapshot of its last analysis
+
+    Comment edits and deletions are only seen among the comments in
+    issue_data (see the module docstring).
+
+    Returns:
+        ChangeSet of kind UNCHANGED (nothing that matters changed),
+        COMMENTS (only comments were added) or FULL (re-analyze)
+    """
+    if not snapshot:
+        return ChangeSet(FULL, "no snapshot")
+
+    current = take_snapshot(issue_data)
+    if current["title"] != snapshot["title"]:
+        return ChangeSet(FULL, "title changed")
+    if current["body"] != snapshot["body"]:
+        return ChangeSet(FULL, "body changed")
+
+    # Hashes of every substantive comment the analysis already covers
+    known = set(snapshot["comments"])
+    unseen = [h for h in current["comments"] if h not in known]
+
+    if current["comments_count"] < snapshot["comments_count"]:
+        return ChangeSet(FULL, "comments deleted")
+    if current["comments_count"] > snapshot["comments_count"]:
+        return ChangeSet(COMMENTS, f"{current['comments_count'] - snapshot['comments_count']} new comments")
+    if unseen:
+        return ChangeSet(FULL, "comments edited")
+    return ChangeSet(UNCHANGED, "no substantive change")
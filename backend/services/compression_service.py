@@ -0,0 +1,218 @@
+"""
+Compression Service - Negotiated gzip/zstd response compression
+
+CompressionMiddleware compresses responses with the best encoding the
+client accepts (zstd when the zstandard package is installed, else
+gzip). Small responses below a size threshold are sent as-is, and
+streamed responses (batch NDJSON, exports) are compressed chunk by
+chunk and flushed, so lines still reach the client as they are produced.
+"""
+
+import gzip
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip only
+    zstandard = None
+
+
+# Responses smaller than this are not worth compressing
+DEFAULT_MINIMUM_SIZE = 1024
+
+# Already compressed (Parquet pages are zstd-compressed) or binary media
+_INCOMPRESSIBLE_TYPES = ("application/vnd.apache.parquet", "image/", "audio/", "video/", "application/zip")
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first"""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def choose_encoding(accept_encoding: str, available: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header
+
+    Encodings are ranked by the client's q-values; on a tie the server's
+    preference order (zstd before gzip) wins. q=0 excludes an encoding.
+
+    Returns:
+        "zstd", "gzip" or None for identity
+    """
+    available = available if available is not None else available_encodings()
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """Incremental compressor that can flush at chunk boundaries"""
+
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits 16+ produces a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(self._flush_mode) if flush else out
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 6, zstd_level: int = 3) -> bytes:
+    """Compress a complete body in one call"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compress(data)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware for negotiated response compression
+
+    Args:
+        app: The wrapped ASGI application
+        minimum_size: Complete responses below this many bytes are not compressed
+        gzip_level: zlib level for gzip (1-9)
+        zstd_level: zstd level (1-22; 3 is fast with a good ratio)
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+
+class _CompressingSend:
+    """Wraps `send` for one response, deciding on compression at the first body chunk"""
+
+    def __init__(self, send: Callable, encoding: str, options: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.options = options
+        self.start: Optional[Dict[str, Any]] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            headers = _header_dict(message.get("headers", []))
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            if b"content-encoding" in headers or content_type.startswith(_INCOMPRESSIBLE_TYPES):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                # Held back until the first body chunk shows how big the response is
+                self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.options.minimum_size:
+                self.passthrough = True
+                await self.send(_with_headers(start))
+                await self.send(message)
+                return
+
+            if not more_body:
+                # Complete body: one-shot compression with an exact Content-Length
+                compressed = compress_bytes(
+                    body, self.encoding, self.options.gzip_level, self.options.zstd_level
+                )
+                await self.send(_with_headers(start, self.encoding, len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                self.passthrough = True
+                return
+
+            self.compressor = _Compressor(self.encoding, self.options.gzip_level, self.options.zstd_level)
+            await self.send(_with_headers(start, self.encoding))
+
+        data = self.compressor.compress(body, flush=True) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+def _header_dict(headers: List[Tuple[bytes, bytes]]) -> Dict[bytes, bytes]:
+    return {name.lower(): value for name, value in headers}
+
+
+def _with_headers(
+    start: Dict[str, Any], encoding: Optional[str] = None, length: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Copy of a response start message with Vary: Accept-Encoding added
+
+    With an encoding, Content-Encoding is set and Content-Length is
+    replaced by `length`, or dropped for a streamed body.
+    """
+    original = _header_dict(start.get("headers", []))
+    headers = [
+        (name, value) for name, value in start.get("headers", [])
+        if name.lower() != b"vary" and not (encoding and name.lower() == b"content-length")
+    ]
+    vary = original.get(b"vary", b"")
+    if b"accept-encoding" not in vary.lower():
+        vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+    headers.append((b"vary", vary))
+    if encoding:
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode("latin-1")))
+    return dict(start, headers=headers)
@@ -0,0 +1,185 @@
+"""
+Export Service - Stream stored analyses for bulk consumers
+
+Analyses stored in the shared cache are exported per repository as
+NDJSON or as columnar Arrow IPC / Parquet. Every format is produced in
+fixed-size chunks, so memory use does not grow with the number of
+analyses. Arrow and Parquet need pyarrow, which is imported on demand.
+"""
+
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .ai_service import parse_priority
+from .cache_service import get_cache, repo_cache_prefix, CacheEntry, ANALYSIS_NAMESPACE
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows per Arrow record batch / Parquet row group
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_stored_analyses(owner: str, repo: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over every stored analysis of a repository
+
+    Yields:
+        Flat records: repo, issue_number, analysis fields, updated_at, analyzed_at
+    """
+    prefix = repo_cache_prefix(owner, repo)
+    for key, entry in get_cache().scan_prefix(ANALYSIS_NAMESPACE, prefix, batch_size):
+        yield _flat_record(owner, repo, int(key[len(prefix):]), entry)
+
+
+def query_stored_analyses(
+    owner: str,
+    repo: str,
+    issue_type: Optional[str] = None,
+    min_priority: Optional[int] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """
+    Highest-priority stored analyses of a repository, via the cache's indexes
+
+    Returns:
+        Flat records like iter_stored_analyses, highest priority first
+    """
+    prefix = repo_cache_prefix(owner, repo)
+    entries = get_cache().query_analyses(prefix[:-1], issue_type, min_priority, limit)
+    return [_flat_record(owner, repo, int(key[len(prefix):]), entry) for key, entry in entries]
+
+
+def _flat_record(owner: str, repo: str, issue_number: int, entry: CacheEntry) -> Dict[str, Any]:
+    stored = entry.value
+    record = {"repo": f"{owner}/{repo}", "issue_number": issue_number}
+    record.update(stored["analysis"])
+    if "priority" not in record:
+        # Stored before analyses had a numeric priority
+        record["priority"], record["priority_reason"] = parse_priority(record.get("priority_score", ""))
+    record["updated_at"] = stored.get("updated_at", "")
+    record["analyzed_at"] = stored.get("analyzed_at", entry.stored_at)
+    return record
+
+
+def ndjson_chunks(records: Iterable[Dict[str, Any]], lines_per_chunk: int = 200) -> Iterator[bytes]:
+    """Encode records as NDJSON, yielding a chunk every lines_per_chunk records"""
+    lines: List[str] = []
+    for record in records:
+        lines.append(json.dumps(record, separators=(",", ":")))
+        if len(lines) >= lines_per_chunk:
+            yield ("\n".join(lines) + "\n").encode()
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Arrow and Parquet exports require pyarrow. Install it with: pip install pyarrow"
+        )
+    return pyarrow
+
+
+def arrow_schema():
+    """Columnar schema; type and labels are dictionary-encoded"""
+    pa = _import_pyarrow()
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("repo", category),
+        ("issue_number", pa.int64()),
+        ("summary", pa.string()),
+        ("type", category),
+        ("priority_score", pa.string()),
+        ("priority", pa.int8()),
+        ("priority_reason", pa.string()),
+        ("suggested_labels", pa.list_(category)),
+        ("potential_impact", pa.string()),
+        ("updated_at", pa.string()),
+        ("analyzed_at", pa.timestamp("ms", tz="UTC")),
+    ])
+
+
+def _record_batch(pa, schema, records: List[Dict[str, Any]]):
+    columns = {name: [record.get(name) for record in records] for name in schema.names}
+    columns["analyzed_at"] = [
+        datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+        for ts in columns["analyzed_at"]
+    ]
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def columnar_chunks(
+    records: Iterable[Dict[str, Any]],
+    fmt: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encode records as an Arrow IPC stream or a Parquet file, chunk by chunk
+
+    Each batch of records is written as one record batch / row group and
+    the bytes written so far are yielded, so only one batch is in memory.
+
+    Args:
+        records: Records from iter_stored_analyses
+        fmt: "arrow" or "parquet"
+        batch_size: Records per record batch / row group
+    """
+    pa = _import_pyarrow()
+    schema = arrow_schema()
+    sink = io.BytesIO()
+
+    if fmt == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    elif fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        raise ValueError(f"Unsupported columnar format: {fmt}")
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            writer.write_batch(_record_batch(pa, schema, batch))
+            batch.clear()
+            yield drain()
+    if batch:
+        writer.write_batch(_record_batch(pa, schema, batch))
+    writer.close()
+    yield drain()
+
+
+def export_chunks(owner: str, repo: str, fmt: str) -> Iterator[bytes]:
+    """
+    Stream all stored analyses of a repository in the requested format
+
+    Raises:
+        ValueError: If the format is unknown
+        ImportError: If an Arrow/Parquet export is requested without pyarrow
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported export format: {fmt}. Expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if fmt == "ndjson":
+        return ndjson_chunks(iter_stored_analyses(owner, repo))
+
+    # Fail before the response starts if pyarrow is missing
+    _import_pyarrow()
+    return columnar_chunks(iter_stored_analyses(owner, repo), fmt)
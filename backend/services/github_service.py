@@ -2,10 +2,30 @@
 GitHub Service - Fetch issue data from GitHub API
 """
 
+import json
+import logging
 import os
 import re
 import httpx
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, AsyncIterator, NamedTuple, Tuple
+
+from .cassette_service import get_http_transport
+from .health_service import get_upstream, GITHUB
+
+
+logger = logging.getLogger(__name__)
+
+# GitHub caps list endpoints at 100 items per page
+COMMENTS_PER_PAGE = 100
+
+# Responses larger than this are abandoned while streaming (GITHUB_MAX_RESPONSE_BYTES)
+DEFAULT_MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+
+# Text kept per issue body / comment. The prompt uses at most 2000 / 500
+# characters after preprocessing; the margin covers the noise it strips.
+MAX_BODY_CHARS = 16000
+MAX_COMMENT_CHARS = 4000
 
 
 class GitHubAPIError(Exception):
@@ -13,12 +33,193 @@ class GitHubAPIError(Exception):
     pass
 
 
+class ResponseTooLarge(GitHubAPIError):
+    """A GitHub response exceeded the size limit"""
+    pass
+
+
+class _Record:
+    """
+    Base for compact records with __slots__ instead of a per-instance dict
+    
+    Fields can also be read like the dicts these records replace
+    (record.get("body"), record["title"]), so code and cached entries
+    using the dict form keep working.
+    """
+    
+    __slots__ = ()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class IssueComment(_Record):
+    """One comment, keeping only what the prompt and change detection use"""
+    
+    __slots__ = ("user", "body", "created_at")
+    
+    def __init__(self, user: str = "", body: str = "", created_at: str = ""):
+        self.user = user
+        self.body = body
+        self.created_at = created_at
+    
+    @classmethod
+    def from_api(cls, comment: Dict[str, Any]) -> "IssueComment":
+        return cls(
+            (comment.get("user") or {}).get("login", ""),
+            (comment.get("body", "") or "")[:MAX_COMMENT_CHARS],
+            comment.get("created_at", "") or "",
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"user": self.user, "body": self.body, "created_at": self.created_at}
+
+
+class IssueRecord(_Record):
+    """An issue with its first comments, as passed to the analysis"""
+    
+    __slots__ = (
+        "repo_owner", "repo_name", "issue_number", "title", "body", "state", "labels",
+        "created_at", "updated_at", "user", "comments_count", "comments",
+    )
+    
+    def __init__(
+        self,
+        repo_owner: str = "",
+        repo_name: str = "",
+        issue_number: int = 0,
+        title: str = "",
+        body: str = "",
+        state: str = "",
+        labels: Iterable[str] = (),
+        created_at: str = "",
+        updated_at: str = "",
+        user: str = "",
+        comments_count: int = 0,
+        comments: Iterable[IssueComment] = (),
+    ):
+        self.repo_owner = repo_owner
+        self.repo_name = repo_name
+        self.issue_number = issue_number
+        self.title = title
+        self.body = body
+        self.state = state
+        self.labels = tuple(labels)
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.user = user
+        self.comments_count = comments_count
+        self.comments = tuple(comments)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IssueRecord":
+        """Rebuild a record from to_dict() output, e.g. a cached entry"""
+        fields = {name: data[name] for name in cls.__slots__ if name in data}
+        fields["comments"] = [
+            IssueComment(**{name: c[name] for name in IssueComment.__slots__ if name in c})
+            for c in data.get("comments", [])
+        ]
+        return cls(**fields)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, e.g. for the cache"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["labels"] = list(self.labels)
+        data["comments"] = [comment.to_dict() for comment in self.comments]
+        return data
+
+
+class GitHubReference(NamedTuple):
+    """Repository (and optionally issue) parsed from a URL or shorthand"""
+    owner: str
+    repo: str
+    issue_number: Optional[int] = None
+
+
+# Accepts https/ssh URLs, git@github.com:owner/repo and owner/repo shorthand,
+# optionally followed by /issues/N or /pull/N and a query or fragment
+_GITHUB_REFERENCE_RE = re.compile(
+    r"""
+    ^\s*
+    (?:
+        (?:https?://|ssh://git@)(?:www\.)?github\.com/
+        | git@github\.com:
+        | (?:www\.)?github\.com/
+    )?
+    (?P<owner>[A-Za-z0-9](?:[A-Za-z0-9-]{0,38}))
+    /
+    (?P<repo>[A-Za-z0-9._-]+?)
+    (?:\.git)?
+    (?:/(?:issues|pull)/(?P<number>[0-9]+))?
+    /?
+    (?:[?\#].*)?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def _match_reference(reference: str) -> Optional[GitHubReference]:
+    match = _GITHUB_REFERENCE_RE.match(reference)
+    if match is None or match.group("repo") in (".", ".."):
+        return None
+    number = match.group("number")
+    return GitHubReference(
+        match.group("owner"), match.group("repo"), int(number) if number else None
+    )
+
+
+def parse_github_reference(reference: str) -> GitHubReference:
+    """
+    Parse a GitHub repository or issue reference
+    
+    Supported formats:
+        https://github.com/owner/repo(.git)(/)
+        https://github.com/owner/repo/issues/123 (also /pull/123)
+        git@github.com:owner/repo.git, ssh://git@github.com/owner/repo.git
+        owner/repo
+    
+    Results are memoized, so repeated lookups (e.g. in batches) are cheap.
+    
+    Args:
+        reference: URL or shorthand
+        
+    Returns:
+        GitHubReference with owner, repo and the issue number if the link had one
+        
+    Raises:
+        ValueError: If the reference format is invalid
+    """
+    parsed = _match_reference(reference)
+    if parsed is None:
+        raise ValueError(
+            f"Invalid GitHub URL format: {reference}. "
+            "Expected format: https://github.com/owner/repo"
+        )
+    return parsed
+
+
 def parse_repo_url(repo_url: str) -> tuple[str, str]:
     """
     Parse GitHub repository URL to extract owner and repo name
     
     Args:
-        repo_url: GitHub repository URL
+        repo_url: GitHub repository URL (any format parse_github_reference accepts)
         
     Returns:
         Tuple of (owner, repo_name)
@@ -26,41 +227,172 @@ def parse_repo_url(repo_url: str) -> tuple[str, str]:
     Raises:
         ValueError: If URL format is invalid
     """
-    # Support various GitHub URL formats
-    patterns = [
-        r"github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$",
-        r"github\.com/([^/]+)/([^/]+)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, repo_url)
-        if match:
-            owner, repo = match.groups()
-            # Remove .git suffix if present
-            if repo.endswith('.git'):
-                repo = repo[:-4]
-            return owner, repo
-    
-    raise ValueError(
-        f"Invalid GitHub URL format: {repo_url}. "
-        "Expected format: https://github.com/owner/repo"
-    )
+    reference = parse_github_reference(repo_url)
+    return reference.owner, reference.repo
 
 
-async def fetch_issue_data(repo_url: str, issue_number: int) -> Dict[str, Any]:
+def resolve_issue_number(repo_url: str, issue_number: Optional[int] = None) -> int:
+    """
+    Pick the issue number to analyze: the one in the link or the explicit one
+    
+    Raises:
+        ValueError: If neither is available, or the link names a different issue
+    """
+    linked_number = parse_github_reference(repo_url).issue_number
+    if issue_number is not None:
+        if linked_number is not None and linked_number != issue_number:
+            raise ValueError(
+                f"issue_number {issue_number} does not match issue #{linked_number} in the link"
+            )
+        return issue_number
+    if linked_number is None:
+        raise ValueError(
+            "No issue number given. Pass issue_number or a link such as "
+            "https://github.com/owner/repo/issues/123"
+        )
+    return linked_number
+
+
+def github_headers() -> Dict[str, str]:
+    """Request headers for the GitHub API, authenticated when GITHUB_TOKEN is set"""
+    headers = {
+        "Accept": "application/vnd.github.v3+json",
+        "User-Agent": "GitHub-Issue-Assistant"
+    }
+    
+    # Add authentication token if available (for higher rate limits)
+    github_token = os.getenv("GITHUB_TOKEN")
+    if github_token:
+        headers["Authorization"] = f"token {github_token}"
+    return headers
+
+
+def max_response_bytes() -> int:
+    """Size limit for one GitHub response body"""
+    return int(os.getenv("GITHUB_MAX_RESPONSE_BYTES", str(DEFAULT_MAX_RESPONSE_BYTES)))
+
+
+async def get_limited(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+    max_bytes: Optional[int] = None,
+) -> Tuple[httpx.Response, str]:
+    """
+    GET a URL, streaming the body and giving up once it exceeds max_bytes
+    
+    A declared Content-Length over the limit is rejected before any of
+    the body is read, so an oversized response never sits in memory.
+    The raw bytes are released once decoded.
+    
+    Returns:
+        Tuple of (response, body text)
+        
+    Raises:
+        ResponseTooLarge: If the body is larger than max_bytes
+    """
+    max_bytes = max_bytes if max_bytes is not None else max_response_bytes()
+    with get_upstream(GITHUB).track() as call:
+        async with client.stream("GET", url, headers=headers, params=params, timeout=10.0) as response:
+            call.finish_http(response.status_code, response.headers)
+            
+            declared = response.headers.get("Content-Length")
+            if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+                raise ResponseTooLarge(f"GitHub response of {declared} bytes exceeds the {max_bytes} byte limit")
+            
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > max_bytes:
+                    raise ResponseTooLarge(f"GitHub response exceeds the {max_bytes} byte limit")
+    return response, body.decode(response.encoding or "utf-8", "replace")
+
+
+async def iter_issue_comments(
+    client: httpx.AsyncClient,
+    comments_url: str,
+    headers: Dict[str, str],
+    max_comments: Optional[int] = None,
+    since: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream issue comments page by page, following the Link headers
+    
+    Only one page is held in memory at a time. Stopping the iteration
+    (or reaching max_comments) stops further page requests.
+    
+    Args:
+        client: Open HTTP client used for the requests
+        comments_url: GitHub comments endpoint for the issue
+        headers: Request headers (auth, accept)
+        max_comments: Stop after yielding this many comments (None = all)
+        since: Only comments created or updated at or after this ISO 8601 time
+        
+    Yields:
+        IssueComment records (user, body, created_at); a page over the
+        size limit ends the iteration with the comments read so far
+    """
+    if max_comments is not None and max_comments <= 0:
+        return
+    
+    per_page = COMMENTS_PER_PAGE
+    if max_comments is not None:
+        per_page = min(per_page, max_comments)
+    
+    url: Optional[str] = comments_url
+    params: Optional[Dict[str, Any]] = {"per_page": per_page}
+    if since:
+        params["since"] = since
+    yielded = 0
+    
+    while url:
+        try:
+            response, payload = await get_limited(client, url, headers, params)
+        except ResponseTooLarge as e:
+            logger.warning("Skipping remaining comments of %s: %s", comments_url, e)
+            return
+        if response.status_code != 200:
+            return
+        
+        # Only the compact records outlive the parsed page
+        page = [IssueComment.from_api(comment) for comment in json.loads(payload)]
+        del payload
+        
+        for comment in page:
+            yield comment
+            yielded += 1
+            if max_comments is not None and yielded >= max_comments:
+                return
+        
+        # The "next" link already carries the query string
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+async def fetch_issue_data(
+    repo_url: str,
+    issue_number: int,
+    max_comments: Optional[int] = None,
+) -> IssueRecord:
     """
     Fetch issue data from GitHub API
     
+    Responses are size-limited while streaming, and only the fields the
+    analysis uses are kept, with bodies capped at MAX_BODY_CHARS /
+    MAX_COMMENT_CHARS.
+    
     Args:
         repo_url: GitHub repository URL
         issue_number: Issue number to fetch
+        max_comments: Only fetch this many comments (None = all pages)
         
     Returns:
-        Dictionary containing issue data (title, body, comments)
+        IssueRecord with the issue data (title, body, comments)
         
     Raises:
         ValueError: If URL is invalid
-        GitHubAPIError: If GitHub API request fails
+        GitHubAPIError: If GitHub API request fails or the issue is too large
     """
     # Parse repository URL
     owner, repo = parse_repo_url(repo_url)
@@ -69,21 +401,13 @@ async def fetch_issue_data(repo_url: str, issue_number: int) -> Dict[str, Any]:
     issue_url = f"https://api.github.com/repos/{owner}/{repo}/issues/{issue_number}"
     comments_url = f"https://api.github.com/repos/{owner}/{repo}/issues/{issue_number}/comments"
     
-    # Prepare headers
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "GitHub-Issue-Assistant"
-    }
-    
-    # Add authentication token if available (for higher rate limits)
-    github_token = os.getenv("GITHUB_TOKEN")
-    if github_token:
-        headers["Authorization"] = f"token {github_token}"
+    headers = github_headers()
     
-    async with httpx.AsyncClient() as client:
+    # The transport is swapped for a cassette in record/replay mode
+    async with httpx.AsyncClient(transport=get_http_transport()) as client:
         try:
             # Fetch issue details
-            issue_response = await client.get(issue_url, headers=headers, timeout=10.0)
+            issue_response, payload = await get_limited(client, issue_url, headers)
             
             if issue_response.status_code == 404:
                 raise GitHubAPIError(
@@ -96,44 +420,74 @@ async def fetch_issue_data(repo_url: str, issue_number: int) -> Dict[str, Any]:
                 )
             elif issue_response.status_code != 200:
                 raise GitHubAPIError(
-                    f"GitHub API error: {issue_response.status_code} - {issue_response.text}"
+                    f"GitHub API error: {issue_response.status_code} - {payload}"
                 )
             
-            issue_data = issue_response.json()
-            
-            # Fetch comments
-            comments_response = await client.get(comments_url, headers=headers, timeout=10.0)
-            comments_data = []
-            
-            if comments_response.status_code == 200:
-                comments_data = comments_response.json()
+            # json rather than orjson: its peak memory is a fraction of orjson's on large bodies
+            issue_data = json.loads(payload)
+            del payload
             
-            # Extract relevant information
-            result = {
-                "repo_owner": owner,
-                "repo_name": repo,
-                "issue_number": issue_number,
-                "title": issue_data.get("title", ""),
-                "body": issue_data.get("body", "") or "",  # Handle None body
-                "state": issue_data.get("state", ""),
-                "labels": [label["name"] for label in issue_data.get("labels", [])],
-                "created_at": issue_data.get("created_at", ""),
-                "updated_at": issue_data.get("updated_at", ""),
-                "user": issue_data.get("user", {}).get("login", ""),
-                "comments_count": issue_data.get("comments", 0),
-                "comments": [
-                    {
-                        "user": comment.get("user", {}).get("login", ""),
-                        "body": comment.get("body", ""),
-                        "created_at": comment.get("created_at", "")
-                    }
-                    for comment in comments_data
-                ]
-            }
+            # Extract relevant information; the raw issue is dropped before the comments are read
+            record = IssueRecord(
+                repo_owner=owner,
+                repo_name=repo,
+                issue_number=issue_number,
+                title=issue_data.get("title", ""),
+                body=(issue_data.get("body", "") or "")[:MAX_BODY_CHARS],  # Handle None body
+                state=issue_data.get("state", ""),
+                labels=[label["name"] for label in issue_data.get("labels", [])],
+                created_at=issue_data.get("created_at", ""),
+                updated_at=issue_data.get("updated_at", ""),
+                user=(issue_data.get("user") or {}).get("login", ""),
+                comments_count=issue_data.get("comments", 0),
+            )
+            del issue_data
             
-            return result
+            # Fetch comments lazily, stopping once the budget is full
+            record.comments = tuple([
+                comment
+                async for comment in iter_issue_comments(
+                    client, comments_url, headers, max_comments=max_comments
+                )
+            ])
+            return record
             
         except httpx.TimeoutException:
             raise GitHubAPIError("Request to GitHub API timed out. Please try again.")
         except httpx.RequestError as e:
             raise GitHubAPIError(f"Error connecting to GitHub API: {str(e)}")
+
+
+async def fetch_comments_since(
+    repo_url: str,
+    issue_number: int,
+    since: str,
+    max_comments: Optional[int] = None,
+) -> List[IssueComment]:
+    """
+    Fetch the comments of an issue created or edited since a point in time
+    
+    Args:
+        repo_url: GitHub repository URL
+        issue_number: Issue number
+        since: ISO 8601 timestamp, e.g. the issue's updated_at at the last analysis
+        max_comments: Stop after this many comments (None = all pages)
+        
+    Raises:
+        GitHubAPIError: If GitHub API request fails
+    """
+    owner, repo = parse_repo_url(repo_url)
+    comments_url = f"https://api.github.com/repos/{owner}/{repo}/issues/{issue_number}/comments"
+    
+    async with httpx.AsyncClient(transport=get_http_transport()) as client:
+        try:
+            return [
+                comment
+                async for comment in iter_issue_comments(
+                    client, comments_url, github_headers(), max_comments=max_comments, since=since
+                )
+            ]
+        except httpx.TimeoutException:
+            raise GitHubAPIError("Request to GitHub API timed out. Please try again.")
+        except httpx.RequestError as e:
+            raise GitHubAPIError(f"Error connecting to GitHub API: {str(e)}")
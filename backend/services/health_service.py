@@ -0,0 +1,311 @@
+"""
+Health Service - Liveness and readiness from passively collected stats
+
+Every GitHub request and LLM call records its latency (to the response
+headers, or until the model answers) and outcome in a rolling window
+per upstream. Consecutive failures open a circuit that half-opens after
+a cooldown. The readiness report combines these windows with the LLM
+queue depth and cache state; it never calls an upstream itself, and is
+recomputed at most every HEALTH_CACHE_SECONDS so frequent probes cost
+nothing.
+
+A slow upstream (median latency over its limit) also makes the instance
+unready, so traffic moves to instances with a healthier path to GitHub
+or the LLM. The verdict lapses once no call has been made for a
+cooldown, so an instance taken out of rotation comes back on its own.
+With READY_ON_SLOW_UPSTREAM=false slowness is only reported as a
+warning, for deployments where every instance shares the same path and
+pulling them out would only drop the whole fleet.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+from .cache_service import get_cache
+from .scheduler_service import get_scheduler, INTERACTIVE, PRIORITIES
+
+
+GITHUB = "github"
+LLM = "llm"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency above which an upstream counts as slow, per upstream (env overrides)
+DEFAULT_MAX_LATENCY = {GITHUB: 5.0, LLM: 60.0}
+
+
+class UpstreamCall:
+    """Timing of one upstream request; finish() records it at the response headers"""
+
+    __slots__ = ("upstream", "started", "finished")
+
+    def __init__(self, upstream: "UpstreamHealth"):
+        self.upstream = upstream
+        self.started = upstream.clock()
+        self.finished = False
+
+    def finish(self, ok: bool = True) -> None:
+        if not self.finished:
+            self.finished = True
+            self.upstream.record(self.upstream.clock() - self.started, ok)
+
+    def finish_http(self, status_code: int, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Record an HTTP response; server errors and rate limiting count as failures
+
+        GitHub answers an exhausted rate limit with 403 and
+        X-RateLimit-Remaining: 0, and a secondary rate limit with 403 and
+        Retry-After; other 403s are permission errors and count as successes.
+        """
+        rate_limited = status_code == 429 or (
+            status_code == 403
+            and headers is not None
+            and (headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in headers)
+        )
+        self.finish(ok=status_code < 500 and not rate_limited)
+
+    def __enter__(self) -> "UpstreamCall":
+        self.upstream.in_flight += 1
+        self.upstream.peak_in_flight = max(self.upstream.peak_in_flight, self.upstream.in_flight)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.upstream.in_flight -= 1
+        # Errors before the response arrived (timeouts, refused connections) are failures
+        self.finish(ok=exc_type is None)
+
+
+class UpstreamHealth:
+    """
+    Rolling latency/error window and circuit state for one upstream
+
+    Args:
+        name: Upstream name in reports
+        window: Number of recent calls kept
+        window_seconds: Calls older than this are ignored
+        failure_threshold: Consecutive failures that open the circuit
+        cooldown_seconds: Time an open circuit waits before half-opening, and
+            time without calls after which a slow verdict lapses
+        max_latency: Median latency above which the upstream counts as slow
+        clock: Time source (monotonic seconds)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        window_seconds: float = 300.0,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        max_latency: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_latency = max_latency
+        self.clock = clock
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+
+    def track(self) -> UpstreamCall:
+        """Context manager timing one call; call finish(ok) when the response arrives"""
+        return UpstreamCall(self)
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Add one call to the window and update the circuit"""
+        now = self.clock()
+        self._samples.append((now, latency, ok))
+        if ok:
+            self.consecutive_failures = 0
+            self.opened_at = None
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                # A failed half-open trial restarts the cooldown
+                self.opened_at = now
+
+    @property
+    def circuit(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at >= self.cooldown_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Window statistics
+
+        Percentiles cover successful calls only; failures (often timeouts)
+        show in the error rate and circuit. Latencies are None until a
+        call is recorded. "slow" needs a median over max_latency and a
+        call within the last cooldown_seconds, so it clears on its own
+        once traffic stops instead of lasting the whole window.
+        """
+        now = self.clock()
+        cutoff = now - self.window_seconds
+        recent = [(latency, ok) for at, latency, ok in self._samples if at >= cutoff]
+        latencies = sorted(latency for latency, ok in recent if ok)
+        last = self._samples[-1] if self._samples else None
+        median = _percentile(latencies, 0.5)
+        return {
+            "circuit": self.circuit,
+            "samples": len(recent),
+            "error_rate": round(sum(1 for _, ok in recent if not ok) / len(recent), 3) if recent else 0.0,
+            "consecutive_failures": self.consecutive_failures,
+            "last_latency_seconds": round(last[1], 3) if last else None,
+            "last_call_age_seconds": round(now - last[0], 1) if last else None,
+            "p50_latency_seconds": median,
+            "p95_latency_seconds": _percentile(latencies, 0.95),
+            "max_latency_seconds": self.max_latency,
+            "slow": median is not None and median > self.max_latency
+            and last is not None and now - last[0] < self.cooldown_seconds,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+
+
+_upstreams: Dict[str, UpstreamHealth] = {}
+
+
+def get_upstream(name: str) -> UpstreamHealth:
+    """Return the process-wide health window for an upstream, configured from the environment"""
+    if name not in _upstreams:
+        _upstreams[name] = UpstreamHealth(
+            name,
+            window=int(os.getenv("HEALTH_WINDOW", "50")),
+            window_seconds=float(os.getenv("HEALTH_WINDOW_SECONDS", "300")),
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            cooldown_seconds=float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "30")),
+            max_latency=float(os.getenv(
+                f"{name.upper()}_MAX_LATENCY_SECONDS", str(DEFAULT_MAX_LATENCY.get(name, 5.0))
+            )),
+        )
+    return _upstreams[name]
+
+
+def fail_on_slow_upstream() -> bool:
+    """Whether a slow upstream makes the instance unready (READY_ON_SLOW_UPSTREAM, default true)"""
+    return os.getenv("READY_ON_SLOW_UPSTREAM", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _slow_message(name: str, stats: Dict[str, Any]) -> str:
+    return f"{name} slow: median latency {stats['p50_latency_seconds']}s over {stats['max_latency_seconds']}s"
+
+
+def upstream_problems(name: str, stats: Dict[str, Any], fail_on_slow: bool = True) -> List[str]:
+    """Reasons an upstream makes this instance unready (empty when fine)"""
+    problems = []
+    if stats["circuit"] == OPEN:
+        problems.append(f"{name} circuit open after {stats['consecutive_failures']} consecutive failures")
+    if fail_on_slow and stats["slow"]:
+        problems.append(_slow_message(name, stats))
+    return problems
+
+
+def upstream_warnings(name: str, stats: Dict[str, Any], fail_on_slow: bool = True) -> List[str]:
+    """Degradation of an upstream that is reported without failing readiness"""
+    if not fail_on_slow and stats["slow"]:
+        return [_slow_message(name, stats)]
+    return []
+
+
+def build_readiness() -> Dict[str, Any]:
+    """
+    Collect the readiness report from in-process state only
+
+    Not ready when an upstream circuit is open or its recent median
+    latency is over its limit, interactive requests would already be
+    rejected by admission control, or the cache cannot be read. With
+    READY_ON_SLOW_UPSTREAM=false slow upstreams are listed under
+    warnings instead.
+    """
+    # Imported here: analysis_service imports this module through github_service
+    from .analysis_service import refresher
+
+    problems: List[str] = []
+    warnings: List[str] = []
+
+    fail_on_slow = fail_on_slow_upstream()
+    upstreams = {}
+    for name in (GITHUB, LLM):
+        upstreams[name] = get_upstream(name).stats()
+        problems.extend(upstream_problems(name, upstreams[name], fail_on_slow))
+        warnings.extend(upstream_warnings(name, upstreams[name], fail_on_slow))
+
+    scheduler = get_scheduler()
+    queue = {
+        "llm_active": scheduler.active,
+        "llm_capacity": scheduler.capacity,
+        "llm_queue_depth": {p: scheduler.queue_depth(p) for p in PRIORITIES},
+        "estimated_wait_seconds": round(scheduler.estimated_wait(INTERACTIVE), 2),
+        "refresh_pending": refresher.pending,
+    }
+    if queue["estimated_wait_seconds"] > scheduler.slo_seconds[INTERACTIVE]:
+        problems.append(
+            f"LLM queue over SLO: ~{queue['estimated_wait_seconds']}s wait for interactive requests"
+        )
+
+    try:
+        cache = get_cache().stats()
+    except Exception as e:
+        cache = {"error": str(e)}
+        problems.append(f"cache unavailable: {e}")
+
+    return {
+        "status": "ready" if not problems else "not_ready",
+        "problems": problems,
+        "warnings": warnings,
+        "upstreams": upstreams,
+        "queue": queue,
+        "cache": cache,
+    }
+
+
+class ReadinessProbe:
+    """Serves the readiness report, rebuilding it at most every max_age seconds"""
+
+    def __init__(
+        self,
+        build: Callable[[], Dict[str, Any]] = build_readiness,
+        max_age: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.build = build
+        self.max_age = max_age
+        self.clock = clock
+        self._report: Optional[Dict[str, Any]] = None
+        self._built_at = 0.0
+
+    def report(self) -> Dict[str, Any]:
+        now = self.clock()
+        if self._report is None or now - self._built_at >= self.max_age:
+            self._report = self.build()
+            self._built_at = now
+        return dict(self._report, age_seconds=round(now - self._built_at, 2))
+
+
+_probe: Optional[ReadinessProbe] = None
+
+
+def get_readiness_probe() -> ReadinessProbe:
+    """Return the process-wide readiness probe"""
+    global _probe
+    if _probe is None:
+        _probe = ReadinessProbe(max_age=float(os.getenv("HEALTH_CACHE_SECONDS", "5")))
+    return _probe
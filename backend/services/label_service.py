@@ -0,0 +1,297 @@
+"""
+Label Service - Ground suggested labels in each repository's real labels
+
+A repository's labels are fetched once from the GitHub labels endpoint,
+kept in the shared cache and revalidated with a conditional (ETag)
+request when LABEL_CACHE_TTL has passed. A LabelIndex built from the
+catalog picks the labels most relevant to an issue for the prompt and
+maps the labels the LLM suggests onto labels that actually exist.
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+from .cache_service import get_cache, cache_ttl, LABELS_NAMESPACE
+from .cassette_service import get_http_transport
+from .github_service import GitHubAPIError, get_limited, github_headers
+
+
+logger = logging.getLogger(__name__)
+
+LABELS_PER_PAGE = 100
+
+# Stop paging after this many labels
+MAX_LABELS = 1000
+
+# Labels offered in the prompt
+PROMPT_LABEL_LIMIT = 25
+
+# Seconds a failed fetch is remembered when no catalog is cached (env: LABEL_FAILURE_TTL)
+DEFAULT_FAILURE_TTL = 60
+
+# Minimum trigram similarity for a fuzzy label match
+MIN_MATCH_SCORE = 0.6
+
+# Names LLMs use for what repositories commonly call something else
+LABEL_ALIASES = {
+    "feature request": ("enhancement", "feature"),
+    "feature": ("enhancement", "feature request"),
+    "enhancement": ("feature", "feature request"),
+    "documentation": ("docs", "doc"),
+    "docs": ("documentation",),
+    "question": ("support", "help"),
+    "high priority": ("priority high", "critical"),
+    "critical": ("priority critical", "high priority"),
+}
+
+# Labels for the issue types the prompt asks for; always offered when present
+TYPE_LABELS = {"bug", "enhancement", "feature", "feature request", "documentation", "docs", "question"}
+
+# Words too common to make a label relevant
+STOPWORDS = {"a", "an", "and", "are", "for", "in", "is", "it", "of", "on", "or", "the", "to", "with"}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# "type: bug", "kind/bug", "C-bug": the part after the scope is the core name
+_SCOPE_RE = re.compile(r"^[^:/]+\s*[:/]\s*|^[a-z]-(?=[a-z])")
+
+
+def normalize_label(name: str) -> str:
+    """Lowercase words only, so "Type: Bug 🐛" and "type-bug" compare equal"""
+    return " ".join(_WORD_RE.findall(name.lower().replace("_", " ")))
+
+
+def core_label(name: str) -> str:
+    """Label name without a scope prefix ("type: bug" -> "bug")"""
+    return normalize_label(_SCOPE_RE.sub("", name.lower(), count=1)) or normalize_label(name)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LabelIndex:
+    """
+    Lookup structures over one repository's labels
+
+    Exact and alias lookups are dictionary hits; fuzzy matches only
+    score labels sharing a trigram with the query (inverted index), and
+    relevance ranking only touches labels sharing a word with the issue.
+    """
+
+    def __init__(self, labels: Iterable[Dict[str, Any]]):
+        self.labels: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._trigrams: Dict[str, List[int]] = {}
+        self._trigram_counts: List[int] = []
+        self._words: Dict[str, List[Tuple[int, float]]] = {}
+
+        for label in labels:
+            name = label.get("name", "")
+            if not name:
+                continue
+            index = len(self.labels)
+            self.labels.append(name)
+            full, core = normalize_label(name), core_label(name)
+            self._exact.setdefault(full, index)
+            self._exact.setdefault(core, index)
+
+            grams = _trigrams(core)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(index)
+
+            # Name words count fully, description words only a little
+            weights: Dict[str, float] = {}
+            for word in _WORD_RE.findall((label.get("description") or "").lower()):
+                weights[word] = 0.3
+            for word in full.split():
+                weights[word] = 1.0
+            for word, weight in weights.items():
+                self._words.setdefault(word, []).append((index, weight))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def match(self, suggestion: str) -> Optional[str]:
+        """
+        Map one suggested label to an existing label
+
+        Returns:
+            The repository's label name, or None if nothing is close enough
+        """
+        key = normalize_label(suggestion)
+        for candidate in (key, core_label(suggestion), *LABEL_ALIASES.get(key, ())):
+            if candidate in self._exact:
+                return self.labels[self._exact[candidate]]
+
+        grams = _trigrams(core_label(suggestion))
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        best, best_score = None, MIN_MATCH_SCORE
+        for index, count in shared.items():
+            # Dice coefficient over trigram sets
+            score = 2 * count / (len(grams) + self._trigram_counts[index])
+            if score >= best_score:
+                best, best_score = index, score
+        return self.labels[best] if best is not None else None
+
+    def map_labels(self, suggestions: Iterable[str]) -> List[str]:
+        """
+        Replace suggested labels with matching repository labels
+
+        Suggestions without a match are dropped; if none match at all the
+        suggestions are returned unchanged rather than leaving no labels.
+        """
+        suggestions = list(suggestions)
+        mapped = [self.match(suggestion) for suggestion in suggestions]
+        matched = list(dict.fromkeys(label for label in mapped if label))
+        return matched or suggestions
+
+    def relevant(self, text: str, limit: int = PROMPT_LABEL_LIMIT) -> List[str]:
+        """
+        The labels most relevant to an issue, for the prompt
+
+        Issue-type labels come first, then labels sharing words with the
+        text, weighted by how rare the word is among the labels.
+        """
+        if len(self.labels) <= limit:
+            return list(self.labels)
+
+        chosen = [
+            index for index, name in enumerate(self.labels) if core_label(name) in TYPE_LABELS
+        ][:limit]
+        scores: Counter = Counter()
+        for word in set(_WORD_RE.findall(text.lower())) - STOPWORDS:
+            postings = self._words.get(word)
+            if postings:
+                idf = math.log(1 + len(self.labels) / len(postings))
+                for index, weight in postings:
+                    scores[index] += weight * idf
+
+        taken = set(chosen)
+        for index, _ in scores.most_common():
+            if len(chosen) >= limit:
+                break
+            if index not in taken:
+                chosen.append(index)
+                taken.add(index)
+        return [self.labels[index] for index in chosen]
+
+
+async def fetch_label_catalog(
+    owner: str, repo: str, etag: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch all labels of a repository
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        etag: ETag of the cached catalog, sent as If-None-Match
+
+    Returns:
+        {"etag", "labels": [{"name", "description"}]}, or None if GitHub
+        answered 304 Not Modified
+
+    Raises:
+        GitHubAPIError: If the GitHub API request fails
+    """
+    headers = github_headers()
+    url: Optional[str] = f"https://api.github.com/repos/{owner}/{repo}/labels"
+    params: Optional[Dict[str, Any]] = {"per_page": LABELS_PER_PAGE}
+    labels: List[Dict[str, Any]] = []
+    first_etag: Optional[str] = None
+
+    async with httpx.AsyncClient(transport=get_http_transport()) as client:
+        try:
+            while url and len(labels) < MAX_LABELS:
+                # Only the first page is conditional; it changes whenever labels are added or renamed
+                page_headers = dict(headers, **{"If-None-Match": etag}) if etag and not labels else headers
+                response, text = await get_limited(client, url, page_headers, params)
+
+                if response.status_code == 304:
+                    return None
+                if response.status_code != 200:
+                    raise GitHubAPIError(
+                        f"GitHub API error fetching labels: {response.status_code} - {text}"
+                    )
+                if first_etag is None:
+                    first_etag = response.headers.get("ETag", "")
+
+                labels.extend(
+                    {"name": label.get("name", ""), "description": label.get("description") or ""}
+                    for label in json.loads(text)
+                )
+                url = response.links.get("next", {}).get("url")
+                params = None
+        except httpx.TimeoutException:
+            raise GitHubAPIError("Request to GitHub API timed out. Please try again.")
+        except httpx.RequestError as e:
+            raise GitHubAPIError(f"Error connecting to GitHub API: {str(e)}")
+
+    return {"etag": first_etag or "", "labels": labels[:MAX_LABELS]}
+
+
+# Built indexes per repository, reused until the catalog's ETag changes
+_indexes: Dict[str, Tuple[str, LabelIndex]] = {}
+
+
+def _index_for(key: str, catalog: Dict[str, Any]) -> LabelIndex:
+    version = catalog.get("etag") or str(hash(tuple(label["name"] for label in catalog["labels"])))
+    cached = _indexes.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, LabelIndex(catalog["labels"]))
+        _indexes[key] = cached
+    return cached[1]
+
+
+async def get_label_index(owner: str, repo: str) -> Optional[LabelIndex]:
+    """
+    Return the label index of a repository, refreshing the catalog if due
+
+    A stale catalog is revalidated with its ETag; when GitHub can't be
+    reached the stale catalog is used. Without any catalog the failure
+    itself is cached for LABEL_FAILURE_TTL seconds, so an unreachable or
+    label-less repository isn't refetched for every analysis.
+
+    Returns:
+        LabelIndex, or None if no catalog is available
+    """
+    key = f"{owner.lower()}/{repo.lower()}"
+    cache = get_cache()
+    entry = cache.get_entry(LABELS_NAMESPACE, key)
+    if entry is not None and "error" in entry.value:
+        if not entry.expired:
+            return None
+        entry = None
+
+    if entry is not None and entry.age < cache_ttl("LABEL_CACHE_TTL", 3600):
+        catalog = entry.value
+    else:
+        try:
+            catalog = await fetch_label_catalog(
+                owner, repo, etag=entry.value.get("etag") if entry is not None else None
+            )
+        except GitHubAPIError as e:
+            logger.warning("Could not fetch labels of %s: %s", key, e)
+            if entry is None:
+                cache.set(
+                    LABELS_NAMESPACE, key, {"error": str(e)},
+                    ttl=cache_ttl("LABEL_FAILURE_TTL", DEFAULT_FAILURE_TTL),
+                )
+                return None
+            return _index_for(key, entry.value)
+        if catalog is None:
+            catalog = entry.value
+        # Stored without a TTL; re-storing restarts the revalidation window
+        cache.set(LABELS_NAMESPACE, key, catalog)
+
+    return _index_for(key, catalog) if catalog["labels"] else None
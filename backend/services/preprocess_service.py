@@ -0,0 +1,286 @@
+"""
+Preprocess Service - Strip noise from issue text before prompting
+
+Issue bodies are often mostly template boilerplate, HTML comments,
+long stack traces and pasted logs. This module removes that noise in a
+single streaming pass over the lines (every stage is a generator with
+O(1) work per line), so the prompt's character budget is spent on the
+parts of the issue that matter.
+"""
+
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set
+
+
+# Keep this many lines at each end of a long stack trace
+STACK_KEEP_LINES = 6
+
+# Collapse runs of lines with the same shape once they reach this length
+MIN_REPEAT_RUN = 3
+
+# Section contents GitHub issue forms leave behind when a field is skipped
+PLACEHOLDER_CONTENT = {"_no response_", "no response", "n/a", "na", "none", "-"}
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+\S|^\s*\*\*[^*]+\*\*:?\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_STACK_FRAME_RE = re.compile(
+    r"""^\s+at\s                      # JavaScript / Java
+    | ^\s*File\s".*",\sline\s\d+      # Python
+    | ^\s*\#\d+\s                     # C / gdb
+    | ^\s+[\w$.<>]+\([\w$.]*:\d+\)    # JVM style without "at"
+    """,
+    re.VERBOSE,
+)
+_HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
+_NUMBER_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class PreprocessResult(NamedTuple):
+    """Cleaned text plus how much was removed"""
+    text: str
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return estimate_tokens_for_bytes(self.bytes_saved)
+
+
+def estimate_tokens_for_bytes(size: int) -> int:
+    """Rough token count (~4 bytes per token for English text and code)"""
+    return (size + 3) // 4
+
+
+def _normalize(line: str) -> str:
+    return _WHITESPACE_RE.sub(" ", line).strip().lower()
+
+
+def _shape(line: str) -> str:
+    """Line with numbers and addresses masked, so timestamps/line numbers don't matter"""
+    return _NUMBER_RE.sub("#", _HEX_RE.sub("#", line.strip()))
+
+
+def strip_html_comments(lines: Iterable[str]) -> Iterator[str]:
+    """Remove <!-- ... --> comments, including ones spanning several lines"""
+    in_comment = False
+    for line in lines:
+        kept: List[str] = []
+        position = 0
+        while position < len(line):
+            if in_comment:
+                end = line.find("-->", position)
+                if end == -1:
+                    position = len(line)
+                else:
+                    in_comment = False
+                    position = end + 3
+            else:
+                start = line.find("<!--", position)
+                if start == -1:
+                    kept.append(line[position:])
+                    position = len(line)
+                else:
+                    kept.append(line[position:start])
+                    in_comment = True
+                    position = start + 4
+        cleaned = "".join(kept)
+        # Drop lines that held nothing but a comment
+        if cleaned.strip() or not line.strip():
+            yield cleaned
+
+
+def collapse_repeated_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Collapse runs of lines that only differ in numbers (log spam, recursion)
+
+    Runs of blank lines become a single blank line.
+    """
+    # Only the first lines of a run are buffered, in case it turns out short
+    run: List[str] = []
+    run_shape: Optional[str] = None
+    run_length = 0
+
+    def flush() -> Iterator[str]:
+        if not run_shape:
+            yield from run[:1]
+        elif run_length >= MIN_REPEAT_RUN:
+            first = run[0]
+            indent = first[: len(first) - len(first.lstrip())]
+            yield first
+            yield f"{indent}... [{run_length - 1} similar lines omitted]"
+        else:
+            yield from run
+        run.clear()
+
+    for line in lines:
+        shape = _shape(line)
+        if shape == run_shape:
+            run_length += 1
+            if run_length < MIN_REPEAT_RUN:
+                run.append(line)
+            continue
+        yield from flush()
+        run.append(line)
+        run_shape, run_length = shape, 1
+    yield from flush()
+
+
+def trim_stack_traces(lines: Iterable[str], keep: int = STACK_KEEP_LINES) -> Iterator[str]:
+    """Keep the first and last `keep` lines of long stack traces"""
+    head_count = 0
+    tail: deque = deque(maxlen=keep)
+    omitted = 0
+    in_trace = False
+    after_python_frame = False
+
+    def flush() -> Iterator[str]:
+        if omitted:
+            yield f"    ... [{omitted} stack frame lines omitted]"
+        yield from tail
+        tail.clear()
+
+    for line in lines:
+        is_frame = bool(_STACK_FRAME_RE.match(line))
+        # Python prints the source line indented under each "File" line
+        is_source = after_python_frame and line.startswith("    ") and not is_frame
+        after_python_frame = is_frame and line.lstrip().startswith("File ")
+
+        if is_frame or (in_trace and is_source):
+            if not in_trace:
+                in_trace, head_count, omitted = True, 0, 0
+            if head_count < keep:
+                head_count += 1
+                yield line
+            else:
+                if len(tail) == keep:
+                    omitted += 1
+                tail.append(line)
+            continue
+
+        if in_trace:
+            yield from flush()
+            in_trace = False
+            omitted = 0
+        yield line
+
+    if in_trace:
+        yield from flush()
+
+
+def drop_repeated_quotes(lines: Iterable[str], seen: Set[str]) -> Iterator[str]:
+    """
+    Replace quoted blocks ("> ...") that only repeat earlier text
+
+    `seen` holds normalized lines from this text and from earlier texts
+    (the body and previous comments) and is updated as lines stream by.
+    """
+    quote: List[str] = []
+
+    def flush() -> Iterator[str]:
+        quoted = [_normalize(line.lstrip()[1:]) for line in quote]
+        quoted = [line for line in quoted if line]
+        if quoted and all(line in seen for line in quoted):
+            yield "> [quote of earlier text omitted]"
+        else:
+            seen.update(quoted)
+            yield from quote
+        quote.clear()
+
+    for line in lines:
+        if line.lstrip().startswith(">"):
+            quote.append(line)
+            continue
+        if quote:
+            yield from flush()
+        normalized = _normalize(line)
+        if normalized:
+            seen.add(normalized)
+        yield line
+    if quote:
+        yield from flush()
+
+
+def _heading_level(line: str) -> int:
+    """1-6 for "#" headings; bold-line headings rank below all of them"""
+    stripped = line.lstrip()
+    return len(stripped) - len(stripped.lstrip("#")) if stripped.startswith("#") else 7
+
+
+def drop_empty_template_sections(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Drop headed sections that were left as template placeholders
+
+    A section (heading plus the lines up to the next heading) is dropped
+    when its content is an issue-form placeholder such as "_No response_",
+    or when it is empty and followed by a heading of the same or a higher
+    level. Empty headings that introduce a subheading are kept, and so is
+    a text made of nothing but a heading. Headings inside code fences are
+    ignored.
+    """
+    section: List[str] = []
+    in_fence = False
+    emitted = False
+
+    def flush(next_level: Optional[int]) -> Iterator[str]:
+        nonlocal emitted
+        content = " ".join(_normalize(line) for line in section[1:]).strip()
+        if content:
+            keep = content not in PLACEHOLDER_CONTENT
+        elif next_level is not None:
+            keep = next_level > _heading_level(section[0])
+        else:
+            keep = not emitted
+        if keep:
+            emitted = True
+            yield from section
+        section.clear()
+
+    for line in lines:
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        if not in_fence and _HEADING_RE.match(line):
+            if section:
+                yield from flush(_heading_level(line))
+            section.append(line)
+        elif section:
+            section.append(line)
+        else:
+            if line.strip():
+                emitted = True
+            yield line
+    if section:
+        yield from flush(None)
+
+
+def preprocess_text(text: str, seen: Optional[Set[str]] = None) -> PreprocessResult:
+    """
+    Remove noise from an issue body or comment
+
+    Args:
+        text: Markdown text of the body or comment
+        seen: Normalized lines of earlier texts, shared across the body and
+            its comments so repeated quotes are dropped (updated in place)
+
+    Returns:
+        PreprocessResult with the cleaned text and bytes removed
+    """
+    if not text:
+        return PreprocessResult("", 0, 0)
+
+    lines: Iterable[str] = text.splitlines()
+    lines = strip_html_comments(lines)
+    lines = collapse_repeated_lines(lines)
+    lines = trim_stack_traces(lines)
+    lines = drop_repeated_quotes(lines, seen if seen is not None else set())
+    lines = drop_empty_template_sections(lines)
+    cleaned = "\n".join(lines).strip()
+
+    return PreprocessResult(
+        cleaned, len(text.encode("utf-8")), len(cleaned.encode("utf-8"))
+    )
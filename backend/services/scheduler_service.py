@@ -0,0 +1,230 @@
+"""
+Scheduler Service - Admission control and fair sharing of LLM capacity
+
+Every LLM call takes a slot from a per-process FairScheduler. Waiting
+requests are queued per tenant (API key or client address) and served
+by weighted fair queueing, with interactive requests ahead of batch
+work. When the estimated queue wait exceeds the priority's SLO the
+request is rejected up front so the API can answer 429 + Retry-After.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Who the current request is for; set by the API and inherited by spawned tasks
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default="default")
+current_priority: ContextVar[str] = ContextVar("current_priority", default=INTERACTIVE)
+
+
+class AdmissionRejected(Exception):
+    """Raised when the queue is too long to meet the request's SLO"""
+
+    def __init__(self, priority: str, estimated_wait: float, retry_after: float):
+        self.priority = priority
+        self.estimated_wait = estimated_wait
+        self.retry_after = retry_after
+        super().__init__(
+            f"Server is busy: estimated {priority} queue wait is {estimated_wait:.0f}s. "
+            f"Please retry in {retry_after:.0f}s."
+        )
+
+
+def set_request_context(tenant: str, priority: str) -> None:
+    """Attribute work started from the current task to a tenant and priority"""
+    current_tenant.set(tenant)
+    current_priority.set(priority)
+
+
+def tenant_label(tenant: str) -> str:
+    """Short, non-reversible tenant name for metrics (tenants may be API keys)"""
+    if tenant in ("default", "webhook") or tenant.startswith("ip:"):
+        return tenant
+    return "key:" + hashlib.sha256(tenant.encode()).hexdigest()[:8]
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse "tenantA=4,tenantB=1" into a weight map"""
+    weights: Dict[str, float] = {}
+    for item in value.split(","):
+        if "=" in item:
+            tenant, weight = item.rsplit("=", 1)
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing of LLM calls across tenants
+
+    Each waiting request gets a virtual finish tag of
+    max(virtual_time, tenant's last tag) + 1 / weight, and slots are
+    granted in tag order, so a tenant with a deep queue only gets its
+    weighted share while others are waiting. Interactive requests are
+    always dispatched before batch requests.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4,
+        slo_seconds: Optional[Dict[str, float]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        initial_service_time: float = 10.0,
+    ):
+        self.capacity = capacity
+        self.slo_seconds = slo_seconds or {INTERACTIVE: 30.0, BATCH: 300.0}
+        self.weights = weights or {}
+        self.active = 0
+        self.service_time = initial_service_time
+        self.avg_wait: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self.max_wait: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self.admitted: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.rejected: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._queues: Dict[str, List[Tuple[float, int, str, asyncio.Future]]] = {
+            p: [] for p in PRIORITIES
+        }
+        self._virtual_time = 0.0
+        self._last_tag: Dict[str, float] = {}
+        self._sequence = itertools.count()
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        """Number of requests waiting for a slot"""
+        priorities = [priority] if priority else PRIORITIES
+        return sum(
+            1 for p in priorities for *_, future in self._queues[p] if not future.done()
+        )
+
+    def estimated_wait(self, priority: str) -> float:
+        """Rough wait for a new request: work queued ahead of it divided by capacity"""
+        ahead = self.queue_depth(INTERACTIVE)
+        if priority == BATCH:
+            ahead += self.queue_depth(BATCH)
+        if ahead == 0 and self.active < self.capacity:
+            return 0.0
+        return (ahead + 1) * self.service_time / self.capacity
+
+    def check_admission(self, priority: Optional[str] = None) -> None:
+        """
+        Reject a request early if it would wait longer than its SLO
+
+        Raises:
+            AdmissionRejected: With a Retry-After hint
+        """
+        priority = priority or current_priority.get()
+        wait = self.estimated_wait(priority)
+        slo = self.slo_seconds[priority]
+        if wait > slo:
+            self.rejected[priority] += 1
+            raise AdmissionRejected(priority, wait, max(1.0, wait - slo))
+
+    @asynccontextmanager
+    async def slot(
+        self, tenant: Optional[str] = None, priority: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold one unit of LLM capacity for the duration of the block
+
+        Tenant and priority default to the current request context.
+
+        Raises:
+            AdmissionRejected: If the queue is over the SLO
+        """
+        tenant = tenant or current_tenant.get()
+        priority = priority or current_priority.get()
+        self.check_admission(priority)
+        enqueued_at = time.monotonic()
+
+        if self.active < self.capacity and self.queue_depth() == 0:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            weight = self.weights.get(tenant, 1.0)
+            tag = max(self._virtual_time, self._last_tag.get(tenant, 0.0)) + 1.0 / weight
+            self._last_tag[tenant] = tag
+            heapq.heappush(self._queues[priority], (tag, next(self._sequence), tenant, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # The slot may have been handed over just before cancellation
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+
+        waited = time.monotonic() - enqueued_at
+        self.admitted[priority] += 1
+        self.avg_wait[priority] = 0.8 * self.avg_wait[priority] + 0.2 * waited
+        self.max_wait[priority] = max(self.max_wait[priority], waited)
+
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.service_time = 0.8 * self.service_time + 0.2 * (time.monotonic() - started_at)
+            self._release()
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self.active < self.capacity:
+                tag, _, _, future = heapq.heappop(queue)
+                if future.done():
+                    # Waiter gave up (client disconnected)
+                    continue
+                self._virtual_time = tag
+                self.active += 1
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth, wait times and admission counters"""
+        by_tenant: Dict[str, int] = {}
+        for queue in self._queues.values():
+            for _, _, tenant, future in queue:
+                if not future.done():
+                    label = tenant_label(tenant)
+                    by_tenant[label] = by_tenant.get(label, 0) + 1
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "queue_depth": {p: self.queue_depth(p) for p in PRIORITIES},
+            "queue_depth_by_tenant": by_tenant,
+            "estimated_wait_seconds": {p: round(self.estimated_wait(p), 2) for p in PRIORITIES},
+            "avg_wait_seconds": {p: round(w, 3) for p, w in self.avg_wait.items()},
+            "max_wait_seconds": {p: round(w, 3) for p, w in self.max_wait.items()},
+            "avg_service_seconds": round(self.service_time, 3),
+            "slo_seconds": dict(self.slo_seconds),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+        }
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_scheduler() -> FairScheduler:
+    """Return the process-wide scheduler, configured from the environment"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler(
+            capacity=int(os.getenv("LLM_CONCURRENCY", "4")),
+            slo_seconds={
+                INTERACTIVE: float(os.getenv("SLO_INTERACTIVE_SECONDS", "30")),
+                BATCH: float(os.getenv("SLO_BATCH_SECONDS", "300")),
+            },
+            weights=parse_weights(os.getenv("TENANT_WEIGHTS", "")),
+        )
+    return _scheduler
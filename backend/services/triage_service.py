@@ -0,0 +1,246 @@
+"""
+Triage Service - Bulk offline analysis without the HTTP API
+
+Issue references are fed through a bounded asyncio pipeline that calls
+the GitHub and AI services directly. Results are written as NDJSON, one
+line per issue, flushed as they complete, so an interrupted run can be
+resumed from its own output file.
+"""
+
+import asyncio
+import json
+import re
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from .ai_service import analyze_issue_with_ai, MAX_PROMPT_COMMENTS
+from .cache_service import issue_cache_key
+from .github_service import fetch_issue_data, parse_github_reference
+from .label_service import get_label_index
+
+
+# "owner/repo#123" or "owner/repo 123"; links and URLs go through parse_github_reference
+_SHORT_REF_RE = re.compile(r"^\s*([\w.-]+/[\w.-]+)\s*(?:#|\s)\s*(\d+)\s*$")
+
+
+class IssueRef:
+    """One issue to triage, as written in the input"""
+
+    __slots__ = ("text", "owner", "repo", "issue_number", "error")
+
+    def __init__(self, text: str, owner: str = "", repo: str = "",
+                 issue_number: int = 0, error: Optional[str] = None):
+        self.text = text
+        self.owner = owner
+        self.repo = repo
+        self.issue_number = issue_number
+        self.error = error
+
+    @property
+    def key(self) -> str:
+        """Checkpoint key (same normalization as the cache)"""
+        if self.error:
+            return self.text
+        return issue_cache_key(self.owner, self.repo, self.issue_number)
+
+    @property
+    def repo_url(self) -> str:
+        return f"https://github.com/{self.owner}/{self.repo}"
+
+
+def parse_issue_ref(text: str) -> IssueRef:
+    """
+    Parse one input line into an IssueRef
+
+    Accepts issue links, "owner/repo#123" and "owner/repo 123". Lines
+    that can't be parsed get an error instead of raising, so they are
+    reported in the output like any other failure.
+    """
+    match = _SHORT_REF_RE.match(text)
+    try:
+        if match:
+            reference = parse_github_reference(match.group(1))
+            return IssueRef(text, reference.owner, reference.repo, int(match.group(2)))
+        reference = parse_github_reference(text)
+    except ValueError as e:
+        return IssueRef(text, error=str(e))
+    if reference.issue_number is None:
+        return IssueRef(text, error="No issue number in reference")
+    return IssueRef(text, reference.owner, reference.repo, reference.issue_number)
+
+
+def read_issue_refs(lines: Iterable[str]) -> Iterator[IssueRef]:
+    """Parse input lines, skipping blanks, "#" comments and duplicates"""
+    seen: Set[str] = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        ref = parse_issue_ref(line)
+        if ref.key not in seen:
+            seen.add(ref.key)
+            yield ref
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Keys of issues already analyzed successfully in an earlier run
+
+    Failed issues are not included, so they are retried. A line cut off
+    by an interruption is ignored.
+    """
+    done: Set[str] = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "analysis" in record and record.get("repo"):
+                    owner, repo = record["repo"].split("/", 1)
+                    done.add(issue_cache_key(owner, repo, record["issue_number"]))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def truncate_partial_line(path: str, block_size: int = 4096) -> int:
+    """
+    Cut a line left unfinished by an interruption off the end of a file
+
+    Run before appending on resume, so the next record starts on a line
+    of its own instead of being glued to the fragment.
+
+    Returns:
+        Number of bytes removed
+    """
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return 0
+    with f:
+        size = f.seek(0, 2)
+        end = size
+        # Scan backwards block by block for the last newline
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+    return size - end
+
+
+class Progress:
+    """Throttled progress line: done/total, failures, rate and ETA"""
+
+    def __init__(self, total: int, stream: Optional[TextIO] = sys.stderr, interval: float = 0.5):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.succeeded = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._last_report = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    def update(self, ok: bool) -> None:
+        if ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        if self.stream is None:
+            return
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = self.done / elapsed
+        eta = (self.total - self.done) / rate if rate else 0.0
+        end = "\n" if self.done == self.total else ""
+        self.stream.write(
+            f"\r[{self.done}/{self.total}] ok={self.succeeded} failed={self.failed} "
+            f"{rate:.1f}/s eta {eta:.0f}s{end}"
+        )
+        self.stream.flush()
+
+
+async def triage_issue(ref: IssueRef) -> Dict[str, Any]:
+    """Fetch and analyze one issue, returning its output record"""
+    record: Dict[str, Any] = {
+        "ref": ref.text,
+        "repo": f"{ref.owner}/{ref.repo}" if not ref.error else "",
+        "issue_number": ref.issue_number,
+    }
+    if ref.error:
+        record["error"] = ref.error
+        return record
+    try:
+        issue_data = await fetch_issue_data(ref.repo_url, ref.issue_number, max_comments=MAX_PROMPT_COMMENTS)
+        label_index = await get_label_index(ref.owner, ref.repo)
+        analysis = await analyze_issue_with_ai(issue_data, label_index)
+        record["analysis"] = analysis.model_dump()
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+async def run_triage(
+    refs: List[IssueRef],
+    write: Callable[[Dict[str, Any]], None],
+    concurrency: int = 4,
+    progress: Optional[Progress] = None,
+    triage: Callable[[IssueRef], Awaitable[Dict[str, Any]]] = triage_issue,
+) -> Tuple[int, int]:
+    """
+    Triage issues with at most `concurrency` in flight
+
+    Workers pull from a bounded queue, so memory stays proportional to
+    the concurrency rather than the number of issues. Each record is
+    written as soon as its issue completes.
+
+    Returns:
+        Tuple of (succeeded, failed)
+    """
+    progress = progress or Progress(len(refs), stream=None)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker() -> None:
+        while True:
+            ref = await queue.get()
+            if ref is None:
+                return
+            record = await triage(ref)
+            write(record)
+            progress.update("analysis" in record)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+        for ref in refs:
+            await queue.put(ref)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    return progress.succeeded, progress.failed
+
+
+def ndjson_writer(stream: TextIO) -> Callable[[Dict[str, Any]], None]:
+    """Write records as NDJSON, flushing each line so progress survives a crash"""
+    def write(record: Dict[str, Any]) -> None:
+        stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        stream.flush()
+    return write
@@ -0,0 +1,249 @@
+"""
+Webhook Service - Pre-analyze issues when GitHub reports changes
+
+GitHub `issues` and `issue_comment` webhooks queue an analysis so the
+result is already cached when a user looks the issue up. Bursts of
+edits to the same issue are debounced into a single analysis.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Actions that change what the analysis is based on
+ISSUE_ACTIONS = {"opened", "edited", "reopened", "transferred"}
+COMMENT_ACTIONS = {"created", "edited"}
+
+
+class WebhookSignatureError(Exception):
+    """Raised when a webhook delivery fails signature verification"""
+    pass
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """Compute the X-Hub-Signature-256 header value for a payload"""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """
+    Check a delivery's X-Hub-Signature-256 header against the shared secret
+
+    Args:
+        body: Raw request body exactly as received
+        signature: Value of the X-Hub-Signature-256 header
+        secret: Webhook secret configured on GitHub
+
+    Returns:
+        True if the signature matches
+    """
+    if not signature or not secret:
+        return False
+    return hmac.compare_digest(sign_payload(body, secret), signature)
+
+
+def extract_issue_ref(event: str, payload: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """
+    Get the (repo_url, issue_number) an event should trigger an analysis for
+
+    Returns:
+        Tuple of (repo_url, issue_number), or None if the event is ignored
+    """
+    action = payload.get("action")
+    if event == "issues":
+        if action not in ISSUE_ACTIONS:
+            return None
+    elif event == "issue_comment":
+        if action not in COMMENT_ACTIONS:
+            return None
+    else:
+        return None
+
+    issue = payload.get("issue") or {}
+    # Comments on pull requests arrive as issue_comment events too
+    if "pull_request" in issue:
+        return None
+
+    repo_url = (payload.get("repository") or {}).get("html_url")
+    number = issue.get("number")
+    if not repo_url or not isinstance(number, int):
+        return None
+    return repo_url, number
+
+
+class AnalysisDebouncer:
+    """
+    Coalesces bursts of events for the same issue into one analysis
+
+    Each new event for an issue restarts its timer; the analysis runs once
+    the issue has been quiet for `delay` seconds. At most max_concurrency
+    analyses run at once.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str, int], Awaitable[Any]],
+        delay: float = 10.0,
+        max_concurrency: int = 2,
+    ):
+        self.run = run
+        self.delay = delay
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._timers: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of issues waiting for their debounce window to close"""
+        return len(self._timers)
+
+    def submit(self, repo_url: str, issue_number: int) -> bool:
+        """
+        Queue an analysis, restarting the timer if one is already waiting
+
+        Returns:
+            True if a new analysis was queued, False if it was merged into a pending one
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        key = (repo_url.lower().rstrip("/"), issue_number)
+        existing = self._timers.pop(key, None)
+        if existing is not None:
+            existing.cancel()
+
+        task = asyncio.get_running_loop().create_task(self._fire(key, repo_url, issue_number))
+        self._timers[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return existing is None
+
+    async def _fire(self, key: Tuple[str, int], repo_url: str, issue_number: int) -> None:
+        await asyncio.sleep(self.delay)
+
+        # From here on new events start a fresh timer instead of cancelling this run
+        if self._timers.get(key) is asyncio.current_task():
+            del self._timers[key]
+
+        async with self._semaphore:
+            try:
+                await self.run(repo_url, issue_number)
+            except Exception as e:
+                logger.warning("Webhook analysis of %s#%s failed: %s", repo_url, issue_number, e)
+
+    async def drain(self) -> None:
+        """Wait for every pending and running analysis to finish"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+_debouncer: Optional[AnalysisDebouncer] = None
+
+
+def get_debouncer() -> AnalysisDebouncer:
+    """Return the process-wide debouncer that writes analyses to the cache"""
+    global _debouncer
+    if _debouncer is None:
+        from .analysis_service import refresh_analysis
+
+        _debouncer = AnalysisDebouncer(
+            refresh_analysis,
+            delay=float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "10")),
+            max_concurrency=int(os.getenv("WEBHOOK_CONCURRENCY", "2")),
+        )
+    return _debouncer
+
+
+async def handle_webhook(
+    event: str,
+    body: bytes,
+    signature: Optional[str],
+    secret: Optional[str] = None,
+    debouncer: Optional[AnalysisDebouncer] = None,
+) -> Dict[str, Any]:
+    """
+    Verify a webhook delivery and queue an analysis if it is relevant
+
+    Args:
+        event: Value of the X-GitHub-Event header
+        body: Raw request body
+        signature: Value of the X-Hub-Signature-256 header
+        secret: Webhook secret (defaults to GITHUB_WEBHOOK_SECRET)
+        debouncer: Debouncer to queue analyses on (defaults to the shared one)
+
+    Returns:
+        Dictionary describing what was done with the delivery
+
+    Raises:
+        WebhookSignatureError: If the signature is missing or wrong
+        ValueError: If the body is not valid JSON
+    """
+    if secret is None:
+        secret = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    if not secret:
+        raise WebhookSignatureError("GITHUB_WEBHOOK_SECRET is not configured")
+    if not verify_signature(body, signature, secret):
+        raise WebhookSignatureError("Invalid webhook signature")
+
+    if event == "ping":
+        return {"status": "pong"}
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid webhook payload: {str(e)}")
+
+    ref = extract_issue_ref(event, payload)
+    if ref is None:
+        return {"status": "ignored", "event": event, "action": payload.get("action")}
+
+    repo_url, issue_number = ref
+    queued = (debouncer or get_debouncer()).submit(repo_url, issue_number)
+    return {
+        "status": "queued" if queued else "debounced",
+        "repo_url": repo_url,
+        "issue_number": issue_number
+    }
+
+
+def load_recorded_deliveries(path: str) -> List[Dict[str, Any]]:
+    """
+    Load recorded webhook deliveries from an NDJSON file
+
+    Each line holds {"event": ..., "payload": {...}} as captured from
+    GitHub's "Recent Deliveries" page.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay_deliveries(
+    deliveries: Iterable[Dict[str, Any]],
+    send: Callable[[str, bytes, str], Awaitable[Any]],
+    secret: str,
+) -> List[Any]:
+    """
+    Sign recorded deliveries and feed them to a receiver in order
+
+    Args:
+        deliveries: Recorded deliveries (see load_recorded_deliveries)
+        send: Coroutine taking (event, body, signature), e.g. an HTTP POST
+        secret: Secret used to sign each body
+
+    Returns:
+        Whatever send returned for each delivery
+    """
+    results = []
+    for delivery in deliveries:
+        body = json.dumps(delivery["payload"]).encode()
+        results.append(await send(delivery["event"], body, sign_payload(body, secret)))
+    return results
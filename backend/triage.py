@@ -0,0 +1,73 @@
+"""
+Analyze many issues from the command line, without the API
+
+Usage (from the backend directory):
+    python triage.py issues.txt -o results.ndjson --concurrency 8
+    cat issues.txt | python triage.py -o results.ndjson --resume
+
+Input has one issue per line: an issue link, "owner/repo#123" or
+"owner/repo 123". With --resume, issues already analyzed in the output
+file are skipped and new results are appended to it (after dropping a
+last line cut off by an interruption).
+"""
+
+import argparse
+import asyncio
+import sys
+
+from dotenv import load_dotenv
+
+from services.triage_service import (
+    Progress, load_checkpoint, ndjson_writer, read_issue_refs, run_triage, truncate_partial_line
+)
+
+
+def main() -> int:
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Bulk offline triage of GitHub issues")
+    parser.add_argument("input", nargs="?", default="-", help="File of issue references (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Issues analyzed in parallel")
+    parser.add_argument("--resume", action="store_true", help="Skip issues already in the output file")
+    parser.add_argument("--quiet", action="store_true", help="No progress on stderr")
+    args = parser.parse_args()
+
+    if args.resume and args.output == "-":
+        parser.error("--resume needs an output file (-o)")
+
+    if args.input == "-":
+        refs = list(read_issue_refs(sys.stdin))
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            refs = list(read_issue_refs(f))
+
+    if args.resume:
+        done = load_checkpoint(args.output)
+        skipped = len(refs)
+        refs = [ref for ref in refs if ref.key not in done]
+        skipped -= len(refs)
+        if skipped and not args.quiet:
+            print(f"Resuming: {skipped} issues already analyzed", file=sys.stderr)
+        truncate_partial_line(args.output)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    progress = Progress(len(refs), stream=None if args.quiet else sys.stderr)
+    try:
+        succeeded, failed = asyncio.run(
+            run_triage(refs, ndjson_writer(output), concurrency=args.concurrency, progress=progress)
+        )
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {progress.done} issues; rerun with --resume to continue", file=sys.stderr)
+        return 130
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if not args.quiet:
+        print(f"Done: {succeeded} analyzed, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,13 @@ Created for intelligent project management and development workflow optimization
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Optional
+import re
 import time
+from typing import Iterator, List, Optional
 from datetime import datetime
+import pandas as pd
 
 
 # ============================================================================
@@ -414,39 +417,60 @@ def get_api_url() -> str:
 # ============================================================================
 # API COMMUNICATION FUNCTIONS
 # ============================================================================
-def analyze_issue(repo_url: str, issue_number: int) -> Optional[dict]:
+class AnalysisError(Exception):
+    """Raised when the backend cannot analyze an issue (kept out of the result cache)"""
+    pass
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
     """
-    Send issue analysis request to backend API
-    
-    Args:
-        repo_url: Full GitHub repository URL
-        issue_number: Issue number to analyze
-        
-    Returns:
-        dict: Analysis results with summary, priority, labels, etc.
-        None: If request fails
+    Shared HTTP session for backend calls
+    Reuses pooled keep-alive connections across reruns and users
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def looks_like_repo(repo_url: str) -> bool:
+    """Cheap client-side check; the backend does the full parsing"""
+    value = repo_url.strip()
+    return "github.com" in value.lower() or value.count("/") == 1
+
+
+def linked_issue_number(repo_url: str) -> Optional[int]:
+    """Issue number in a pasted issue or pull request link, if any"""
+    match = re.search(r"/(?:issues|pull)/(\d+)/?(?:[?#].*)?$", repo_url.strip())
+    return int(match.group(1)) if match else None
+
+
+def result_key(repo_url: str, issue_number: int) -> tuple:
+    """Normalize a repo/issue pair so equivalent URLs share a cache entry"""
+    return (repo_url.strip().rstrip("/").lower(), int(issue_number))
+
+
+@st.cache_data(ttl=900, max_entries=256, show_spinner=False)
+def fetch_analysis(repo_key: str, issue_number: int) -> dict:
     """
-    api_url = get_api_url()
+    Request an analysis from the backend, cached by repo and issue
     
+    Failures raise AnalysisError so they are never cached.
+    """
+    payload = {"repo_url": repo_key}
+    # An issue link carries its own number; the backend rejects a different one
+    if linked_issue_number(repo_key) is None:
+        payload["issue_number"] = issue_number
     try:
-        response = requests.post(
-            f"{api_url}/analyze",
-            json={
-                "repo_url": repo_url,
-                "issue_number": issue_number
-            },
+        response = get_http_session().post(
+            f"{get_api_url()}/analyze",
+            json=payload,
             timeout=60
         )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_detail = response.json().get("detail", "Unknown error occurred")
-            st.error(f"❌ **Analysis Failed:** {error_detail}")
-            return None
-            
     except requests.exceptions.ConnectionError:
-        st.error("""
+        raise AnalysisError("""
         ### 🔌 Backend Connection Error
         
         **The backend API server is not responding.**
@@ -460,10 +484,8 @@ def analyze_issue(repo_url: str, issue_number: int) -> Optional[dict]:
         
         The server should be accessible at `http://localhost:8000`
         """)
-        return None
-        
     except requests.exceptions.Timeout:
-        st.error("""
+        raise AnalysisError("""
         ### ⏱️ Request Timeout
         
         The analysis is taking longer than expected. This could be due to:
@@ -473,32 +495,286 @@ def analyze_issue(repo_url: str, issue_number: int) -> Optional[dict]:
         
         Please try again in a moment.
         """)
-        return None
+    
+    if response.status_code == 200:
+        return response.json()
+    
+    try:
+        error_detail = response.json().get("detail", "Unknown error occurred")
+    except ValueError:
+        error_detail = response.text or "Unknown error occurred"
+    raise AnalysisError(f"❌ **Analysis Failed:** {error_detail}")
+
+
+def analyze_issue(repo_url: str, issue_number: int) -> Optional[dict]:
+    """
+    Send issue analysis request to backend API
+    
+    Results are kept in st.session_state for this browser session and in
+    the shared st.cache_data cache, so reruns and switching between
+    examples don't trigger new backend calls.
+    
+    Args:
+        repo_url: Full GitHub repository URL
+        issue_number: Issue number to analyze
         
+    Returns:
+        dict: Analysis results with summary, priority, labels, etc.
+        None: If request fails
+    """
+    key = result_key(repo_url, issue_number)
+    results = st.session_state.setdefault("results", {})
+    if key in results:
+        return results[key]
+    
+    try:
+        analysis = fetch_analysis(*key)
+    except AnalysisError as e:
+        st.error(str(e))
+        return None
     except Exception as e:
         st.error(f"❌ **Unexpected Error:** {str(e)}")
         return None
+    
+    results[key] = analysis
+    return analysis
 
 
 # ============================================================================
-# MAIN APPLICATION
+# DASHBOARD (BULK ANALYSIS)
 # ============================================================================
-def main():
+MAX_BATCH_SIZE = 2000
+
+TYPE_EMOJI = {
+    "bug": "🐛",
+    "feature_request": "✨",
+    "documentation": "📚",
+    "question": "❓",
+    "enhancement": "⚡",
+    "performance": "🚀"
+}
+
+
+def parse_issue_numbers(text: str) -> List[int]:
     """
-    Main application entry point
-    Renders the complete UI and handles user interactions
+    Parse a list/range expression such as "1-50, 75, 80-90"
+    
+    Raises:
+        ValueError: If the expression is malformed or too large
+    """
+    numbers: List[int] = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+            if start > end:
+                start, end = end, start
+            if end - start + 1 > MAX_BATCH_SIZE:
+                raise ValueError(f"Range {part} is larger than {MAX_BATCH_SIZE} issues")
+            numbers.extend(range(start, end + 1))
+        else:
+            numbers.append(int(part))
+        if len(numbers) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} issues can be analyzed at once")
+    
+    numbers = list(dict.fromkeys(n for n in numbers if n > 0))
+    if not numbers:
+        raise ValueError("No issue numbers given")
+    return numbers
+
+
+def priority_value(analysis: dict) -> Optional[int]:
+    """The numeric 1-5 priority of an analysis (parsed from priority_score for older backends)"""
+    if analysis.get("priority") is not None:
+        return analysis["priority"]
+    match = re.match(r"\s*([1-5])", analysis.get("priority_score") or "")
+    return int(match.group(1)) if match else None
+
+
+def stream_batch(repo_url: str, issue_numbers: List[int]) -> Iterator[dict]:
     """
+    Stream batch results from the backend as they complete
     
-    # ===== HEADER SECTION =====
-    st.markdown("""
-    <div class="header-container">
-        <div class="main-title">IssueInsight</div>
-        <div class="subtitle">AI-Powered GitHub Issue Analysis & Intelligence</div>
-        <div style="margin-top: 1rem; color: #60a5fa; font-size: 0.95rem; font-weight: 600; letter-spacing: 1px;">
-            🌱 SEEDLING LABS TASK
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    One request for the whole batch; the backend sends one NDJSON line per issue.
+    """
+    with get_http_session().post(
+        f"{get_api_url()}/analyze/batch",
+        json={"repo_url": repo_url, "issue_numbers": issue_numbers},
+        stream=True,
+        timeout=(5, 300)
+    ) as response:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", "Unknown error occurred")
+            except ValueError:
+                detail = response.text or "Unknown error occurred"
+            raise AnalysisError(f"❌ **Batch Failed:** {detail}")
+        
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def batch_row(repo_url: str, result: dict) -> dict:
+    """Flatten one batch result into a table row"""
+    analysis = result["analysis"]
+    issue_type = analysis.get("type", "other")
+    return {
+        "issue": result["issue_number"],
+        "priority": priority_value(analysis),
+        "type": f"{TYPE_EMOJI.get(issue_type.lower(), '📌')} {issue_type}",
+        "summary": analysis.get("summary", ""),
+        "labels": analysis.get("suggested_labels", []),
+        "impact": analysis.get("potential_impact", ""),
+        "link": f"{repo_url.rstrip('/')}/issues/{result['issue_number']}"
+    }
+
+
+def run_batch(repo_url: str, issue_numbers: List[int]) -> Optional[dict]:
+    """
+    Run a batch, showing progress and a live-updating table while results arrive
+    
+    Returns:
+        dict with "rows" and "errors", or None if the backend is unreachable
+    """
+    rows: List[dict] = []
+    errors: List[dict] = []
+    results = st.session_state.setdefault("results", {})
+    progress = st.progress(0.0, text=f"Analyzing 0/{len(issue_numbers)} issues...")
+    live_table = st.empty()
+    last_render = 0.0
+    
+    try:
+        for result in stream_batch(repo_url, issue_numbers):
+            if "error" in result:
+                errors.append(result)
+            else:
+                rows.append(batch_row(repo_url, result))
+                # Share results with the single-issue view
+                results[result_key(repo_url, result["issue_number"])] = result["analysis"]
+            
+            done = len(rows) + len(errors)
+            # Throttle redraws so large batches stay responsive
+            if time.monotonic() - last_render > 0.5 or done == len(issue_numbers):
+                progress.progress(done / len(issue_numbers), text=f"Analyzed {done}/{len(issue_numbers)} issues...")
+                live_table.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                last_render = time.monotonic()
+    except AnalysisError as e:
+        st.error(str(e))
+        return None
+    except requests.exceptions.RequestException:
+        st.error("🔌 **Backend Connection Error:** the backend API server is not responding.")
+        return None
+    finally:
+        progress.empty()
+        live_table.empty()
+    
+    frame = pd.DataFrame(rows, columns=["issue", "priority", "type", "summary", "labels", "impact", "link"])
+    # Missing priorities would leave an object column that can't be compared with numbers
+    frame["priority"] = pd.to_numeric(frame["priority"], errors="coerce")
+    frame = frame.sort_values(["priority", "issue"], ascending=[False, True], na_position="last")
+    return {"frame": frame, "errors": errors}
+
+
+def render_batch(batch: dict):
+    """Render a finished batch as a filterable, sortable table"""
+    frame = batch["frame"]
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Issues analyzed", len(frame))
+    col2.metric("Critical (P4-5)", int((frame["priority"] >= 4).sum()))
+    col3.metric("Failed", len(batch["errors"]))
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        types = st.multiselect("🏷️ Type", sorted(frame["type"].unique()), key="dash_types")
+    with col2:
+        min_priority = st.slider("🎯 Min priority", 1, 5, 1, key="dash_min_priority")
+    
+    view = frame
+    if types:
+        view = view[view["type"].isin(types)]
+    if min_priority > 1:
+        view = view[view["priority"] >= min_priority]
+    
+    # st.dataframe renders a virtualized grid; clicking a header sorts client-side
+    st.dataframe(
+        view,
+        use_container_width=True,
+        hide_index=True,
+        height=600,
+        column_config={
+            "issue": st.column_config.NumberColumn("Issue", format="#%d"),
+            "priority": st.column_config.NumberColumn("Priority", format="P%d"),
+            "type": st.column_config.TextColumn("Type"),
+            "summary": st.column_config.TextColumn("Summary", width="large"),
+            "labels": st.column_config.ListColumn("Labels"),
+            "impact": st.column_config.TextColumn("Impact"),
+            "link": st.column_config.LinkColumn("Link", display_text="Open")
+        }
+    )
+    
+    if batch["errors"]:
+        with st.expander(f"⚠️ {len(batch['errors'])} issues could not be analyzed"):
+            st.dataframe(pd.DataFrame(batch["errors"]), use_container_width=True, hide_index=True)
+
+
+def render_dashboard():
+    """
+    Dashboard view: analyze a list or range of issues in one streamed request
+    """
+    col1, col2 = st.columns([3, 2])
+    
+    with col1:
+        repo_url = st.text_input(
+            "📂 Repository URL",
+            placeholder="https://github.com/facebook/react",
+            key="dash_repo"
+        )
+    
+    with col2:
+        numbers_text = st.text_input(
+            "🔢 Issue Numbers",
+            placeholder="1-100, 250, 300-320",
+            help=f"Comma-separated numbers and ranges (up to {MAX_BATCH_SIZE} issues)",
+            key="dash_numbers"
+        )
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    batches = st.session_state.setdefault("batches", {})
+    
+    if st.button("🚀 Analyze Batch"):
+        if not repo_url or not looks_like_repo(repo_url):
+            st.error("⚠️ Please enter a valid GitHub repository URL")
+            return
+        try:
+            issue_numbers = parse_issue_numbers(numbers_text)
+        except ValueError as e:
+            st.error(f"⚠️ Invalid issue numbers: {e}")
+            return
+        
+        key = (result_key(repo_url, 0)[0], tuple(issue_numbers))
+        if key not in batches:
+            batch = run_batch(repo_url, issue_numbers)
+            if batch is None:
+                return
+            batches[key] = batch
+        st.session_state.current_batch = key
+    
+    # Finished batches are kept in the session, so filtering never hits the backend
+    if st.session_state.get("current_batch") in batches:
+        render_batch(batches[st.session_state.current_batch])
+
+
+# ============================================================================
+# MAIN APPLICATION
+# ============================================================================
+def render_single_issue():
+    """
+    Single-issue view: analyze one issue and render the full report
+    """
     
     # ===== INPUT SECTION =====
     col1, col2 = st.columns([3, 1])
@@ -507,7 +783,7 @@ def main():
         repo_url = st.text_input(
             "📂 Repository URL",
             placeholder="https://github.com/facebook/react",
-            help="Enter the complete GitHub repository URL",
+            help="GitHub repository URL, SSH URL or owner/repo",
             label_visibility="visible"
         )
     
@@ -516,7 +792,7 @@ def main():
             "🔢 Issue Number",
             min_value=1,
             value=1,
-            help="Issue number to analyze",
+            help="Issue number to analyze (ignored when the URL is an issue link)",
             label_visibility="visible"
         )
     
@@ -554,87 +830,127 @@ def main():
         analyze_clicked = True
     
     # ===== PROCESS ANALYSIS REQUEST =====
+    analysis = None
     if analyze_clicked:
         # Validation
         if not repo_url:
             st.error("⚠️ Please enter a repository URL")
             return
         
-        if "github.com" not in repo_url.lower():
+        if not looks_like_repo(repo_url):
             st.error("⚠️ Please enter a valid GitHub repository URL")
             return
         
-        # Show progress
-        with st.spinner("🔄 Fetching issue data from GitHub..."):
-            time.sleep(0.5)
+        issue_number = linked_issue_number(repo_url) or issue_number
         
         with st.spinner("🧠 AI is analyzing the issue... This may take 15-30 seconds"):
             analysis = analyze_issue(repo_url, issue_number)
         
-        # ===== DISPLAY RESULTS =====
         if analysis:
-            st.success("✨ **Analysis Complete!**")
-            
-            # Priority Score - combine card opening with content
-            priority_num = analysis["priority_score"].split()[0] if analysis["priority_score"] else "3"
-            st.markdown(f"""
-            <div class="card">
-                <div class="result-header">📊 Priority Assessment</div>
-                <div class="priority p-{priority_num}">
-                    🎯 Priority: Level {priority_num}/5
-                </div>
-                <p class="result-text">{analysis.get("priority_score", "Priority information not available")}</p>
-            """, unsafe_allow_html=True)
-            
-            # Summary
-            st.markdown('<div class="result-header">📝 Executive Summary</div>', unsafe_allow_html=True)
-            st.markdown(f'<p class="result-text">{analysis.get("summary", "No summary available")}</p>', unsafe_allow_html=True)
-            
-            # Type Classification
-            st.markdown('<div class="result-header">🏷️ Issue Classification</div>', unsafe_allow_html=True)
-            type_emoji = {
-                "bug": "🐛",
-                "feature_request": "✨",
-                "documentation": "📚",
-                "question": "❓",
-                "enhancement": "⚡",
-                "performance": "🚀"
-            }
-            issue_type = analysis.get("type", "unknown")
-            emoji = type_emoji.get(issue_type.lower(), "📌")
-            display_type = issue_type.replace("_", " ").title()
-            st.markdown(f'<span class="label-tag">{emoji} {display_type}</span>', unsafe_allow_html=True)
-            
-            # Suggested Labels
-            st.markdown('<div class="result-header">🎯 Recommended Labels</div>', unsafe_allow_html=True)
-            labels = analysis.get("suggested_labels", [])
-            if labels:
-                labels_html = "".join([f'<span class="label-tag">{label}</span>' for label in labels])
-                st.markdown(labels_html, unsafe_allow_html=True)
-            else:
-                st.markdown('<p class="result-text">No labels suggested</p>', unsafe_allow_html=True)
-            
-            # Impact Analysis
-            st.markdown('<div class="result-header">💥 Impact Assessment</div>', unsafe_allow_html=True)
-            st.markdown(f'<p class="result-text">{analysis.get("potential_impact", "Impact analysis not available")}</p>', unsafe_allow_html=True)
-            
-            # Export Section
-            st.markdown('<div class="result-header">📦 Export Results</div>', unsafe_allow_html=True)
-            json_data = json.dumps(analysis, indent=2)
-            
-            st.download_button(
-                "💾 Download as JSON",
-                data=json_data,
-                file_name=f"issue_analysis_{issue_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json",
-                use_container_width=True
-            )
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Raw JSON viewer outside the card
-            with st.expander("📋 View Raw JSON"):
-                st.code(json_data, language="json")
+            st.session_state.current = result_key(repo_url, issue_number)
+    elif st.session_state.get("current") in st.session_state.get("results", {}):
+        # Keep showing the last result across reruns without calling the backend
+        repo_url, issue_number = st.session_state.current
+        analysis = st.session_state.results[st.session_state.current]
+    
+    # ===== DISPLAY RESULTS =====
+    if analysis:
+        st.success("✨ **Analysis Complete!**")
+        
+        # Priority Score - combine card opening with content
+        priority_num = priority_value(analysis)
+        priority_text = f"Level {priority_num}/5" if priority_num else "Not rated"
+        priority_reason = analysis.get("priority_reason") or analysis.get("priority_score") or "Priority information not available"
+        st.markdown(f"""
+        <div class="card">
+            <div class="result-header">📊 Priority Assessment</div>
+            <div class="priority p-{priority_num or 3}">
+                🎯 Priority: {priority_text}
+            </div>
+            <p class="result-text">{priority_reason}</p>
+        """, unsafe_allow_html=True)
+        
+        # Summary
+        st.markdown('<div class="result-header">📝 Executive Summary</div>', unsafe_allow_html=True)
+        st.markdown(f'<p class="result-text">{analysis.get("summary", "No summary available")}</p>', unsafe_allow_html=True)
+        
+        # Type Classification
+        st.markdown('<div class="result-header">🏷️ Issue Classification</div>', unsafe_allow_html=True)
+        type_emoji = {
+            "bug": "🐛",
+            "feature_request": "✨",
+            "documentation": "📚",
+            "question": "❓",
+            "enhancement": "⚡",
+            "performance": "🚀"
+        }
+        issue_type = analysis.get("type", "unknown")
+        emoji = type_emoji.get(issue_type.lower(), "📌")
+        display_type = issue_type.replace("_", " ").title()
+        st.markdown(f'<span class="label-tag">{emoji} {display_type}</span>', unsafe_allow_html=True)
+        
+        # Suggested Labels
+        st.markdown('<div class="result-header">🎯 Recommended Labels</div>', unsafe_allow_html=True)
+        labels = analysis.get("suggested_labels", [])
+        if labels:
+            labels_html = "".join([f'<span class="label-tag">{label}</span>' for label in labels])
+            st.markdown(labels_html, unsafe_allow_html=True)
+        else:
+            st.markdown('<p class="result-text">No labels suggested</p>', unsafe_allow_html=True)
+        
+        # Impact Analysis
+        st.markdown('<div class="result-header">💥 Impact Assessment</div>', unsafe_allow_html=True)
+        st.markdown(f'<p class="result-text">{analysis.get("potential_impact", "Impact analysis not available")}</p>', unsafe_allow_html=True)
+        
+        # Export Section
+        st.markdown('<div class="result-header">📦 Export Results</div>', unsafe_allow_html=True)
+        json_data = json.dumps(analysis, indent=2)
+        
+        st.download_button(
+            "💾 Download as JSON",
+            data=json_data,
+            file_name=f"issue_analysis_{issue_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+            use_container_width=True
+        )
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Raw JSON viewer outside the card
+        with st.expander("📋 View Raw JSON"):
+            st.code(json_data, language="json")
+
+
+def main():
+    """
+    Main application entry point
+    Renders the complete UI and handles user interactions
+    """
+    
+    # ===== HEADER SECTION =====
+    st.markdown("""
+    <div class="header-container">
+        <div class="main-title">IssueInsight</div>
+        <div class="subtitle">AI-Powered GitHub Issue Analysis & Intelligence</div>
+        <div style="margin-top: 1rem; color: #60a5fa; font-size: 0.95rem; font-weight: 600; letter-spacing: 1px;">
+            🌱 SEEDLING LABS TASK
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # ===== MODE SELECTION =====
+    mode = st.radio(
+        "View",
+        ["🔍 Single Issue", "📊 Dashboard"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="mode"
+    )
+    
+    if mode == "📊 Dashboard":
+        render_dashboard()
+    else:
+        render_single_issue()
     
     # ===== FOOTER =====
     st.markdown("<br><br>", unsafe_allow_html=True)
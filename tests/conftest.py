@@ -0,0 +1,33 @@
+"""
+Shared pytest configuration
+
+Every test gets its own empty process-wide cache (the `cache` fixture).
+Timing benchmarks are marked @pytest.mark.benchmark and only run with
+RUN_BENCHMARKS=1, so the default suite never depends on machine speed.
+"""
+
+import os
+import pytest
+from backend.services import cache_service
+from backend.services.cache_service import SQLiteCache
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: wall-clock benchmark, run with RUN_BENCHMARKS=1")
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """Fresh SQLite cache installed as the process-wide cache, so tests never share state"""
+    fresh = SQLiteCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(cache_service, "_cache", fresh)
+    return fresh
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_BENCHMARKS") == "1":
+        return
+    skip = pytest.mark.skip(reason="benchmark; set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,63 @@
+"""
+Tests for AI Service
+Run with: pytest tests/test_ai_service.py
+"""
+
+import asyncio
+import pytest
+from backend.services import ai_service
+
+
+@pytest.mark.parametrize("priority_score,expected", [
+    ("4 - Login broken", (4, "Login broken")),
+    ("P5: crashes on start", (5, "crashes on start")),
+    ("3/5 — minor", (3, "minor")),
+    ("2", (2, "")),
+    ("high", (None, "high")),
+    ("10 - out of range", (None, "10 - out of range")),
+])
+def test_parse_priority(priority_score, expected):
+    """Test splitting free-text priority scores into number and reason"""
+    assert ai_service.parse_priority(priority_score) == expected
+
+
+def test_issue_analysis_priority_fields_are_backward_compatible():
+    """Test that either representation of the priority fills in the other"""
+    old = ai_service.IssueAnalysis(
+        summary="Login fails", type="bug", priority_score="4 - Login broken",
+        suggested_labels=["bug"], potential_impact="Users cannot log in",
+    )
+    assert (old.priority, old.priority_reason) == (4, "Login broken")
+    
+    new = ai_service.IssueAnalysis(
+        summary="s", type="bug", priority=2, priority_reason="Minor",
+        suggested_labels=["bug"], potential_impact="i",
+    )
+    assert new.priority_score == "2 - Minor"
+
+
+def test_delta_prompt_includes_every_new_comment(monkeypatch):
+    """Test that all new comments up to MAX_DELTA_COMMENTS reach the delta prompt"""
+    prompts = []
+    
+    class RecordingRouter:
+        async def run(self, messages, parse):
+            prompts.append("\n".join(str(m.content) for m in messages))
+            return parse(
+                '{"summary": "s", "type": "bug", "priority_score": "3 - x", '
+                '"suggested_labels": ["bug"], "potential_impact": "i", "confidence": 0.9}'
+            )
+    
+    monkeypatch.setattr(ai_service, "get_router", lambda: RecordingRouter())
+    new_comments = [
+        {"user": f"user{n}", "body": f"Reproduced on machine number {n} with build {n * 7}"}
+        for n in range(12)
+    ]
+    previous = {"summary": "s", "type": "bug", "priority_score": "3 - x",
+                "suggested_labels": ["bug"], "potential_impact": "i"}
+    
+    asyncio.run(ai_service.analyze_issue_delta(previous, {"title": "Crash"}, new_comments))
+    
+    for n in range(12):
+        assert f"Comment {n + 1} by @user{n}:" in prompts[0]
+    assert "more comments" not in prompts[0]
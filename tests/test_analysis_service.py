@@ -0,0 +1,216 @@
+"""
+Tests for Analysis Service
+Run with: pytest tests/test_analysis_service.py
+"""
+
+import asyncio
+import pytest
+from backend.services import analysis_service
+from backend.services.ai_service import IssueAnalysis
+from backend.services.github_service import IssueRecord
+
+
+REPO_URL = "https://github.com/o/r"
+
+ANALYSIS = {
+    "summary": "Login fails",
+    "type": "bug",
+    "priority_score": "4 - Login broken",
+    "suggested_labels": ["bug"],
+    "potential_impact": "Users cannot log in",
+    "priority": 4,
+    "priority_reason": "Login broken"
+}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fake GitHub/LLM calls and count how often each one runs"""
+    calls = {
+        "fetch": 0, "analyze": 0, "delta": 0, "since": [],
+        "updated_at": "2024-01-01T00:00:00Z", "body": "b", "comments": [],
+    }
+
+    async def fake_fetch(repo_url, issue_number, max_comments=None):
+        calls["fetch"] += 1
+        if issue_number == 404:
+            raise ValueError("Issue #404 not found")
+        return IssueRecord.from_dict({
+            "title": "t",
+            "body": calls["body"],
+            "comments": calls["comments"][:max_comments],
+            "comments_count": len(calls["comments"]),
+            "updated_at": calls["updated_at"]
+        })
+
+    async def fake_comments_since(repo_url, issue_number, since, max_comments=None):
+        calls["since"].append(since)
+        return calls["comments"][-2:]
+
+    async def fake_analyze(issue_data, label_index=None):
+        calls["analyze"] += 1
+        return IssueAnalysis(**ANALYSIS)
+
+    async def no_labels(owner, repo):
+        return None
+
+    monkeypatch.setattr(analysis_service, "fetch_issue_data", fake_fetch)
+    async def fake_delta(previous, issue_data, new_comments, label_index=None):
+        calls["delta"] += 1
+        calls["delta_comments"] = [c["body"] for c in new_comments]
+        return IssueAnalysis(**dict(ANALYSIS, summary="Login fails on Safari"))
+
+    monkeypatch.setattr(analysis_service, "analyze_issue_with_ai", fake_analyze)
+    monkeypatch.setattr(analysis_service, "analyze_issue_delta", fake_delta)
+    monkeypatch.setattr(analysis_service, "fetch_comments_since", fake_comments_since)
+    monkeypatch.setattr(analysis_service, "get_label_index", no_labels)
+    monkeypatch.setattr(analysis_service, "refresher", analysis_service.BackgroundRefresher())
+    return calls
+
+
+def test_get_analysis_serves_cached_result(pipeline):
+    """Test that a second lookup is answered from the cache"""
+    async def scenario():
+        first, first_age = await analysis_service.get_analysis(REPO_URL, 1)
+        second, second_age = await analysis_service.get_analysis(REPO_URL, 1)
+        return first, first_age, second, second_age
+
+    first, first_age, second, second_age = asyncio.run(scenario())
+    assert first == second == ANALYSIS
+    assert first_age is None
+    assert second_age is not None
+    assert pipeline["analyze"] == 1
+
+
+def test_stale_result_refreshed_only_when_issue_changed(pipeline, monkeypatch):
+    """Test that stale entries are served immediately and re-analyzed only when the issue changed"""
+    monkeypatch.setenv("ANALYSIS_FRESH_TTL", "0")
+
+    async def scenario():
+        await analysis_service.get_analysis(REPO_URL, 1)
+
+        # Unchanged issue: revalidation fetches but does not call the LLM
+        await analysis_service.get_analysis(REPO_URL, 1)
+        await analysis_service.refresher.drain()
+        assert pipeline["analyze"] == 1
+
+        # Edited issue: stale result is still returned, refresh re-analyzes
+        pipeline["updated_at"] = "2024-02-01T00:00:00Z"
+        pipeline["body"] = "b, now with steps to reproduce"
+        analysis, age = await analysis_service.get_analysis(REPO_URL, 1)
+        assert analysis == ANALYSIS and age is not None
+        await analysis_service.refresher.drain()
+        assert pipeline["analyze"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_refresher_bounds_pending_work():
+    """Test that duplicate keys and overflow are rejected"""
+    async def scenario():
+        refresher = analysis_service.BackgroundRefresher(max_concurrency=1, max_pending=2)
+        gate = asyncio.Event()
+        assert refresher.schedule("a", gate.wait)
+        assert not refresher.schedule("a", gate.wait)
+        assert refresher.schedule("b", gate.wait)
+        assert not refresher.schedule("c", gate.wait)
+        gate.set()
+        await refresher.drain()
+        assert refresher.pending == 0
+
+    asyncio.run(scenario())
+
+
+def test_analyze_batch_reports_each_issue(pipeline):
+    """Test that a batch yields one result per unique issue, including failures"""
+    async def scenario():
+        return [r async for r in analysis_service.analyze_batch(REPO_URL, [1, 2, 404, 2], concurrency=2)]
+
+    results = sorted(asyncio.run(scenario()), key=lambda r: r["issue_number"])
+    assert [r["issue_number"] for r in results] == [1, 2, 404]
+    assert results[0]["analysis"] == ANALYSIS
+    assert "not found" in results[2]["error"]
+
+
+def test_analyze_batch_serves_cached_items_while_slots_are_busy(pipeline, monkeypatch):
+    """Test that a cached issue is not queued behind a slow uncached analysis"""
+    release = None
+
+    async def slow_analyze(issue_data, label_index=None):
+        await release.wait()
+        return IssueAnalysis(**ANALYSIS)
+
+    async def scenario():
+        nonlocal release
+        await analysis_service.get_analysis(REPO_URL, 2)
+        release = asyncio.Event()
+        monkeypatch.setattr(analysis_service, "analyze_issue_with_ai", slow_analyze)
+
+        order = []
+
+        async def collect():
+            async for result in analysis_service.analyze_batch(REPO_URL, [1, 2], concurrency=1):
+                order.append(result["issue_number"])
+                # Issue 1 holds the only slot until the cached result has arrived
+                release.set()
+
+        await asyncio.wait_for(collect(), timeout=5)
+        return order
+
+    assert asyncio.run(scenario()) == [2, 1]
+
+
+def test_refresh_skips_trivial_comments_and_deltas_substantive_ones(pipeline):
+    """Test that "+1" comments skip the LLM and real comments use the delta prompt"""
+    async def scenario():
+        await analysis_service.get_analysis(REPO_URL, 1)
+
+        # A bumped updated_at alone (e.g. a reaction) changes nothing
+        pipeline["updated_at"] = "2024-01-02T00:00:00Z"
+        await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (1, 0)
+
+        # Trivial comments are skipped entirely
+        pipeline["comments"] = [{"user": "a", "body": "+1"}, {"user": "b", "body": "Same here 👍"}]
+        pipeline["updated_at"] = "2024-01-03T00:00:00Z"
+        await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (1, 0)
+        assert pipeline["since"] == ["2024-01-02T00:00:00Z"]
+
+        # A substantive comment is folded in with the delta prompt
+        pipeline["comments"] = pipeline["comments"] + [
+            {"user": "c", "body": "Only happens on Safari 17, Chrome works"}
+        ]
+        pipeline["updated_at"] = "2024-01-04T00:00:00Z"
+        analysis = await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (1, 1)
+        assert pipeline["delta_comments"] == ["Only happens on Safari 17, Chrome works"]
+        assert analysis["summary"] == "Login fails on Safari"
+
+        # Nothing new since: the delta is not repeated
+        await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (1, 1)
+
+        # Editing the body still re-analyzes from scratch
+        pipeline["body"] = "b (edited)"
+        await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_too_many_new_comments_rerun_full_analysis(pipeline):
+    """Test that a delta is only used when it can see every new comment"""
+    async def scenario():
+        await analysis_service.get_analysis(REPO_URL, 1)
+        
+        pipeline["comments"] = [
+            {"user": f"u{n}", "body": f"Reproduced on setup {n} with a different stack trace"}
+            for n in range(analysis_service.MAX_DELTA_COMMENTS + 1)
+        ]
+        pipeline["updated_at"] = "2024-01-02T00:00:00Z"
+        await analysis_service.refresh_analysis(REPO_URL, 1)
+        assert (pipeline["analyze"], pipeline["delta"]) == (2, 0)
+        assert pipeline["since"] == []
+    
+    asyncio.run(scenario())
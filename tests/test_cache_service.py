@@ -0,0 +1,82 @@
+"""
+Tests for Cache Service
+Run with: pytest tests/test_cache_service.py
+"""
+
+import sqlite3
+from backend.services.cache_service import SQLiteCache, issue_cache_key
+
+
+def test_cache_roundtrip(tmp_path):
+    """Test storing and reading a value"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("analysis", "o/r#1", {"summary": "x", "labels": ["bug"]})
+    assert cache.get("analysis", "o/r#1") == {"summary": "x", "labels": ["bug"]}
+    assert cache.get("github", "o/r#1") is None
+
+
+def test_cache_expired_entry(tmp_path):
+    """Test that expired entries are hidden from get but kept for get_entry"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("analysis", "o/r#1", {"summary": "x"}, ttl=-1)
+    assert cache.get("analysis", "o/r#1") is None
+    assert cache.get_entry("analysis", "o/r#1").expired
+    assert cache.purge_expired() == 1
+
+
+def test_writes_purge_expired_entries_periodically(tmp_path):
+    """Test that writes delete expired rows, at most once per purge interval"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"), purge_interval=3600)
+    cache.set("github", "o/r#1", {"title": "x"}, ttl=-1)
+    # Within the interval expired rows are left alone
+    cache.set("github", "o/r#2", {"title": "y"})
+    assert cache.get_entry("github", "o/r#1") is not None
+    
+    cache.purge_interval = 0
+    cache.set("github", "o/r#3", {"title": "z"})
+    assert cache.get_entry("github", "o/r#1") is None
+    assert cache.get("github", "o/r#2") == {"title": "y"}
+    assert cache.stats()["connections_opened"] == 1
+
+
+def test_cache_shared_between_instances(tmp_path):
+    """Test that separate connections (as in separate workers) see the same data in WAL mode"""
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteCache(path)
+    reader = SQLiteCache(path)
+    writer.set("analysis", "o/r#1", {"summary": "x"})
+    assert reader.get("analysis", "o/r#1") == {"summary": "x"}
+    mode = sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_issue_cache_key_case_insensitive():
+    """Test that cache keys ignore owner/repo case"""
+    assert issue_cache_key("Facebook", "React", 1) == issue_cache_key("facebook", "react", 1)
+
+
+def test_query_analyses_uses_indexes(tmp_path):
+    """Test that priority/type queries are index scans without a sort step"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    for n in range(1, 51):
+        cache.set("analysis", issue_cache_key("o", "r", n), {
+            "analysis": {"type": "bug" if n % 2 else "question", "priority": n % 5 + 1}
+        })
+    
+    results = cache.query_analyses("o/r", "bug", min_priority=4, limit=5)
+    assert len(results) == 5
+    assert [entry.value["analysis"]["priority"] for _, entry in results] == [5] * 5
+    
+    # Capture the statements actually run (with parameters expanded)
+    conn = cache._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    cache.query_analyses("o/r", "bug")
+    cache.query_analyses("o/r", min_priority=3)
+    conn.set_trace_callback(None)
+    assert len(statements) == 2
+    
+    for statement in statements:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + statement))
+        assert "USING INDEX analysis_by" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,151 @@
+"""
+Tests for Cassette Service
+Run with: pytest tests/test_cassette_service.py
+"""
+
+import asyncio
+import time
+import httpx
+import pytest
+from backend.services import github_service
+from backend.services.cassette_service import (
+    Cassette,
+    CassetteChatModel,
+    CassetteMiss,
+    CassetteTransport,
+    RECORD,
+    REPLAY,
+)
+
+
+def github_handler(request: httpx.Request) -> httpx.Response:
+    """Fake GitHub: one issue with two pages of comments"""
+    if request.url.path.endswith("/comments"):
+        page = int(request.url.params.get("page", 1))
+        headers = {}
+        if page == 1:
+            headers["Link"] = f'<{request.url.copy_with(params={"per_page": 1, "page": 2})}>; rel="next"'
+        return httpx.Response(200, json=[{"user": {"login": f"u{page}"}, "body": f"c{page}"}], headers=headers)
+    return httpx.Response(200, json={
+        "title": "Crash", "body": "It crashes", "state": "open", "labels": [],
+        "updated_at": "2024-01-01T00:00:00Z", "user": {"login": "alice"}, "comments": 2
+    })
+
+
+def use_transport(monkeypatch, transport):
+    monkeypatch.setattr(github_service, "get_http_transport", lambda: transport)
+
+
+def test_github_traffic_replays_without_network(tmp_path, monkeypatch):
+    """Test that fetch_issue_data returns identical data from a recorded cassette"""
+    path = str(tmp_path / "github.ndjson.gz")
+
+    recorder = Cassette(path, RECORD)
+    use_transport(monkeypatch, CassetteTransport(recorder, inner=httpx.MockTransport(github_handler)))
+    recorded = asyncio.run(github_service.fetch_issue_data("https://github.com/o/r", 1))
+
+    def no_network(request):
+        raise AssertionError(f"Unexpected network call to {request.url}")
+
+    player = Cassette(path, REPLAY, latency="zero")
+    use_transport(monkeypatch, CassetteTransport(player, inner=httpx.MockTransport(no_network)))
+    replayed = asyncio.run(github_service.fetch_issue_data("https://github.com/o/r", 1))
+
+    assert replayed == recorded
+    assert [c["user"] for c in replayed["comments"]] == ["u1", "u2"]
+
+
+def test_replay_miss_is_reported(tmp_path, monkeypatch):
+    """Test that unrecorded requests fail instead of reaching the network"""
+    path = tmp_path / "empty.ndjson"
+    path.write_text("")
+    transport = CassetteTransport(Cassette(str(path), REPLAY))
+
+    async def request():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get("https://api.github.com/repos/o/r/issues/1")
+
+    with pytest.raises(CassetteMiss):
+        asyncio.run(request())
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return type("Response", (), {"content": '{"summary": "x"}', "usage_metadata": {"input_tokens": 5}})()
+
+
+def test_llm_calls_replay_with_original_or_zero_latency(tmp_path):
+    """Test LLM record/replay and both latency modes"""
+    path = str(tmp_path / "llm.ndjson.gz")
+    fake = FakeLLM()
+    recorder = CassetteChatModel(Cassette(path, RECORD), "gpt-4o-mini", 0.3, lambda: fake)
+    asyncio.run(recorder.ainvoke(["prompt"]))
+
+    def replay(latency):
+        player = CassetteChatModel(Cassette(path, REPLAY, latency), "gpt-4o-mini", 0.3, lambda: None)
+        started = time.monotonic()
+        response = asyncio.run(player.ainvoke(["prompt"]))
+        return response, time.monotonic() - started
+
+    response, elapsed = replay("zero")
+    assert response.content == '{"summary": "x"}'
+    assert response.usage_metadata == {"input_tokens": 5}
+    assert elapsed < 0.04
+    assert replay("original")[1] >= 0.04
+    assert fake.calls == 1
+
+
+def test_conditional_requests_are_recorded_separately(tmp_path):
+    """Test that a revalidation (304) and a plain request (200) replay their own responses"""
+    path = str(tmp_path / "labels.ndjson")
+    url = "https://api.github.com/repos/o/r/labels"
+
+    def labels_handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"name": "bug"}], headers={"ETag": '"v1"'})
+
+    async def fetch_both(transport, conditional_first):
+        async with httpx.AsyncClient(transport=transport) as client:
+            requests = [{"If-None-Match": '"v1"'}, {}]
+            if not conditional_first:
+                requests.reverse()
+            return {
+                bool(headers): (await client.get(url, headers=headers)).status_code
+                for headers in requests
+            }
+
+    recorder = CassetteTransport(Cassette(path, RECORD), inner=httpx.MockTransport(labels_handler))
+    asyncio.run(fetch_both(recorder, conditional_first=False))
+
+    player = CassetteTransport(Cassette(path, REPLAY, latency="zero"))
+    assert asyncio.run(fetch_both(player, conditional_first=True)) == {True: 304, False: 200}
+
+
+def test_oversized_responses_pass_through_unrecorded(tmp_path):
+    """Test that record mode stops buffering at the size limit and leaves the body to the caller"""
+    path = tmp_path / "big.ndjson"
+    body = b"x" * 5000
+
+    def big_handler(request):
+        return httpx.Response(200, stream=httpx.ByteStream(body))
+
+    transport = CassetteTransport(
+        Cassette(str(path), RECORD), inner=httpx.MockTransport(big_handler), max_body_bytes=1000
+    )
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=transport) as client:
+            small = await github_service.get_limited(client, "https://api.github.com/big", {}, max_bytes=10000)
+            with pytest.raises(github_service.ResponseTooLarge):
+                await github_service.get_limited(client, "https://api.github.com/big", {}, max_bytes=2000)
+            return small
+
+    response, text = asyncio.run(fetch())
+    assert text == body.decode()
+    assert not path.exists() or path.read_text() == ""
@@ -0,0 +1,81 @@
+"""
+Tests for Change Service
+Run with: pytest tests/test_change_service.py
+"""
+
+import asyncio
+import pytest
+from backend.services.change_service import (
+    detect_changes, is_trivial_comment, take_snapshot, COMMENTS, FULL, UNCHANGED
+)
+
+
+ISSUE = {
+    "title": "Login fails",
+    "body": "<!-- template -->\nSteps: click login",
+    "comments": [{"user": "a", "body": "Seeing this on 2.3 too, stack trace attached"}],
+    "comments_count": 1,
+}
+
+
+@pytest.mark.parametrize("body", ["+1", "👍", "Same here!", "me too +1", "Any update?", "bump", "> quoted\n+1", ""])
+def test_trivial_comments(body):
+    """Test that comments without information are recognized"""
+    assert is_trivial_comment(body)
+
+
+@pytest.mark.parametrize("body", ["Same here on Windows 11", "Fixed by downgrading to 2.2", "+1, also crashes with --verbose"])
+def test_substantive_comments(body):
+    """Test that comments with content are kept"""
+    assert not is_trivial_comment(body)
+
+
+def test_unchanged_when_only_noise_differs():
+    """Test that whitespace, HTML comments and trivial comments don't count as changes"""
+    snapshot = take_snapshot(ISSUE)
+    edited = dict(ISSUE, body="Steps:   click login\n<!-- another note -->", updated_at="later")
+    assert detect_changes(snapshot, edited).kind == UNCHANGED
+
+
+def test_title_or_body_edit_is_full_change():
+    """Test that edits to the issue itself require a full analysis"""
+    snapshot = take_snapshot(ISSUE)
+    assert detect_changes(snapshot, dict(ISSUE, title="Login fails on Safari")).kind == FULL
+    assert detect_changes(snapshot, dict(ISSUE, body="Steps: click logout")).kind == FULL
+    assert detect_changes(None, ISSUE).kind == FULL
+
+
+def test_comment_changes():
+    """Test added, edited and deleted comments"""
+    snapshot = take_snapshot(ISSUE)
+    
+    added = dict(ISSUE, comments=ISSUE["comments"] + [{"body": "+1"}], comments_count=2)
+    assert detect_changes(snapshot, added).kind == COMMENTS
+    
+    edited = dict(ISSUE, comments=[{"body": "Actually it works after a restart"}])
+    assert detect_changes(snapshot, edited).kind == FULL
+    
+    deleted = dict(ISSUE, comments=[], comments_count=0)
+    assert detect_changes(snapshot, deleted).kind == FULL
+
+
+def test_delta_prompt_with_stub_model(tmp_path, monkeypatch):
+    """Test the delta prompt end to end through the router"""
+    from backend.services import ai_service, routing_service
+    from backend.services.routing_service import ModelRouter, load_routes
+    
+    routes_path = tmp_path / "routes.json"
+    routes_path.write_text('{"routes": [{"name": "local", "provider": "stub"}]}')
+    monkeypatch.setattr(routing_service, "_router", ModelRouter(load_routes(str(routes_path))))
+    
+    previous = {
+        "summary": "Login fails", "type": "question", "priority_score": "2 - unclear",
+        "suggested_labels": ["question"], "potential_impact": "unknown",
+    }
+    analysis = asyncio.run(ai_service.analyze_issue_delta(
+        previous,
+        {"repo_owner": "o", "repo_name": "r", "issue_number": 1, "title": "Login fails"},
+        [{"user": "c", "body": "It crashes with an exception and traceback on every login"}],
+    ))
+    assert analysis.type == "bug"
+    assert analysis.summary == "Login fails"
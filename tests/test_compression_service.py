@@ -0,0 +1,207 @@
+"""
+Tests for Compression Service
+Run with: pytest tests/test_compression_service.py
+"""
+
+import asyncio
+import gzip
+import json
+import time
+import zlib
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from backend.services.compression_service import (
+    CompressionMiddleware, choose_encoding, compress_bytes
+)
+
+
+def make_items(count: int) -> list:
+    """Batch results shaped like /analyze/batch lines"""
+    return [
+        {
+            "issue_number": n,
+            "analysis": {
+                "summary": f"Login fails after upgrading to 2.{n % 10} when OAuth is enabled",
+                "type": ("bug", "feature_request", "question")[n % 3],
+                "priority_score": f"{n % 5 + 1} - Affects users signing in with OAuth",
+                "suggested_labels": ["bug", "authentication"],
+                "potential_impact": "Users relying on OAuth cannot sign in",
+                "priority": n % 5 + 1,
+                "priority_reason": "Affects users signing in with OAuth",
+            },
+            "cache_age_seconds": n * 0.5,
+        }
+        for n in range(count)
+    ]
+
+
+def make_app() -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    
+    @app.get("/big")
+    async def big():
+        return make_items(200)
+    
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+    
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for item in make_items(50):
+                yield orjson.dumps(item) + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    @app.get("/parquet")
+    async def parquet():
+        return Response(b"PAR1" * 1000, media_type="application/vnd.apache.parquet")
+    
+    return app
+
+
+def call(app, path: str, accept_encoding: str = None):
+    """Run one request through the ASGI app and collect the raw response messages"""
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": headers, "http_version": "1.1", "scheme": "http",
+        "server": ("test", 80), "client": ("test", 1), "root_path": "",
+    }
+    messages = []
+    requested = False
+    
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client stays connected until the response is complete
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        messages.append(message)
+    
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    chunks = [m.get("body", b"") for m in messages[1:]]
+    return dict(start["headers"]), chunks
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("gzip, deflate", "gzip"),
+    ("zstd;q=0.5, gzip", "gzip"),
+    ("zstd;q=0, gzip;q=0", None),
+    ("*", "zstd"),
+    ("identity", None),
+    ("br", None),
+])
+def test_choose_encoding(header, expected):
+    """Test Accept-Encoding negotiation with q-values"""
+    assert choose_encoding(header, ["zstd", "gzip"]) == expected
+
+
+def test_gzip_only_without_zstandard():
+    """Test that zstd is never chosen when it is not available"""
+    assert choose_encoding("zstd, gzip", ["gzip"]) == "gzip"
+
+
+def test_large_json_is_compressed_with_exact_length():
+    """Test one-shot compression of a complete JSON response"""
+    zstandard = pytest.importorskip("zstandard")
+    app = make_app()
+    
+    headers, chunks = call(app, "/big", "gzip, zstd")
+    body = b"".join(chunks)
+    assert headers[b"content-encoding"] == b"zstd"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(body)
+    assert json.loads(zstandard.ZstdDecompressor().decompress(body)) == make_items(200)
+    
+    headers, chunks = call(app, "/big", "gzip")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert json.loads(gzip.decompress(b"".join(chunks))) == make_items(200)
+
+
+def test_small_and_unaccepted_responses_are_not_compressed():
+    """Test the size threshold, missing Accept-Encoding and precompressed types"""
+    app = make_app()
+    
+    headers, chunks = call(app, "/small", "gzip")
+    assert b"content-encoding" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert json.loads(b"".join(chunks)) == {"status": "ok"}
+    
+    headers, _ = call(app, "/big")
+    assert b"content-encoding" not in headers
+    
+    headers, chunks = call(app, "/parquet", "gzip")
+    assert b"content-encoding" not in headers
+    assert b"".join(chunks) == b"PAR1" * 1000
+
+
+def test_streamed_ndjson_is_flushed_per_chunk():
+    """Test that each streamed chunk can be decoded as soon as it arrives"""
+    app = make_app()
+    headers, chunks = call(app, "/stream", "gzip")
+    
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = decoder.decompress(chunks[0])
+    assert json.loads(first.splitlines()[0])["issue_number"] == 0
+    rest = first + b"".join(decoder.decompress(chunk) for chunk in chunks[1:])
+    assert [json.loads(line) for line in rest.splitlines()] == make_items(50)
+
+
+def test_batch_response_is_identical_and_compresses_well():
+    """Test that orjson lines match json lines byte for byte and compress at least 5x"""
+    items = make_items(10_000)
+    json_body = "".join(json.dumps(i, separators=(",", ":")) + "\n" for i in items).encode()
+    orjson_body = b"".join(orjson.dumps(i) + b"\n" for i in items)
+    
+    assert orjson_body == json_body
+    assert len(compress_bytes(orjson_body, "gzip")) < len(orjson_body) / 5
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return
+    assert len(compress_bytes(orjson_body, "zstd")) < len(orjson_body) / 5
+
+
+@pytest.mark.benchmark
+def test_batch_response_benchmark():
+    """Benchmark: serialization CPU time and bytes sent for a 10k-item batch"""
+    items = make_items(10_000)
+    
+    def best_of(fn, runs=3):
+        timings = []
+        for _ in range(runs):
+            started = time.process_time()
+            result = fn()
+            timings.append(time.process_time() - started)
+        return min(timings), result
+    
+    json_time, json_body = best_of(lambda: "".join(json.dumps(i, separators=(",", ":")) + "\n" for i in items).encode())
+    orjson_time, orjson_body = best_of(lambda: b"".join(orjson.dumps(i) + b"\n" for i in items))
+    gzip_time, gzip_body = best_of(lambda: compress_bytes(orjson_body, "gzip"))
+    
+    lines = [
+        f"json   serialize {json_time * 1000:7.1f} ms  {len(json_body) / 1e6:6.2f} MB raw",
+        f"orjson serialize {orjson_time * 1000:7.1f} ms  {len(orjson_body) / 1e6:6.2f} MB raw",
+        f"gzip   compress  {gzip_time * 1000:7.1f} ms  {len(gzip_body) / 1e6:6.2f} MB sent",
+    ]
+    try:
+        import zstandard  # noqa: F401
+        zstd_time, zstd_body = best_of(lambda: compress_bytes(orjson_body, "zstd"))
+        lines.append(f"zstd   compress  {zstd_time * 1000:7.1f} ms  {len(zstd_body) / 1e6:6.2f} MB sent")
+    except ImportError:
+        lines.append("zstd   not installed")
+    print("\n10k-item batch response:\n  " + "\n  ".join(lines))
+    
+    assert orjson_time < json_time
@@ -0,0 +1,107 @@
+"""
+Tests for Export Service
+Run with: pytest tests/test_export_service.py
+"""
+
+import io
+import json
+import time
+import pytest
+from backend.services import export_service
+from backend.services.cache_service import issue_cache_key, ANALYSIS_NAMESPACE
+
+
+@pytest.fixture
+def stored(cache):
+    """Populate the cache with analyses for two repositories"""
+    for n in range(1, 2501):
+        cache.set(ANALYSIS_NAMESPACE, issue_cache_key("o", "r", n), {
+            "analysis": {
+                "summary": f"Issue {n}",
+                "type": "bug" if n % 2 else "question",
+                "priority_score": f"{n % 5 + 1} - reason",
+                "suggested_labels": ["bug", "ui"] if n % 2 else ["question"],
+                "potential_impact": "Some users"
+            },
+            "updated_at": "2024-01-01T00:00:00Z",
+            "analyzed_at": time.time()
+        })
+    cache.set(ANALYSIS_NAMESPACE, issue_cache_key("o", "other", 1), {
+        "analysis": {"summary": "x", "type": "bug", "priority_score": "1", "suggested_labels": [], "potential_impact": ""},
+        "updated_at": "",
+        "analyzed_at": time.time()
+    })
+
+
+def test_ndjson_export_streams_only_the_repo(stored):
+    """Test NDJSON export covers every stored analysis of the requested repo"""
+    chunks = list(export_service.export_chunks("o", "r", "ndjson"))
+    assert len(chunks) > 1
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert len(records) == 2500
+    assert {r["repo"] for r in records} == {"o/r"}
+    assert sorted(r["issue_number"] for r in records) == list(range(1, 2501))
+
+
+def test_parquet_export_dictionary_encodes_categories(stored):
+    """Test Parquet export round-trips with dictionary-encoded type and labels"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    pa = pytest.importorskip("pyarrow")
+    table = pq.read_table(io.BytesIO(b"".join(export_service.export_chunks("o", "r", "parquet"))))
+    assert table.num_rows == 2500
+    assert pa.types.is_dictionary(table.schema.field("type").type)
+    assert pa.types.is_dictionary(table.schema.field("suggested_labels").type.value_type)
+
+
+def test_arrow_export_streams_record_batches(stored):
+    """Test the Arrow IPC stream can be read back batch by batch"""
+    pa = pytest.importorskip("pyarrow")
+    reader = pa.ipc.open_stream(b"".join(export_service.export_chunks("o", "r", "arrow")))
+    batches = list(reader)
+    assert len(batches) == 3
+    assert sum(b.num_rows for b in batches) == 2500
+
+
+def test_export_rejects_unknown_format():
+    """Test that unknown formats are refused"""
+    with pytest.raises(ValueError):
+        export_service.export_chunks("o", "r", "xml")
+
+
+def test_export_records_have_numeric_priority(stored):
+    """Test that analyses stored before the numeric priority existed get one on export"""
+    record = next(export_service.iter_stored_analyses("o", "r"))
+    assert record["priority"] == int(record["priority_score"][0])
+    assert record["priority_reason"] == "reason"
+
+
+def test_query_top_critical_bugs(cache):
+    """Test priority/type queries over stored analyses"""
+    from backend.services.ai_service import IssueAnalysis
+    
+    for n in range(1, 301):
+        analysis = IssueAnalysis(
+            summary=f"Issue {n}",
+            type="bug" if n % 3 else "question",
+            priority_score=f"{n % 5 + 1} - reason",
+            suggested_labels=["bug"],
+            potential_impact="",
+        )
+        cache.set(ANALYSIS_NAMESPACE, issue_cache_key("Owner", "Repo", n), {
+            "analysis": analysis.model_dump(), "updated_at": "", "analyzed_at": time.time()
+        })
+    cache.set(ANALYSIS_NAMESPACE, issue_cache_key("owner", "other", 1), {
+        "analysis": {"type": "bug", "priority": 5}, "updated_at": "", "analyzed_at": time.time()
+    })
+    
+    critical_bugs = export_service.query_stored_analyses("owner", "repo", "bug", min_priority=5, limit=50)
+    expected = [n for n in range(1, 301) if n % 3 and n % 5 == 4]
+    assert len(critical_bugs) == min(50, len(expected))
+    assert {r["type"] for r in critical_bugs} == {"bug"}
+    assert {r["priority"] for r in critical_bugs} == {5}
+    assert {r["repo"] for r in critical_bugs} == {"owner/repo"}
+    
+    top = export_service.query_stored_analyses("owner", "repo", limit=100)
+    priorities = [r["priority"] for r in top]
+    assert priorities == sorted(priorities, reverse=True)
+    assert len(top) == 100
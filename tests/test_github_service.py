@@ -3,8 +3,59 @@ Tests for GitHub Service
 Run with: pytest tests/test_github_service.py
 """
 
+import asyncio
+import random
+import string
+import timeit
+import tracemalloc
+import httpx
+import orjson
 import pytest
-from backend.services.github_service import parse_repo_url
+from backend.services import github_service
+from backend.services.github_service import (
+    parse_repo_url,
+    parse_github_reference,
+    resolve_issue_number,
+    iter_issue_comments,
+    IssueComment,
+    IssueRecord,
+    ResponseTooLarge,
+    MAX_BODY_CHARS,
+    MAX_COMMENT_CHARS,
+    _match_reference,
+)
+
+
+COMMENTS_URL = "https://api.github.com/repos/o/r/issues/1/comments"
+
+
+def make_comments_client(total: int, requested: list) -> httpx.AsyncClient:
+    """Build a client that serves `total` comments with GitHub-style Link pagination"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url)
+        per_page = int(request.url.params.get("per_page", 30))
+        page = int(request.url.params.get("page", 1))
+        start = (page - 1) * per_page
+        items = [
+            {"user": {"login": f"user{i}"}, "body": f"comment {i}", "created_at": ""}
+            for i in range(start, min(start + per_page, total))
+        ]
+        headers = {}
+        if start + per_page < total:
+            headers["Link"] = f'<{COMMENTS_URL}?per_page={per_page}&page={page + 1}>; rel="next"'
+        return httpx.Response(200, json=items, headers=headers)
+    
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def collect_comments(total: int, max_comments=None):
+    requested = []
+    async with make_comments_client(total, requested) as client:
+        comments = [
+            comment
+            async for comment in iter_issue_comments(client, COMMENTS_URL, {}, max_comments=max_comments)
+        ]
+    return comments, requested
 
 
 def test_parse_repo_url_standard():
@@ -38,3 +89,220 @@ def test_parse_repo_url_incomplete():
     """Test parsing incomplete URL"""
     with pytest.raises(ValueError):
         parse_repo_url("https://github.com/facebook")
+
+
+def test_parse_repo_url_ssh():
+    """Test parsing SSH clone URLs"""
+    assert parse_repo_url("git@github.com:facebook/react.git") == ("facebook", "react")
+    assert parse_repo_url("ssh://git@github.com/facebook/react.git") == ("facebook", "react")
+
+
+def test_parse_repo_url_shorthand():
+    """Test parsing owner/repo shorthand"""
+    assert parse_repo_url("vercel/next.js") == ("vercel", "next.js")
+
+
+def test_parse_github_reference_issue_link():
+    """Test extracting the issue number from issue links"""
+    ref = parse_github_reference("https://github.com/facebook/react/issues/28000#issuecomment-1")
+    assert ref == ("facebook", "react", 28000)
+    assert parse_github_reference("https://github.com/facebook/react").issue_number is None
+    assert resolve_issue_number("https://github.com/facebook/react/issues/5") == 5
+    assert resolve_issue_number("https://github.com/facebook/react/issues/5", 5) == 5
+    assert resolve_issue_number("https://github.com/facebook/react", 7) == 7
+    with pytest.raises(ValueError, match="does not match"):
+        resolve_issue_number("https://github.com/facebook/react/issues/5", 7)
+    with pytest.raises(ValueError):
+        resolve_issue_number("https://github.com/facebook/react")
+
+
+@pytest.mark.parametrize("url", [
+    "https://github.com/facebook/react/issues/5/anything",
+    "https://github.com/facebook/react/tree/main",
+    "https://github.com/facebook/..",
+    "github.com/facebook",
+    "facebook",
+    "",
+])
+def test_parse_repo_url_rejects_odd_inputs(url):
+    """Test that extra path segments and incomplete references are rejected"""
+    with pytest.raises(ValueError):
+        parse_repo_url(url)
+
+
+def random_name(rng: random.Random, alphabet: str, max_length: int) -> str:
+    first = rng.choice(string.ascii_letters + string.digits)
+    return first + "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length - 1)))
+
+
+def test_parse_github_reference_roundtrip_property():
+    """Property: every supported format of a random owner/repo parses back to it"""
+    rng = random.Random(1234)
+    owner_alphabet = string.ascii_letters + string.digits + "-"
+    repo_alphabet = string.ascii_letters + string.digits + "-_."
+    
+    for _ in range(500):
+        owner = random_name(rng, owner_alphabet, 39)
+        repo = random_name(rng, repo_alphabet, 30)
+        if repo.endswith(".git"):
+            continue
+        number = rng.randint(1, 10**6)
+        forms = [
+            f"https://github.com/{owner}/{repo}",
+            f"http://www.github.com/{owner}/{repo}/",
+            f"https://github.com/{owner}/{repo}.git",
+            f"git@github.com:{owner}/{repo}.git",
+            f"ssh://git@github.com/{owner}/{repo}",
+            f"{owner}/{repo}",
+        ]
+        for form in forms:
+            assert parse_github_reference(form) == (owner, repo, None), form
+        for form in (f"https://github.com/{owner}/{repo}/issues/{number}",
+                     f"github.com/{owner}/{repo}/pull/{number}/"):
+            assert parse_github_reference(form) == (owner, repo, number), form
+
+
+def test_parse_repo_url_is_memoized():
+    """Test that a batch of repeated URLs runs the regex once per distinct URL"""
+    urls = [f"https://github.com/owner{i % 50}/repo{i % 50}" for i in range(1000)]
+    
+    _match_reference.cache_clear()
+    parsed = [parse_repo_url(u) for u in urls]
+    
+    info = _match_reference.cache_info()
+    assert (info.misses, info.hits) == (50, 950)
+    assert parsed[0] == parsed[50] == ("owner0", "repo0")
+
+
+@pytest.mark.benchmark
+def test_parse_repo_url_benchmark():
+    """Micro-benchmark: memoized parsing of repeated URLs in a batch"""
+    urls = [f"https://github.com/owner{i % 50}/repo{i % 50}" for i in range(1000)]
+    
+    _match_reference.cache_clear()
+    cold = timeit.timeit(lambda: [_match_reference.__wrapped__(u) for u in urls], number=5) / 5000
+    warm = timeit.timeit(lambda: [parse_repo_url(u) for u in urls], number=5) / 5000
+    print(f"\nparse_repo_url: uncached {cold * 1e6:.2f} us/call, memoized {warm * 1e6:.2f} us/call")
+    
+    assert warm < cold
+
+
+def test_iter_issue_comments_follows_all_pages():
+    """Test that every page is fetched when no budget is given"""
+    comments, requested = asyncio.run(collect_comments(250))
+    assert len(comments) == 250
+    assert len(requested) == 3
+    assert comments[-1].to_dict() == {"user": "user249", "body": "comment 249", "created_at": ""}
+
+
+def test_iter_issue_comments_stops_at_budget():
+    """Test that fetching stops once the comment budget is full"""
+    comments, requested = asyncio.run(collect_comments(2000, max_comments=5))
+    assert [c["user"] for c in comments] == [f"user{i}" for i in range(5)]
+    assert len(requested) == 1
+    assert requested[0].params["per_page"] == "5"
+
+
+def serve_issue(monkeypatch, body: str, comment_bodies: list, stream: bool = False):
+    """Serve one issue and its comments; with stream=True bodies are chunked without Content-Length"""
+    issue = orjson.dumps({
+        "title": "Crash", "body": body, "state": "open", "labels": [{"name": "bug"}],
+        "created_at": "", "updated_at": "", "user": {"login": "alice"},
+        "comments": len(comment_bodies), "reactions": {"+1": 3},
+    })
+    comments = orjson.dumps([
+        {"user": {"login": f"u{i}"}, "body": text, "created_at": "", "reactions": {}}
+        for i, text in enumerate(comment_bodies)
+    ])
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = comments if request.url.path.endswith("/comments") else issue
+        if stream:
+            chunks = [payload[i:i + 65536] for i in range(0, len(payload), 65536)]
+            return httpx.Response(200, stream=AsyncChunks(chunks))
+        return httpx.Response(200, content=payload)
+    
+    monkeypatch.setattr(github_service, "get_http_transport", lambda: httpx.MockTransport(handler))
+    return len(issue), len(comments)
+
+
+class AsyncChunks(httpx.AsyncByteStream):
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def fetch(max_comments=5) -> IssueRecord:
+    return asyncio.run(github_service.fetch_issue_data("https://github.com/o/r", 1, max_comments=max_comments))
+
+
+def test_fetch_issue_data_keeps_compact_capped_record(monkeypatch):
+    """Test that only the used fields are kept, with bodies capped"""
+    serve_issue(monkeypatch, "x" * (MAX_BODY_CHARS + 10), ["short", "y" * (MAX_COMMENT_CHARS + 10)])
+    issue = fetch()
+    
+    assert isinstance(issue, IssueRecord)
+    assert len(issue.body) == MAX_BODY_CHARS
+    assert [len(c.body) for c in issue.comments] == [5, MAX_COMMENT_CHARS]
+    assert issue["labels"] == ("bug",) and issue.get("user") == "alice"
+    assert issue.get("reactions") is None
+    assert not hasattr(issue, "__dict__") and not hasattr(issue.comments[0], "__dict__")
+    assert IssueRecord.from_dict(orjson.loads(orjson.dumps(issue.to_dict()))) == issue
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_oversized_responses_are_abandoned(monkeypatch, stream):
+    """Test the size limit with and without a declared Content-Length"""
+    monkeypatch.setenv("GITHUB_MAX_RESPONSE_BYTES", "200000")
+    serve_issue(monkeypatch, "x" * 300_000, [], stream=stream)
+    with pytest.raises(ResponseTooLarge):
+        fetch()
+    
+    # An oversized comments page ends the comments, not the analysis
+    serve_issue(monkeypatch, "body", ["c" * 150_000, "d" * 150_000], stream=stream)
+    issue = fetch()
+    assert issue.body == "body" and issue.comments == ()
+
+
+def test_fetch_issue_data_memory_is_bounded(monkeypatch):
+    """Test peak and retained memory of one in-flight fetch with huge bodies"""
+    issue_size, comments_size = serve_issue(monkeypatch, "x" * 1_500_000, ["y" * 300_000] * 5)
+    fetch()  # warm up imports and connection machinery
+    
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        issue = fetch()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    retained -= baseline
+    peak -= baseline
+    
+    assert issue.comments_count == 5
+    # Only the capped text outlives the request
+    assert retained < 2 * (MAX_BODY_CHARS + 5 * MAX_COMMENT_CHARS)
+    # One raw response at a time, and only until it is parsed
+    assert peak < 3 * max(issue_size, comments_size)
+
+
+def test_comment_records_are_smaller_than_dicts():
+    """Test that slotted comment records take less memory than the dicts they replace"""
+    def measure(make):
+        tracemalloc.start()
+        try:
+            items = [make(i) for i in range(10_000)]
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return size, items
+    
+    bodies = [f"comment {i}" for i in range(10_000)]
+    dict_size, _ = measure(lambda i: {"user": "alice", "body": bodies[i], "created_at": ""})
+    slot_size, _ = measure(lambda i: IssueComment("alice", bodies[i], ""))
+    
+    assert slot_size < dict_size
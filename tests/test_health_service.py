@@ -0,0 +1,187 @@
+"""
+Tests for Health Service
+Run with: pytest tests/test_health_service.py
+"""
+
+import asyncio
+import httpx
+import pytest
+from backend.services import github_service, health_service
+from backend.services.health_service import (
+    ReadinessProbe, UpstreamHealth, build_readiness, CLOSED, GITHUB, HALF_OPEN, LLM, OPEN
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def upstreams(monkeypatch):
+    """Fresh upstream windows on a fake clock"""
+    clock = FakeClock()
+    fresh = {
+        GITHUB: UpstreamHealth(GITHUB, failure_threshold=3, cooldown_seconds=30, max_latency=5.0, clock=clock),
+        LLM: UpstreamHealth(LLM, max_latency=60.0, clock=clock),
+    }
+    monkeypatch.setattr(health_service, "_upstreams", fresh)
+    return fresh, clock
+
+
+def test_circuit_opens_half_opens_and_closes(upstreams):
+    """Test consecutive failures open the circuit until a call succeeds after the cooldown"""
+    (health, clock) = upstreams[0][GITHUB], upstreams[1]
+    
+    for _ in range(2):
+        health.record(0.1, ok=False)
+    assert health.circuit == CLOSED
+    health.record(0.1, ok=False)
+    assert health.circuit == OPEN
+    
+    clock.now += 30
+    assert health.circuit == HALF_OPEN
+    # The trial call fails: open again for a full cooldown
+    health.record(0.1, ok=False)
+    assert health.circuit == OPEN
+    clock.now += 30
+    health.record(0.2, ok=True)
+    assert health.circuit == CLOSED and health.consecutive_failures == 0
+
+
+def test_rolling_window_stats(upstreams):
+    """Test latency percentiles and error rate over recent calls only"""
+    health, clock = upstreams[0][GITHUB], upstreams[1]
+    health.record(30.0, ok=False)
+    clock.now += 301
+    for latency in (0.1, 0.2, 0.3, 0.4, 2.0):
+        health.record(latency, ok=True)
+    
+    stats = health.stats()
+    assert stats["samples"] == 5
+    assert stats["error_rate"] == 0.0
+    assert stats["p50_latency_seconds"] == 0.3
+    assert stats["p95_latency_seconds"] == 2.0
+    assert stats["last_latency_seconds"] == 2.0
+
+
+def test_track_counts_in_flight_and_errors(upstreams):
+    """Test that tracked calls record status-based and exception failures"""
+    health = upstreams[0][GITHUB]
+    with health.track() as call:
+        assert health.in_flight == 1
+        call.finish_http(503)
+    with pytest.raises(TimeoutError):
+        with health.track():
+            raise TimeoutError()
+    with health.track() as call:
+        call.finish_http(404)
+    
+    assert health.in_flight == 0 and health.peak_in_flight == 1
+    assert [ok for *_, ok in health._samples] == [False, False, True]
+
+
+def test_github_rate_limit_403_is_a_failure(upstreams):
+    """Test that a 403 is only a failure when GitHub says the rate limit is exhausted"""
+    responses = iter([
+        httpx.Response(403, json={}, headers={"X-RateLimit-Remaining": "0"}),
+        httpx.Response(403, json={}, headers={"Retry-After": "60"}),
+        httpx.Response(403, json={}, headers={"X-RateLimit-Remaining": "4999"}),
+    ])
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(responses))) as client:
+            for _ in range(3):
+                await github_service.get_limited(client, "https://api.github.com/x", {})
+    
+    asyncio.run(scenario())
+    assert [ok for *_, ok in upstreams[0][GITHUB]._samples] == [False, False, True]
+
+
+def test_github_requests_feed_the_window(upstreams):
+    """Test that GitHub calls are timed at the response headers and 5xx count as failures"""
+    statuses = iter([200, 502])
+    
+    def handler(request):
+        return httpx.Response(next(statuses), json={})
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await github_service.get_limited(client, "https://api.github.com/x", {})
+            await github_service.get_limited(client, "https://api.github.com/x", {})
+    
+    asyncio.run(scenario())
+    stats = upstreams[0][GITHUB].stats()
+    assert stats["samples"] == 2
+    assert stats["error_rate"] == 0.5
+
+
+def test_readiness_reports_degraded_upstreams(upstreams, monkeypatch):
+    """Test that an open circuit or slow upstream makes the instance unready"""
+    windows, clock = upstreams
+    report = build_readiness()
+    assert report["status"] == "ready"
+    assert set(report) >= {"upstreams", "queue", "cache", "warnings"}
+    assert report["queue"]["llm_queue_depth"] == {"interactive": 0, "batch": 0}
+    
+    for _ in range(3):
+        windows[GITHUB].record(10.0, ok=False)
+    for _ in range(3):
+        windows[LLM].record(90.0, ok=True)
+    report = build_readiness()
+    assert report["status"] == "not_ready"
+    assert any("github circuit open" in p for p in report["problems"])
+    assert any("llm slow" in p for p in report["problems"])
+    assert report["warnings"] == []
+    
+    # Opted out: slowness is reported without failing readiness
+    monkeypatch.setenv("READY_ON_SLOW_UPSTREAM", "false")
+    report = build_readiness()
+    assert not any("llm" in p for p in report["problems"])
+    assert any("llm slow" in w for w in report["warnings"])
+    
+    # After the cooldown traffic is let back in to try GitHub again
+    clock.now += 30
+    assert not any("github" in p for p in build_readiness()["problems"])
+
+
+def test_readiness_recovers_without_traffic(upstreams):
+    """Test that neither verdict outlives the cooldown when no calls arrive to clear it"""
+    windows, clock = upstreams
+    for _ in range(3):
+        windows[GITHUB].record(10.0, ok=False)
+    windows[GITHUB].record(8.0, ok=True)
+    for _ in range(3):
+        windows[GITHUB].record(10.0, ok=False)
+    assert build_readiness()["status"] == "not_ready"
+    assert windows[GITHUB].stats()["slow"]
+    
+    # Slow samples stay in the window for 300s, but stop counting after 30s without calls
+    clock.now += 30
+    report = build_readiness()
+    assert report["status"] == "ready"
+    assert report["warnings"] == []
+    assert report["upstreams"][GITHUB]["p50_latency_seconds"] == 8.0
+    
+    # Fresh fast calls after the slow period bring the median back down
+    for _ in range(3):
+        windows[GITHUB].record(0.2, ok=True)
+    assert not windows[GITHUB].stats()["slow"]
+    assert windows[GITHUB].circuit == CLOSED
+
+
+def test_readiness_probe_is_cached(upstreams):
+    """Test that frequent probes reuse one report instead of recomputing it"""
+    clock = upstreams[1]
+    builds = []
+    probe = ReadinessProbe(build=lambda: builds.append(1) or {"status": "ready"}, max_age=5.0, clock=clock)
+    
+    for _ in range(100):
+        probe.report()
+    assert len(builds) == 1
+    clock.now += 5
+    assert probe.report()["age_seconds"] == 0.0
+    assert len(builds) == 2
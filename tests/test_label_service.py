@@ -0,0 +1,176 @@
+"""
+Tests for Label Service
+Run with: pytest tests/test_label_service.py
+"""
+
+import asyncio
+import time
+import httpx
+import pytest
+from backend.services import label_service
+from backend.services.label_service import LabelIndex, core_label, normalize_label
+
+
+LABELS = [
+    {"name": "type: bug", "description": "Something isn't working"},
+    {"name": "enhancement", "description": "New feature or request"},
+    {"name": "documentation", "description": "Improvements or additions to docs"},
+    {"name": "area/authentication", "description": "Login, OAuth and sessions"},
+    {"name": "area/ui", "description": "Web interface"},
+    {"name": "priority: high", "description": ""},
+    {"name": "good first issue", "description": "Good for newcomers"},
+]
+
+
+def test_normalize_and_core_label():
+    """Test that scope prefixes, case and punctuation are ignored"""
+    assert normalize_label("Type: Bug 🐛") == "type bug"
+    assert normalize_label("feature_request") == "feature request"
+    assert core_label("type: bug") == "bug"
+    assert core_label("kind/feature") == "feature"
+    assert core_label("C-bug") == "bug"
+    assert core_label("good first issue") == "good first issue"
+
+
+def test_match_exact_alias_and_fuzzy():
+    """Test mapping LLM labels to the repository's labels"""
+    index = LabelIndex(LABELS)
+    
+    assert index.match("bug") == "type: bug"
+    assert index.match("Documentation") == "documentation"
+    assert index.match("feature_request") == "enhancement"
+    assert index.match("docs") == "documentation"
+    assert index.match("authentication") == "area/authentication"
+    assert index.match("authentification") == "area/authentication"
+    assert index.match("high-priority") == "priority: high"
+    assert index.match("performance") is None
+
+
+def test_map_labels_drops_unknown_and_duplicates():
+    """Test that only existing labels are kept, unless none match"""
+    index = LabelIndex(LABELS)
+    
+    assert index.map_labels(["bug", "Bug", "crash", "auth"]) == ["type: bug"]
+    assert index.map_labels(["crash", "performance"]) == ["crash", "performance"]
+
+
+def test_relevant_labels_are_limited_and_ranked():
+    """Test that large catalogs only offer type labels and labels matching the issue"""
+    labels = LABELS + [{"name": f"area/module-{chr(97 + i // 26)}{chr(97 + i % 26)}"} for i in range(600)]
+    index = LabelIndex(labels)
+    
+    relevant = index.relevant("OAuth login redirect fails in the web interface", limit=5)
+    assert len(relevant) == 5
+    assert relevant[:3] == ["type: bug", "enhancement", "documentation"]
+    assert "area/authentication" in relevant
+    assert "area/ui" in relevant
+    
+    assert LabelIndex(LABELS).relevant("anything") == [label["name"] for label in LABELS]
+
+
+@pytest.mark.benchmark
+def test_label_index_benchmark():
+    """Benchmark: matching against a 1000-label catalog stays fast"""
+    labels = [{"name": f"area/component-{i}", "description": f"Component {i}"} for i in range(1000)]
+    index = LabelIndex(labels)
+    
+    started = time.perf_counter()
+    for i in range(1000):
+        index.match(f"component {i}")
+        index.match("componnt")
+    elapsed = (time.perf_counter() - started) / 2000
+    
+    assert elapsed < 5e-3
+
+
+@pytest.fixture
+def github_labels(monkeypatch):
+    """Serve LABELS from a fake GitHub with ETags and count requests"""
+    monkeypatch.setattr(label_service, "_indexes", {})
+    state = {"requests": [], "fail": False}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request)
+        if state["fail"]:
+            return httpx.Response(500, text="boom")
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        page = int(request.url.params.get("page", 1))
+        headers = {"ETag": '"v1"'}
+        if page == 1:
+            headers["Link"] = f'<{request.url.copy_with(params={"page": 2})}>; rel="next"'
+        return httpx.Response(200, json=LABELS[:4] if page == 1 else LABELS[4:], headers=headers)
+    
+    monkeypatch.setattr(label_service, "get_http_transport", lambda: httpx.MockTransport(handler))
+    return state
+
+
+def test_get_label_index_fetches_all_pages_once(github_labels):
+    """Test that the catalog is paginated and then served from the cache"""
+    async def scenario():
+        first = await label_service.get_label_index("O", "R")
+        second = await label_service.get_label_index("o", "r")
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    assert len(first) == len(LABELS)
+    assert second is first
+    assert len(github_labels["requests"]) == 2
+
+
+def test_get_label_index_revalidates_with_etag(github_labels, monkeypatch):
+    """Test that an expired catalog is revalidated with If-None-Match"""
+    asyncio.run(label_service.get_label_index("o", "r"))
+    monkeypatch.setenv("LABEL_CACHE_TTL", "0")
+    
+    index = asyncio.run(label_service.get_label_index("o", "r"))
+    assert len(index) == len(LABELS)
+    assert github_labels["requests"][-1].headers["If-None-Match"] == '"v1"'
+    assert len(github_labels["requests"]) == 3
+    
+    github_labels["fail"] = True
+    assert len(asyncio.run(label_service.get_label_index("o", "r"))) == len(LABELS)
+
+
+def test_get_label_index_without_catalog(github_labels):
+    """Test that a failing label fetch leaves analyses ungrounded instead of failing"""
+    github_labels["fail"] = True
+    assert asyncio.run(label_service.get_label_index("o", "r")) is None
+
+
+def test_failed_label_fetch_is_cached_briefly(github_labels, cache, monkeypatch):
+    """Test that a failure without a catalog isn't refetched until LABEL_FAILURE_TTL passes"""
+    github_labels["fail"] = True
+    assert asyncio.run(label_service.get_label_index("o", "r")) is None
+    assert asyncio.run(label_service.get_label_index("o", "r")) is None
+    assert len(github_labels["requests"]) == 1
+    
+    monkeypatch.setenv("LABEL_FAILURE_TTL", "0")
+    cache.delete("labels", "o/r")
+    assert asyncio.run(label_service.get_label_index("o", "r")) is None
+    github_labels["fail"] = False
+    assert len(asyncio.run(label_service.get_label_index("o", "r"))) == len(LABELS)
+    assert "If-None-Match" not in github_labels["requests"][-2].headers
+
+
+def test_oversized_label_page_is_a_fetch_failure(github_labels, monkeypatch):
+    """Test that label pages go through the GitHub response size limit"""
+    monkeypatch.setenv("GITHUB_MAX_RESPONSE_BYTES", "50")
+    assert asyncio.run(label_service.get_label_index("o", "r")) is None
+    assert len(github_labels["requests"]) == 1
+
+
+def test_analysis_labels_are_grounded(tmp_path, monkeypatch):
+    """Test that analyze_issue_with_ai maps suggested labels onto the catalog"""
+    from backend.services import ai_service, routing_service
+    from backend.services.routing_service import ModelRouter, load_routes
+    
+    routes_path = tmp_path / "routes.json"
+    routes_path.write_text('{"routes": [{"name": "local", "provider": "stub"}]}')
+    monkeypatch.setattr(routing_service, "_router", ModelRouter(load_routes(str(routes_path))))
+    
+    analysis = asyncio.run(ai_service.analyze_issue_with_ai(
+        {"title": "Crash on save", "body": "Traceback ... error", "comments": []},
+        LabelIndex(LABELS),
+    ))
+    assert analysis.suggested_labels == ["type: bug"]
@@ -0,0 +1,129 @@
+"""
+Tests for Preprocess Service
+Run with: pytest tests/test_preprocess_service.py
+"""
+
+import os
+import time
+import pytest
+from backend.services.preprocess_service import preprocess_text
+
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "issue_body_noisy.md")
+
+
+def load_fixture() -> str:
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_strips_html_comments_and_empty_sections():
+    """Test that comments and unfilled template sections are removed"""
+    result = preprocess_text(load_fixture())
+    
+    assert "<!--" not in result.text
+    assert "Thanks for filing" not in result.text
+    assert "_No response_" not in result.text
+    assert "### Expected behavior" not in result.text
+    assert "### Screenshots" not in result.text
+    assert "### Describe the bug" in result.text
+    assert "recursion error" in result.text
+
+
+def test_keeps_headings_inside_code_fences():
+    """Test that a shell comment in a code block is not mistaken for a heading"""
+    text = "### Steps\n```\n# install\n```\n### Notes\n_No response_"
+    result = preprocess_text(text)
+    assert result.text == "### Steps\n```\n# install\n```"
+
+
+def test_collapses_repeated_log_lines():
+    """Test that lines differing only in numbers are collapsed"""
+    result = preprocess_text(load_fixture())
+    
+    assert "processed batch 1 of 900" in result.text
+    assert "processed batch 5 of 900" not in result.text
+    assert "[7 similar lines omitted]" in result.text
+
+
+def test_short_runs_are_kept():
+    """Test that two similar lines are not replaced by a marker"""
+    result = preprocess_text("retry 1 failed\nretry 2 failed\ndone")
+    assert result.text == "retry 1 failed\nretry 2 failed\ndone"
+
+
+def test_trims_long_stack_traces():
+    """Test that the middle of a long trace is dropped but both ends kept"""
+    names = [a + b for a in "abcde" for b in "fghijklm"]
+    frames = "\n".join(f"    at {name} (app.js:{i}:1)" for i, name in enumerate(names))
+    result = preprocess_text(f"TypeError: boom\n{frames}\nafter")
+    lines = result.text.splitlines()
+    
+    assert lines[0] == "TypeError: boom"
+    assert " af " in lines[1]
+    assert " em " in lines[-2]
+    assert any("stack frame lines omitted" in line for line in lines)
+    assert lines[-1] == "after"
+
+
+def test_drops_quotes_of_earlier_text():
+    """Test that quoted replies repeating the body or earlier comments are dropped"""
+    seen = set()
+    preprocess_text("The export crashes on big projects.", seen)
+    
+    reply = preprocess_text("> The export crashes on big projects.\n\nSame here on 2.3.1", seen)
+    assert "crashes" not in reply.text
+    assert "[quote of earlier text omitted]" in reply.text
+    assert "Same here" in reply.text
+    
+    new_quote = preprocess_text("> Something nobody said\n\nAgreed", seen)
+    assert "> Something nobody said" in new_quote.text
+
+
+def test_keeps_body_made_only_of_a_heading():
+    """Test that a heading is kept when it is all the text there is"""
+    assert preprocess_text("## Crash when exporting\n\n").text == "## Crash when exporting"
+    assert preprocess_text("**Export fails**").text == "**Export fails**"
+
+
+def test_keeps_parent_heading_of_a_subsection():
+    """Test that an empty heading directly followed by a subheading is kept"""
+    text = "## Bug report\n### Steps\nClick export\n### Expected\n_No response_\n## Notes\n\n## Version\n2.3"
+    result = preprocess_text(text)
+    assert result.text == "## Bug report\n### Steps\nClick export\n## Version\n2.3"
+
+
+def test_reports_bytes_and_tokens_saved():
+    """Test the savings report"""
+    fixture = load_fixture()
+    result = preprocess_text(fixture)
+    
+    assert result.bytes_before == len(fixture.encode("utf-8"))
+    assert result.bytes_after == len(result.text.encode("utf-8"))
+    assert result.bytes_saved > result.bytes_before // 3
+    assert result.tokens_saved == (result.bytes_saved + 3) // 4
+    assert preprocess_text("").bytes_saved == 0
+
+
+def test_unterminated_comment_is_linear():
+    """Test that many unclosed comment openers don't cause quadratic rescans"""
+    result = preprocess_text("keep\n<!--" + "<!-- x " * 50000)
+    assert result.text == "keep"
+
+
+@pytest.mark.benchmark
+def test_preprocess_benchmark():
+    """Benchmark: throughput on large issues, and time grows linearly with size"""
+    fixture = load_fixture()
+    
+    def timed(copies: int) -> float:
+        text = fixture * copies
+        started = time.perf_counter()
+        preprocess_text(text)
+        return time.perf_counter() - started
+    
+    small = min(timed(100) for _ in range(3))
+    large = min(timed(800) for _ in range(3))
+    
+    # 8x the input should take about 8x the time, far from the 64x of a quadratic pass
+    assert large < small * 20
@@ -0,0 +1,91 @@
+"""
+Tests for Scheduler Service
+Run with: pytest tests/test_scheduler_service.py
+"""
+
+import asyncio
+import pytest
+from backend.services.scheduler_service import (
+    AdmissionRejected,
+    FairScheduler,
+    INTERACTIVE,
+    BATCH,
+)
+
+
+async def run_jobs(scheduler, jobs, hold=0.01):
+    """Run (tenant, priority) jobs through the scheduler and return the order they got slots"""
+    order = []
+
+    async def job(tenant, priority):
+        async with scheduler.slot(tenant, priority):
+            order.append((tenant, priority))
+            await asyncio.sleep(hold)
+
+    # Occupy the only slot so every job below has to queue
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot("blocker", INTERACTIVE):
+            await gate.wait()
+
+    first = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for tenant, priority in jobs:
+        tasks.append(asyncio.create_task(job(tenant, priority)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    return order
+
+
+def test_interactive_requests_jump_batch_queue():
+    """Test that interactive work is dispatched before queued batch work"""
+    scheduler = FairScheduler(capacity=1, initial_service_time=0.01)
+    order = asyncio.run(run_jobs(scheduler, [("a", BATCH), ("a", BATCH), ("b", INTERACTIVE)]))
+    assert order[0] == ("b", INTERACTIVE)
+
+
+def test_tenants_share_capacity_fairly():
+    """Test that a tenant with a deep queue does not starve a tenant that arrives later"""
+    scheduler = FairScheduler(capacity=1, initial_service_time=0.01)
+    jobs = [("heavy", BATCH)] * 6 + [("light", BATCH)] * 2
+    order = [tenant for tenant, _ in asyncio.run(run_jobs(scheduler, jobs))]
+    # Light's jobs are interleaved near the front instead of waiting behind all of heavy's
+    assert order.index("light") <= 1
+    assert order[:4].count("light") == 2
+
+
+def test_weights_give_larger_share():
+    """Test that a tenant with weight 2 gets about twice the slots while both are waiting"""
+    scheduler = FairScheduler(capacity=1, initial_service_time=0.01, weights={"gold": 2.0})
+    jobs = [("gold", BATCH)] * 6 + [("std", BATCH)] * 6
+    order = [tenant for tenant, _ in asyncio.run(run_jobs(scheduler, jobs))]
+    assert order[:6].count("gold") == 4
+
+
+def test_admission_sheds_load_over_slo():
+    """Test that requests are rejected with a retry hint when the queue exceeds the SLO"""
+    async def scenario():
+        scheduler = FairScheduler(
+            capacity=1, slo_seconds={INTERACTIVE: 5.0, BATCH: 5.0}, initial_service_time=10.0
+        )
+        gate = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot("a", INTERACTIVE):
+                await gate.wait()
+
+        task = asyncio.create_task(blocker())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            scheduler.check_admission(INTERACTIVE)
+        gate.set()
+        await task
+        return scheduler, exc.value
+
+    scheduler, rejection = asyncio.run(scenario())
+    assert rejection.retry_after >= 1
+    assert scheduler.stats()["rejected"][INTERACTIVE] == 1
+    assert scheduler.stats()["queue_depth"] == {INTERACTIVE: 0, BATCH: 0}
@@ -0,0 +1,130 @@
+"""
+Tests for Triage Service
+Run with: pytest tests/test_triage_service.py
+"""
+
+import asyncio
+import io
+import json
+from backend.services import triage_service
+from backend.services.ai_service import IssueAnalysis
+from backend.services.triage_service import (
+    Progress, load_checkpoint, ndjson_writer, read_issue_refs, run_triage, truncate_partial_line
+)
+
+
+ANALYSIS = {
+    "summary": "Login fails",
+    "type": "bug",
+    "priority_score": "4 - Login broken",
+    "suggested_labels": ["bug"],
+    "potential_impact": "Users cannot log in"
+}
+
+
+def test_read_issue_refs_accepts_common_forms():
+    """Test links, owner/repo#N and owner/repo N, skipping comments and duplicates"""
+    lines = [
+        "# backlog",
+        "https://github.com/Owner/Repo/issues/1",
+        "owner/repo#1",
+        "owner/repo 2",
+        "git@github.com:owner/other.git",
+        "not a reference",
+        "",
+    ]
+    refs = list(read_issue_refs(lines))
+    
+    assert [(r.owner, r.repo, r.issue_number) for r in refs[:2]] == [("Owner", "Repo", 1), ("owner", "repo", 2)]
+    assert refs[2].error == "No issue number in reference"
+    assert refs[3].error and "Invalid GitHub URL" in refs[3].error
+    assert len(refs) == 4
+
+
+def test_checkpoint_skips_only_successes(tmp_path):
+    """Test that failed and truncated lines are retried on resume"""
+    path = tmp_path / "out.ndjson"
+    path.write_text(
+        json.dumps({"ref": "o/r#1", "repo": "O/R", "issue_number": 1, "analysis": ANALYSIS}) + "\n"
+        + json.dumps({"ref": "o/r#2", "repo": "o/r", "issue_number": 2, "error": "rate limit"}) + "\n"
+        + '{"ref": "o/r#3", "repo": "o/r", "issue_nu'
+    )
+    
+    assert load_checkpoint(str(path)) == {"o/r#1"}
+    assert load_checkpoint(str(tmp_path / "missing.ndjson")) == set()
+
+
+def test_resume_appends_after_truncated_line(tmp_path):
+    """Test that a line cut off by an interruption is dropped before new records are appended"""
+    path = tmp_path / "out.ndjson"
+    complete = json.dumps({"ref": "o/r#1", "repo": "o/r", "issue_number": 1, "analysis": ANALYSIS}) + "\n"
+    path.write_text(complete + '{"ref": "o/r#2", "repo": "o/r", "issue_nu')
+    
+    assert truncate_partial_line(str(path), block_size=8) == len('{"ref": "o/r#2", "repo": "o/r", "issue_nu')
+    with open(path, "a", encoding="utf-8") as f:
+        ndjson_writer(f)({"ref": "o/r#2", "repo": "o/r", "issue_number": 2, "analysis": ANALYSIS})
+    
+    assert [json.loads(line)["issue_number"] for line in path.read_text().splitlines()] == [1, 2]
+    assert load_checkpoint(str(path)) == {"o/r#1", "o/r#2"}
+    
+    assert truncate_partial_line(str(path)) == 0
+    path.write_text('{"ref": "o/r#1"')
+    assert truncate_partial_line(str(path)) == len('{"ref": "o/r#1"')
+    assert path.read_text() == ""
+    assert truncate_partial_line(str(tmp_path / "missing.ndjson")) == 0
+
+
+def test_run_triage_bounds_concurrency_and_reports_progress():
+    """Test that at most `concurrency` issues are in flight and every result is written"""
+    refs = list(read_issue_refs(f"o/r#{n}" for n in range(1, 41)))
+    in_flight, peak, written = 0, 0, []
+    
+    async def fake_triage(ref):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        if ref.issue_number % 10 == 0:
+            return {"issue_number": ref.issue_number, "error": "boom"}
+        return {"issue_number": ref.issue_number, "analysis": ANALYSIS}
+    
+    stream = io.StringIO()
+    progress = Progress(len(refs), stream=stream, interval=0)
+    succeeded, failed = asyncio.run(
+        run_triage(refs, written.append, concurrency=3, progress=progress, triage=fake_triage)
+    )
+    
+    assert (succeeded, failed) == (36, 4)
+    assert peak == 3
+    assert sorted(r["issue_number"] for r in written) == list(range(1, 41))
+    assert stream.getvalue().rstrip().endswith("eta 0s")
+    assert "[40/40] ok=36 failed=4" in stream.getvalue()
+
+
+def test_triage_issue_calls_services_directly(monkeypatch):
+    """Test one issue end to end with the GitHub and LLM calls faked"""
+    async def fake_fetch(repo_url, issue_number, max_comments=None):
+        assert repo_url == "https://github.com/o/r"
+        if issue_number == 404:
+            raise ValueError("Issue #404 not found")
+        return {"title": "t", "body": "b", "comments": []}
+    
+    async def fake_analyze(issue_data, label_index=None):
+        return IssueAnalysis(**ANALYSIS)
+    
+    async def no_labels(owner, repo):
+        return None
+    
+    monkeypatch.setattr(triage_service, "fetch_issue_data", fake_fetch)
+    monkeypatch.setattr(triage_service, "analyze_issue_with_ai", fake_analyze)
+    monkeypatch.setattr(triage_service, "get_label_index", no_labels)
+    
+    refs = list(read_issue_refs(["o/r#1", "o/r#404", "bogus"]))
+    stream = io.StringIO()
+    asyncio.run(run_triage(refs, ndjson_writer(stream), concurrency=2))
+    records = {r["ref"]: r for r in map(json.loads, stream.getvalue().splitlines())}
+    
+    assert records["o/r#1"]["analysis"]["priority"] == 4
+    assert records["o/r#404"]["error"] == "Issue #404 not found"
+    assert "error" in records["bogus"]
@@ -0,0 +1,59 @@
+"""
+Tests for Webhook Service
+Run with: pytest tests/test_webhook_service.py
+"""
+
+import asyncio
+import os
+import pytest
+from backend.services.webhook_service import (
+    AnalysisDebouncer,
+    WebhookSignatureError,
+    handle_webhook,
+    load_recorded_deliveries,
+    replay_deliveries,
+    sign_payload,
+    verify_signature,
+)
+
+
+SECRET = "test-secret"
+DELIVERIES = os.path.join(os.path.dirname(__file__), "fixtures", "webhook_deliveries.ndjson")
+
+
+def test_verify_signature():
+    """Test HMAC signature verification"""
+    body = b'{"action": "opened"}'
+    assert verify_signature(body, sign_payload(body, SECRET), SECRET)
+    assert not verify_signature(body, sign_payload(body, "other"), SECRET)
+    assert not verify_signature(body, None, SECRET)
+
+
+def test_handle_webhook_rejects_bad_signature():
+    """Test that unsigned deliveries are refused"""
+    with pytest.raises(WebhookSignatureError):
+        asyncio.run(handle_webhook("issues", b"{}", "sha256=bad", secret=SECRET))
+
+
+def test_replay_recorded_deliveries_debounces_bursts():
+    """Test that replayed deliveries queue one analysis per issue after a burst"""
+    analyzed = []
+
+    async def fake_analysis(repo_url, issue_number):
+        analyzed.append((repo_url, issue_number))
+
+    async def scenario():
+        debouncer = AnalysisDebouncer(fake_analysis, delay=0.05)
+
+        async def send(event, body, signature):
+            return await handle_webhook(event, body, signature, secret=SECRET, debouncer=debouncer)
+
+        results = await replay_deliveries(load_recorded_deliveries(DELIVERIES), send, SECRET)
+        await debouncer.drain()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [r["status"] for r in results] == [
+        "pong", "queued", "debounced", "debounced", "ignored", "ignored", "queued"
+    ]
+    assert sorted(analyzed) == [("https://github.com/o/r", 1), ("https://github.com/o/r", 3)]